@@ -0,0 +1,325 @@
+# FILE: benchmark/jalankan_benchmark.py
+#
+# Benchmark berulang untuk route Management Service dan Pricing Service.
+# Mode:
+#   wsgi  - aplikasi diimpor langsung dan dipanggil lewat Flask test client
+#           (tanpa jaringan; jumlah query SQL direkam dengan profiler_sql)
+#   http  - server yang sedang berjalan dibebani dengan N thread paralel
+#           (jumlah query dibaca dari header X-SQL-Query-Count bila SQL_PROFILER=1)
+# Hasil per skenario: p50/p95/p99, rata-rata, maksimum, request/detik dan query
+# per request. Laporan disimpan sebagai JSON agar dapat dibandingkan antar versi:
+#
+#   python database/seed_data.py --skala besar --hapus
+#   python benchmark/jalankan_benchmark.py --mode wsgi -n 50 --output hasil_awal.json
+#   ... ubah kode ...
+#   python benchmark/jalankan_benchmark.py --mode wsgi -n 50 --bandingkan hasil_awal.json
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DIR_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_MANAGEMENT = os.path.join(DIR_REPO, 'management_service')
+
+URL_MANAGEMENT_DEFAULT = 'http://127.0.0.1:5002'
+URL_PRICING_DEFAULT = 'http://127.0.0.1:5003'
+
+# Titik default jika database tidak punya geometry (lon, lat)
+LOKASI_DEFAULT = (110.6431, -7.6372)
+
+# (nama, service, method, path, body JSON) - path boleh berisi {placeholder} dari ambil_parameter()
+SKENARIO = [
+    ('dashboard', 'management', 'GET', '/', None),
+    ('aset_list', 'management', 'GET', '/aset/list', None),
+    ('aset_list_200', 'management', 'GET', '/aset/list?per_page=200', None),
+    ('aset_edit_form', 'management', 'GET', '/aset/edit/{aset_id}', None),
+    ('aset_near', 'management', 'GET', '/aset/api/near?lon={lon}&lat={lat}&k=20', None),
+    ('aset_bbox', 'management', 'GET', '/aset/api/bbox?minx={minx}&miny={miny}&maxx={maxx}&maxy={maxy}', None),
+    ('aset_tile', 'management', 'GET', '/aset/tiles/14/{tile_x}/{tile_y}.mvt', None),
+    ('aset_available', 'management', 'GET', '/aset/api/available?from={hari_ini}&to={tiga_bulan}', None),
+    ('penyewa_list', 'management', 'GET', '/penyewa/list', None),
+    ('transaksi_list', 'management', 'GET', '/transaksi/list', None),
+    ('transaksi_list_200', 'management', 'GET', '/transaksi/list?per_page=200', None),
+    ('transaksi_by_harga', 'management', 'GET', '/transaksi/list_by_harga/{harga_id}', None),
+    ('transaksi_export', 'management', 'GET', '/transaksi/export.csv?dari={bulan_lalu}', None),
+    ('harga_list_all', 'pricing', 'GET', '/api/v1/harga/list_all', None),
+    ('harga_current', 'pricing', 'GET', '/api/v1/harga/boto/current', None),
+    ('harga_at', 'pricing', 'GET', '/api/v1/harga/at?date={hari_ini}', None),
+    ('harga_at_batch', 'pricing', 'POST', '/api/v1/harga/at/batch', 'batch_tanggal'),
+    ('harga_quote', 'pricing', 'POST', '/api/v1/harga/quote', 'quote_100'),
+    ('harga_list_ui', 'pricing', 'GET', '/pengaturan/harga/list', None),
+    ('harga_hitung_ulang_form', 'pricing', 'GET', '/pengaturan/harga/hitung_ulang/{harga_id}', None),
+]
+
+
+# ---------------------------------------------------------------------
+# PARAMETER SKENARIO (diambil dari database yang sedang diuji)
+# ---------------------------------------------------------------------
+
+def _tile(lon, lat, zoom):
+    """Koordinat tile XYZ (Web Mercator) yang memuat titik lon/lat."""
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return x, y
+
+
+def ambil_parameter(database_url):
+    """ID dan koordinat nyata untuk placeholder path, serta body JSON untuk skenario POST."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        aset_id = conn.execute(text("SELECT MAX(aset_id) FROM aset_sawah")).scalar() or 1
+        harga_id = conn.execute(text(
+            "SELECT id FROM harga_sewa ORDER BY tanggal_mulai_efektif DESC NULLS LAST, id DESC LIMIT 1"
+        )).scalar() or 1
+        lon, lat = LOKASI_DEFAULT
+        if engine.dialect.name == 'postgresql':
+            baris = conn.execute(text(
+                "SELECT ST_X(lokasi), ST_Y(lokasi) FROM aset_sawah WHERE aset_id = :id"
+            ), {'id': aset_id}).first()
+            if baris and baris[0] is not None:
+                lon, lat = baris
+        jumlah = {
+            tabel: conn.execute(text(f"SELECT COUNT(*) FROM {tabel}")).scalar()
+            for tabel in ('aset_sawah', 'penyewa', 'harga_sewa', 'transaksi_sewa')
+        }
+    engine.dispose()
+
+    tile_x, tile_y = _tile(lon, lat, 14)
+    hari_ini = date.today()
+    parameter = {
+        'aset_id': aset_id, 'harga_id': harga_id, 'lon': lon, 'lat': lat,
+        'minx': lon - 0.05, 'miny': lat - 0.05, 'maxx': lon + 0.05, 'maxy': lat + 0.05,
+        'tile_x': tile_x, 'tile_y': tile_y,
+        'hari_ini': hari_ini.isoformat(),
+        'bulan_lalu': date.fromordinal(hari_ini.toordinal() - 30).isoformat(),
+        'tiga_bulan': date.fromordinal(hari_ini.toordinal() + 90).isoformat(),
+    }
+    body = {
+        'batch_tanggal': {'dates': [date.fromordinal(hari_ini.toordinal() - 30 * i).isoformat() for i in range(100)]},
+        'quote_100': {'items': [
+            {'harga_id': harga_id, 'luas_boto': str(100 + i), 'durasi_bulan': 12} for i in range(100)
+        ]},
+    }
+    return parameter, body, jumlah
+
+
+# ---------------------------------------------------------------------
+# STATISTIK
+# ---------------------------------------------------------------------
+
+def persentil(data_urut, p):
+    """Persentil nearest-rank dari list yang sudah terurut."""
+    if not data_urut:
+        return None
+    indeks = max(0, math.ceil(p / 100 * len(data_urut)) - 1)
+    return data_urut[indeks]
+
+
+def ringkas(latensi, query, gagal, durasi_total):
+    latensi_ms = sorted(x * 1000 for x in latensi)
+    query = [q for q in query if q is not None]
+    return {
+        'n': len(latensi),
+        'gagal': gagal,
+        'p50_ms': round(persentil(latensi_ms, 50), 2) if latensi_ms else None,
+        'p95_ms': round(persentil(latensi_ms, 95), 2) if latensi_ms else None,
+        'p99_ms': round(persentil(latensi_ms, 99), 2) if latensi_ms else None,
+        'rata_ms': round(sum(latensi_ms) / len(latensi_ms), 2) if latensi_ms else None,
+        'maks_ms': round(latensi_ms[-1], 2) if latensi_ms else None,
+        'rps': round(len(latensi) / durasi_total, 1) if durasi_total > 0 else None,
+        'query_rata': round(sum(query) / len(query), 1) if query else None,
+        'query_maks': max(query) if query else None,
+    }
+
+
+# ---------------------------------------------------------------------
+# MODE WSGI (Flask test client)
+# ---------------------------------------------------------------------
+
+def muat_aplikasi_wsgi():
+    """Mengimpor kedua aplikasi beserta fungsi rekam_query (bersama/profiler_sql.py)."""
+    sys.path.insert(0, DIR_MANAGEMENT)
+    sys.path.insert(0, DIR_REPO)
+    from main import create_app as create_management_app
+    from pricing_service.app import create_app as create_pricing_app
+    from bersama.profiler_sql import rekam_query
+
+    return {
+        'management': (create_management_app().test_client(), rekam_query),
+        'pricing': (create_pricing_app().test_client(), rekam_query),
+    }
+
+
+def jalankan_wsgi(klien, method, path, body, iterasi, pemanasan):
+    client, rekam_query = klien
+    latensi, query, gagal = [], [], 0
+    for i in range(pemanasan + iterasi):
+        with rekam_query() as perekam:
+            mulai = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            response.get_data()  # response streaming ikut dihitung sampai selesai
+            lama = time.perf_counter() - mulai
+        if i < pemanasan:
+            continue
+        latensi.append(lama)
+        query.append(perekam.jumlah)
+        if response.status_code >= 400:
+            gagal += 1
+    return latensi, query, gagal
+
+
+# ---------------------------------------------------------------------
+# MODE HTTP (server berjalan, beban paralel)
+# ---------------------------------------------------------------------
+
+_lokal = threading.local()
+
+
+def _session():
+    import requests
+
+    if not hasattr(_lokal, 'session'):
+        _lokal.session = requests.Session()
+    return _lokal.session
+
+
+def _satu_request_http(url, method, body):
+    import requests
+
+    mulai = time.perf_counter()
+    try:
+        response = _session().request(method, url, json=body, timeout=60)
+        response.content
+    except requests.exceptions.RequestException:
+        return time.perf_counter() - mulai, None, False
+    jumlah_query = response.headers.get('X-SQL-Query-Count')
+    return (time.perf_counter() - mulai,
+            int(jumlah_query) if jumlah_query is not None else None,
+            response.status_code < 400)
+
+
+def jalankan_http(base_url, method, path, body, iterasi, pemanasan, konkurensi):
+    url = base_url.rstrip('/') + path
+    with ThreadPoolExecutor(max_workers=konkurensi) as executor:
+        list(executor.map(lambda _: _satu_request_http(url, method, body), range(pemanasan)))
+        hasil = list(executor.map(lambda _: _satu_request_http(url, method, body), range(iterasi)))
+    latensi = [h[0] for h in hasil]
+    query = [h[1] for h in hasil]
+    gagal = sum(1 for h in hasil if not h[2])
+    return latensi, query, gagal
+
+
+# ---------------------------------------------------------------------
+# LAPORAN
+# ---------------------------------------------------------------------
+
+def _commit_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIR_REPO,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _format(nilai):
+    return '-' if nilai is None else str(nilai)
+
+
+def cetak_tabel(hasil, pembanding=None):
+    kolom = ('p50_ms', 'p95_ms', 'p99_ms', 'rps', 'query_rata', 'gagal')
+    print(f"{'skenario':<26}" + ''.join(f'{k:>12}' for k in kolom) + ('   p95 vs dasar' if pembanding else ''))
+    for nama, h in hasil.items():
+        baris = f'{nama:<26}' + ''.join(f'{_format(h.get(k)):>12}' for k in kolom)
+        dasar = (pembanding or {}).get(nama)
+        if dasar and dasar.get('p95_ms') and h.get('p95_ms') is not None:
+            selisih = (h['p95_ms'] - dasar['p95_ms']) / dasar['p95_ms'] * 100
+            baris += f'   {selisih:+.1f}%'
+            if dasar.get('query_rata') is not None and h.get('query_rata') is not None \
+                    and h['query_rata'] != dasar['query_rata']:
+                baris += f" (query {dasar['query_rata']} -> {h['query_rata']})"
+        print(baris)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark route Management & Pricing Service.')
+    parser.add_argument('--mode', choices=('wsgi', 'http'), default='wsgi')
+    parser.add_argument('-n', '--iterasi', type=int, default=30, help='Request terukur per skenario.')
+    parser.add_argument('--pemanasan', type=int, default=3, help='Request awal yang tidak dihitung.')
+    parser.add_argument('-c', '--konkurensi', type=int, default=4, help='Thread paralel (mode http).')
+    parser.add_argument('--skenario', nargs='*', help='Hanya jalankan skenario tertentu (nama).')
+    parser.add_argument('--management-url', default=os.getenv('MANAGEMENT_SERVICE_URL', URL_MANAGEMENT_DEFAULT))
+    parser.add_argument('--pricing-url', default=os.getenv('PRICING_SERVICE_URL', URL_PRICING_DEFAULT))
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--output', help='Simpan laporan JSON ke file ini.')
+    parser.add_argument('--bandingkan', help='Laporan JSON sebelumnya sebagai pembanding.')
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error('DATABASE_URL belum diatur.')
+
+    skenario = [s for s in SKENARIO if not args.skenario or s[0] in args.skenario]
+    parameter, body_json, jumlah_baris = ambil_parameter(args.database_url)
+    print(f"Data: {jumlah_baris}")
+
+    if args.mode == 'wsgi':
+        klien = muat_aplikasi_wsgi()
+    base_url = {'management': args.management_url, 'pricing': args.pricing_url}
+
+    hasil = {}
+    for nama, service, method, path, body in skenario:
+        path = path.format(**parameter)
+        body = body_json.get(body) if body else None
+        mulai = time.perf_counter()
+        if args.mode == 'wsgi':
+            latensi, query, gagal = jalankan_wsgi(klien[service], method, path, body, args.iterasi, args.pemanasan)
+        else:
+            latensi, query, gagal = jalankan_http(base_url[service], method, path, body,
+                                                  args.iterasi, args.pemanasan, args.konkurensi)
+        hasil[nama] = ringkas(latensi, query, gagal, time.perf_counter() - mulai)
+        hasil[nama]['path'] = f'{method} {path}'
+        print(f"  {nama}: p95 {_format(hasil[nama]['p95_ms'])} ms, {_format(hasil[nama]['query_rata'])} query")
+
+    pembanding = None
+    if args.bandingkan:
+        with open(args.bandingkan, encoding='utf-8') as f:
+            pembanding = json.load(f).get('hasil')
+
+    print()
+    cetak_tabel(hasil, pembanding)
+
+    if args.output:
+        laporan = {
+            'meta': {
+                'waktu': datetime.now(timezone.utc).isoformat(),
+                'commit': _commit_git(),
+                'mode': args.mode,
+                'iterasi': args.iterasi,
+                'pemanasan': args.pemanasan,
+                'konkurensi': args.konkurensi if args.mode == 'http' else 1,
+                'python': platform.python_version(),
+                'jumlah_baris': jumlah_baris,
+            },
+            'hasil': hasil,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(laporan, f, indent=2)
+        print(f"\nLaporan disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# FILE: benchmark/ukur_startup.py
+#
+# Mengukur biaya start-up satu worker: waktu impor + create_app() dan RSS
+# proses setelah aplikasi siap, masing-masing di proses Python baru.
+#
+#   python benchmark/ukur_startup.py -n 5
+#
+# Untuk RSS unik per worker di bawah gunicorn (preload + gc.freeze), bandingkan
+# kolom USS/PSS dari `smem -P gunicorn` dengan GUNICORN_PRELOAD=1 dan 0.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DIR_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Kode yang dijalankan di proses anak: (cwd, pernyataan impor)
+SERVICE = {
+    'management': (os.path.join(DIR_REPO, 'management_service'), 'from wsgi import app'),
+    'pricing': (DIR_REPO, 'from pricing_service.wsgi import app'),
+}
+
+KODE_ANAK = '''
+import json, resource, sys, time
+mulai = time.perf_counter()
+{impor}
+durasi = time.perf_counter() - mulai
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"durasi_ms": durasi * 1000, "rss_mb": rss_kb / 1024, "modul": len(sys.modules)}}))
+'''
+
+
+def ukur(service, iterasi):
+    cwd, impor = SERVICE[service]
+    hasil = []
+    for _ in range(iterasi):
+        keluaran = subprocess.run([sys.executable, '-c', KODE_ANAK.format(impor=impor)], cwd=cwd,
+                                  capture_output=True, text=True, check=True)
+        hasil.append(json.loads(keluaran.stdout.strip().splitlines()[-1]))
+    return {
+        'durasi_ms_median': round(statistics.median(h['durasi_ms'] for h in hasil), 1),
+        'rss_mb_median': round(statistics.median(h['rss_mb'] for h in hasil), 1),
+        'jumlah_modul': hasil[-1]['modul'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mengukur waktu start-up dan RSS worker.')
+    parser.add_argument('-n', '--iterasi', type=int, default=5)
+    parser.add_argument('--service', choices=sorted(SERVICE), nargs='*', default=sorted(SERVICE))
+    args = parser.parse_args()
+
+    for service in args.service:
+        print(f'{service}: {ukur(service, args.iterasi)}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# FILE: bersama/__init__.py
+#
+# Kode infrastruktur yang dipakai KEDUA service (management_service dan
+# pricing_service), satu sumber untuk keduanya:
+# - pool_db.py      : opsi pool koneksi dari environment + statistik pool
+# - antrian.py      : antrian job latar belakang (tabel antrian_job)
+# - metrik.py       : metrik Prometheus di /metrics
+# - profiler_sql.py : profiler SQL per request + helper uji jumlah query
+# Bagian yang spesifik service (db, nama antrian, metrik tambahan) tetap di
+# service masing-masing: management_service/src/antrian.py, src/metrik.py,
+# pricing_service/antrian.py.
+#
+# Paket ini berada di root repo. pricing_service dijalankan dari root repo
+# sehingga langsung dapat mengimpornya; management_service/main.py menambahkan
+# root repo ke sys.path.
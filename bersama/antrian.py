@@ -0,0 +1,286 @@
+# FILE: bersama/antrian.py
+#
+# Antrian job latar belakang yang tahan restart, disimpan di tabel antrian_job.
+# - antrikan() hanya INSERT satu baris (TIDAK commit): job ikut transaksi pemanggil,
+#   jadi job tidak pernah terlihat oleh worker jika transaksi bisnisnya gagal.
+# - Worker (`flask worker`) mengambil job dengan SELECT ... FOR UPDATE SKIP LOCKED,
+#   sehingga beberapa worker bisa berjalan paralel tanpa mengambil job yang sama.
+# - Job gagal dicoba ulang dengan backoff eksponensial + jitter sampai maks_percobaan.
+# - Job 'berjalan' yang terlalu lama (worker mati) dikembalikan ke antrian.
+# Pengiriman bersifat at-least-once: handler harus idempoten.
+#
+# Tabel yang sama dipakai kedua service; kolom `antrian` memisahkan job milik
+# masing-masing. Setiap service membuat satu Antrian(db, nama) dan mengekspor
+# method-nya sebagai fungsi modul (management_service/src/antrian.py,
+# pricing_service/antrian.py).
+
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import SQLAlchemyError
+
+STATUS_MENUNGGU = 'menunggu'
+STATUS_BERJALAN = 'berjalan'
+STATUS_SELESAI = 'selesai'
+STATUS_GAGAL = 'gagal'
+
+
+class JobGagalPermanen(Exception):
+    """Dilempar handler untuk kegagalan yang tidak akan berhasil jika diulang (misal input rusak)."""
+
+
+def buat_model_antrian_job(db):
+    """Model tabel antrian_job yang terikat ke objek SQLAlchemy `db` milik service."""
+
+    class AntrianJob(db.Model):
+        __tablename__ = 'antrian_job'
+        id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+        antrian = db.Column(db.String(50), nullable=False)
+        nama_tugas = db.Column(db.String(100), nullable=False)
+        payload = db.Column(db.JSON().with_variant(JSONB, 'postgresql'), nullable=False, default=dict)
+        status = db.Column(db.String(20), nullable=False, default=STATUS_MENUNGGU)
+        percobaan = db.Column(db.Integer, nullable=False, default=0)
+        maks_percobaan = db.Column(db.Integer, nullable=False, default=5)
+        jalankan_setelah = db.Column(db.DateTime(timezone=True), nullable=False)
+        dikunci_oleh = db.Column(db.String(100))
+        dikunci_pada = db.Column(db.DateTime(timezone=True))
+        error_terakhir = db.Column(db.Text)
+        hasil = db.Column(db.JSON().with_variant(JSONB, 'postgresql'))
+        dibuat_pada = db.Column(db.DateTime(timezone=True), nullable=False)
+        selesai_pada = db.Column(db.DateTime(timezone=True))
+
+        __table_args__ = (
+            # Indeks parsial untuk query pengambilan job (lihat Antrian.ambil_job)
+            db.Index('idx_antrian_job_siap', 'antrian', 'jalankan_setelah', 'id',
+                     postgresql_where=db.text("status = 'menunggu'")),
+        )
+
+        def ke_dict(self):
+            return {
+                'id': self.id,
+                'nama_tugas': self.nama_tugas,
+                'status': self.status,
+                'percobaan': self.percobaan,
+                'maks_percobaan': self.maks_percobaan,
+                'jalankan_setelah': self.jalankan_setelah.isoformat() if self.jalankan_setelah else None,
+                'error_terakhir': self.error_terakhir,
+                'hasil': self.hasil,
+                'dibuat_pada': self.dibuat_pada.isoformat() if self.dibuat_pada else None,
+                'selesai_pada': self.selesai_pada.isoformat() if self.selesai_pada else None,
+            }
+
+    return AntrianJob
+
+
+def _sekarang():
+    return datetime.now(timezone.utc)
+
+
+def hitung_backoff(percobaan):
+    """Backoff eksponensial dengan jitter: acak di [50%, 100%] dari min(dasar * 2^(n-1), maks)."""
+    dasar = current_app.config.get('JOB_BACKOFF_DASAR', 10)
+    maks = current_app.config.get('JOB_BACKOFF_MAKS', 3600)
+    jeda = min(dasar * (2 ** max(percobaan - 1, 0)), maks)
+    return jeda * random.uniform(0.5, 1.0)
+
+
+class Antrian:
+    """Antrian job satu service: job dengan kolom antrian = `nama`, handler di `registri`."""
+
+    def __init__(self, db, nama):
+        self.db = db
+        self.nama = nama
+        # nama_tugas -> fungsi handler(payload: dict) -> hasil (dict/None, harus JSON-serializable)
+        self.registri = {}
+        self.AntrianJob = buat_model_antrian_job(db)
+        self.perintah_worker = self._buat_perintah_worker()
+
+    def tugas(self, nama):
+        """Dekorator pendaftaran handler job: @tugas('impor_aset')."""
+        def daftar(fungsi):
+            self.registri[nama] = fungsi
+            return fungsi
+        return daftar
+
+    def antrikan(self, nama_tugas, payload=None, tunda_detik=0, maks_percobaan=None, antrian=None):
+        """
+        Menambahkan job ke antrian dan mengembalikan objek AntrianJob (id tersedia setelah flush).
+        TIDAK melakukan commit: pemanggil meng-commit bersama perubahan datanya.
+        `antrian` boleh milik service lain; handler-nya harus terdaftar di service tersebut.
+        """
+        antrian = antrian or self.nama
+        if antrian == self.nama and nama_tugas not in self.registri:
+            raise ValueError(f'Tugas tidak dikenal: {nama_tugas}')
+        sekarang = _sekarang()
+        job = self.AntrianJob(
+            antrian=antrian,
+            nama_tugas=nama_tugas,
+            payload=payload or {},
+            status=STATUS_MENUNGGU,
+            percobaan=0,
+            maks_percobaan=maks_percobaan or current_app.config.get('JOB_MAKS_PERCOBAAN', 5),
+            jalankan_setelah=sekarang + timedelta(seconds=tunda_detik),
+            dibuat_pada=sekarang,
+        )
+        self.db.session.add(job)
+        self.db.session.flush()
+        return job
+
+    def antrikan_sekali(self, nama_tugas, payload=None, tunda_detik=0, antrian=None):
+        """
+        Seperti antrikan(), tetapi memakai job yang sama (nama + payload) jika masih
+        menunggu, sehingga rentetan penulisan cukup memicu satu job. Handler harus
+        membaca keadaan terbaru saat dijalankan (misal refresh view), bukan isi payload.
+        """
+        antrian = antrian or self.nama
+        payload = payload or {}
+        AntrianJob = self.AntrianJob
+        menunggu = self.db.session.execute(
+            select(AntrianJob).where(
+                AntrianJob.antrian == antrian,
+                AntrianJob.nama_tugas == nama_tugas,
+                AntrianJob.status == STATUS_MENUNGGU,
+            ).limit(20)
+        ).scalars()
+        for job in menunggu:
+            if job.payload == payload:
+                return job
+        return self.antrikan(nama_tugas, payload, tunda_detik=tunda_detik, antrian=antrian)
+
+    def pulihkan_job_macet(self):
+        """Job 'berjalan' yang melewati JOB_TIMEOUT (worker mati) dikembalikan ke antrian / ditandai gagal."""
+        AntrianJob = self.AntrianJob
+        batas = _sekarang() - timedelta(seconds=current_app.config.get('JOB_TIMEOUT', 900))
+        hasil = self.db.session.execute(
+            update(AntrianJob)
+            .where(
+                AntrianJob.antrian == self.nama,
+                AntrianJob.status == STATUS_BERJALAN,
+                AntrianJob.dikunci_pada < batas,
+            )
+            .values(
+                status=case(
+                    (AntrianJob.percobaan >= AntrianJob.maks_percobaan, STATUS_GAGAL),
+                    else_=STATUS_MENUNGGU,
+                ),
+                dikunci_oleh=None,
+                error_terakhir='Timeout: worker berhenti sebelum job selesai.',
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.session.commit()
+        return hasil.rowcount
+
+    def ambil_job(self, worker_id):
+        """
+        Mengklaim satu job siap secara atomik dan meng-commit klaimnya.
+        SKIP LOCKED membuat worker lain langsung melewati baris yang sedang diklaim.
+        Mengembalikan (id, nama_tugas, payload, percobaan) atau None.
+        """
+        AntrianJob = self.AntrianJob
+        sekarang = _sekarang()
+        id_siap = (
+            select(AntrianJob.id)
+            .where(
+                AntrianJob.antrian == self.nama,
+                AntrianJob.status == STATUS_MENUNGGU,
+                AntrianJob.jalankan_setelah <= sekarang,
+            )
+            .order_by(AntrianJob.jalankan_setelah, AntrianJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        row = self.db.session.execute(
+            update(AntrianJob)
+            .where(AntrianJob.id == id_siap)
+            .values(
+                status=STATUS_BERJALAN,
+                percobaan=AntrianJob.percobaan + 1,
+                dikunci_oleh=worker_id,
+                dikunci_pada=sekarang,
+            )
+            .returning(AntrianJob.id, AntrianJob.nama_tugas, AntrianJob.payload, AntrianJob.percobaan)
+            .execution_options(synchronize_session=False)
+        ).first()
+        self.db.session.commit()
+        return tuple(row) if row else None
+
+    def proses_job(self, job_id, nama_tugas, payload, percobaan):
+        """Menjalankan handler dan mencatat hasilnya. Mengembalikan True jika berhasil."""
+        session = self.db.session
+        handler = self.registri.get(nama_tugas)
+        try:
+            if handler is None:
+                raise LookupError(f'Tugas tidak dikenal: {nama_tugas}')
+            hasil = handler(payload or {})
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logging.exception(f"JOB {job_id} ({nama_tugas}) GAGAL pada percobaan {percobaan}")
+            job = session.get(self.AntrianJob, job_id)
+            if job is None:
+                return False
+            job.error_terakhir = f'{type(e).__name__}: {e}'
+            job.dikunci_oleh = None
+            if handler is None or isinstance(e, JobGagalPermanen) or percobaan >= job.maks_percobaan:
+                job.status = STATUS_GAGAL
+                job.selesai_pada = _sekarang()
+            else:
+                job.status = STATUS_MENUNGGU
+                job.jalankan_setelah = _sekarang() + timedelta(seconds=hitung_backoff(percobaan))
+            session.commit()
+            return False
+
+        job = session.get(self.AntrianJob, job_id)
+        job.status = STATUS_SELESAI
+        job.hasil = hasil
+        job.dikunci_oleh = None
+        job.error_terakhir = None
+        job.selesai_pada = _sekarang()
+        session.commit()
+        return True
+
+    def jalankan_worker(self, interval=2.0, sekali=False):
+        """Loop worker: pulihkan job macet, ambil job, proses; tidur `interval` detik jika kosong."""
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        diproses = 0
+        while True:
+            try:
+                self.pulihkan_job_macet()
+                job = self.ambil_job(worker_id)
+            except SQLAlchemyError:
+                self.db.session.rollback()
+                logging.exception('WORKER: gagal mengambil job dari antrian')
+                job = None
+
+            if job is None:
+                if sekali:
+                    return diproses
+                time.sleep(interval)
+                continue
+
+            self.proses_job(*job)
+            diproses += 1
+
+    def _buat_perintah_worker(self):
+        @click.command('worker')
+        @click.option('--interval', default=2.0, show_default=True, help='Jeda polling (detik) saat antrian kosong.')
+        @click.option('--sekali', is_flag=True, help='Proses semua job yang siap lalu berhenti.')
+        @with_appcontext
+        def perintah_worker(interval, sekali):
+            """Menjalankan worker antrian job: flask worker [--sekali]"""
+            click.echo(f"Worker antrian '{self.nama}' berjalan (tugas: {', '.join(sorted(self.registri))}).")
+            diproses = self.jalankan_worker(interval=interval, sekali=sekali)
+            if sekali:
+                click.echo(f'{diproses} job diproses.')
+        return perintah_worker
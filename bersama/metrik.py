@@ -0,0 +1,248 @@
+# FILE: bersama/metrik.py
+#
+# Metrik ala Prometheus (format teks 0.0.4) di endpoint /metrics, tanpa dependency tambahan.
+# - Latensi & jumlah request per endpoint blueprint (histogram + counter status)
+# - Jumlah query SQL dan total durasi SQL per request (event cursor SQLAlchemy)
+# - Statistik pool koneksi DB (bersama/pool_db.py)
+# Metrik khusus service didaftarkan dengan daftarkan_metrik(), misal latensi
+# panggilan ke Pricing Service di management_service/src/metrik.py.
+# Nilai disimpan per proses: pada deployment multi-worker, Prometheus men-scrape
+# setiap worker (atau jumlahkan per instance di query PromQL).
+
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .pool_db import PoolTerukur
+
+BUCKET_LATENSI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+BUCKET_JUMLAH_QUERY = (0, 1, 2, 5, 10, 20, 50, 100, float('inf'))
+
+# Label endpoint untuk query/panggilan di luar request (worker antrian, thread latar belakang)
+DI_LUAR_REQUEST = '-'
+
+
+def _format_angka(nilai):
+    if nilai == float('inf'):
+        return '+Inf'
+    return repr(float(nilai)) if isinstance(nilai, float) else str(nilai)
+
+
+def _escape_label(nilai):
+    return str(nilai).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_label(nama_label, nilai_label, tambahan=None):
+    pasangan = list(zip(nama_label, nilai_label)) + (tambahan or [])
+    if not pasangan:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in pasangan) + '}'
+
+
+class _Metrik:
+    jenis = None
+
+    def __init__(self, nama, bantuan, label=()):
+        self.nama = nama
+        self.bantuan = bantuan
+        self.label = tuple(label)
+        self._lock = threading.Lock()
+        self._nilai = {}
+
+    def _kunci(self, label):
+        return tuple(str(label.get(k, '')) for k in self.label)
+
+    def render(self):
+        baris = [f'# HELP {self.nama} {self.bantuan}', f'# TYPE {self.nama} {self.jenis}']
+        with self._lock:
+            baris.extend(self._render_nilai())
+        return baris
+
+
+class Counter(_Metrik):
+    jenis = 'counter'
+
+    def inc(self, jumlah=1, **label):
+        kunci = self._kunci(label)
+        with self._lock:
+            self._nilai[kunci] = self._nilai.get(kunci, 0) + jumlah
+
+    def _render_nilai(self):
+        return [f'{self.nama}{_format_label(self.label, k)} {_format_angka(v)}' for k, v in sorted(self._nilai.items())]
+
+
+class Histogram(_Metrik):
+    jenis = 'histogram'
+
+    def __init__(self, nama, bantuan, label=(), bucket=BUCKET_LATENSI):
+        super().__init__(nama, bantuan, label)
+        self.bucket = tuple(bucket)
+
+    def observe(self, nilai, **label):
+        kunci = self._kunci(label)
+        with self._lock:
+            data = self._nilai.get(kunci)
+            if data is None:
+                data = self._nilai[kunci] = {'bucket': [0] * len(self.bucket), 'sum': 0.0, 'count': 0}
+            for i, batas in enumerate(self.bucket):
+                if nilai <= batas:
+                    data['bucket'][i] += 1
+                    break
+            data['sum'] += nilai
+            data['count'] += 1
+
+    def _render_nilai(self):
+        baris = []
+        for kunci, data in sorted(self._nilai.items()):
+            kumulatif = 0
+            for batas, jumlah in zip(self.bucket, data['bucket']):
+                kumulatif += jumlah
+                label = _format_label(self.label, kunci, [('le', _format_angka(batas))])
+                baris.append(f'{self.nama}_bucket{label} {kumulatif}')
+            label = _format_label(self.label, kunci)
+            baris.append(f'{self.nama}_sum{label} {_format_angka(data["sum"])}')
+            baris.append(f'{self.nama}_count{label} {data["count"]}')
+        return baris
+
+
+# ---------------------------------------------------------------------
+# DEFINISI METRIK
+# ---------------------------------------------------------------------
+
+HTTP_DURASI = Histogram('http_request_durasi_detik', 'Latensi request per endpoint.', ('endpoint', 'method'))
+HTTP_TOTAL = Counter('http_request_total', 'Jumlah request per endpoint dan status.', ('endpoint', 'method', 'status'))
+
+SQL_QUERY_PER_REQUEST = Histogram('sql_query_per_request', 'Jumlah query SQL dalam satu request.',
+                                  ('endpoint',), bucket=BUCKET_JUMLAH_QUERY)
+SQL_DURASI_PER_REQUEST = Histogram('sql_durasi_per_request_detik', 'Total durasi SQL dalam satu request.', ('endpoint',))
+SQL_QUERY_TOTAL = Counter('sql_query_total', 'Jumlah query SQL per endpoint.', ('endpoint',))
+SQL_QUERY_DURASI = Histogram('sql_query_durasi_detik', 'Durasi per statement SQL.', ('endpoint',))
+
+SEMUA_METRIK = [
+    HTTP_DURASI, HTTP_TOTAL,
+    SQL_QUERY_PER_REQUEST, SQL_DURASI_PER_REQUEST, SQL_QUERY_TOTAL, SQL_QUERY_DURASI,
+]
+
+
+def daftarkan_metrik(*metrik):
+    """Menambahkan metrik khusus service ke output /metrics (dipanggil saat impor modul)."""
+    for m in metrik:
+        if m not in SEMUA_METRIK:
+            SEMUA_METRIK.append(m)
+    return metrik
+
+
+def _endpoint_aktif():
+    if not has_request_context():
+        return DI_LUAR_REQUEST
+    return request.endpoint or 'tidak_ditemukan'
+
+
+# ---------------------------------------------------------------------
+# HOOK SQL (semua engine) DAN REQUEST
+# ---------------------------------------------------------------------
+
+# Fungsi tambahan yang dipanggil untuk setiap statement: fungsi(statement, durasi_detik).
+# Dipakai perekam bersama/profiler_sql.py agar hanya ada satu pasang listener Engine.
+_pendengar_query = []
+
+
+def tambah_pendengar_query(fungsi):
+    """Mendaftarkan fungsi(statement, durasi) yang dipanggil setelah setiap statement SQL."""
+    if fungsi not in _pendengar_query:
+        _pendengar_query.append(fungsi)
+    return fungsi
+
+
+# Waktu mulai disimpan di ExecutionContext (satu per statement), bukan di
+# conn.info: statement yang gagal (constraint, statement_timeout, deadlock) tidak
+# memicu after_cursor_execute, dan contextnya ikut dibuang bersama waktu mulainya.
+@event.listens_for(Engine, 'before_cursor_execute')
+def _sebelum_query(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrik_mulai = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _setelah_query(conn, cursor, statement, parameters, context, executemany):
+    mulai = getattr(context, '_metrik_mulai', None)
+    if mulai is None:
+        return
+    durasi = time.perf_counter() - mulai
+    endpoint = _endpoint_aktif()
+    SQL_QUERY_TOTAL.inc(endpoint=endpoint)
+    SQL_QUERY_DURASI.observe(durasi, endpoint=endpoint)
+    if has_request_context() and '_metrik_mulai' in g:
+        g._metrik_sql_jumlah += 1
+        g._metrik_sql_durasi += durasi
+    for fungsi in _pendengar_query:
+        fungsi(statement, durasi)
+
+
+def _render_pool(db):
+    """Statistik pool koneksi sebagai gauge/counter/histogram."""
+    pool = db.engine.pool
+    if not isinstance(pool, PoolTerukur):
+        return []
+    s = pool.statistik()
+    baris = []
+    for nama, jenis, bantuan, nilai in (
+        ('db_pool_ukuran', 'gauge', 'Ukuran pool koneksi.', s['ukuran_pool']),
+        ('db_pool_koneksi_dipakai', 'gauge', 'Koneksi yang sedang dipakai.', s['koneksi_dipakai']),
+        ('db_pool_koneksi_menganggur', 'gauge', 'Koneksi menganggur di pool.', s['koneksi_menganggur']),
+        ('db_pool_overflow_aktif', 'gauge', 'Koneksi overflow yang terbuka.', s['overflow_aktif']),
+        ('db_pool_timeout_total', 'counter', 'Checkout yang gagal karena pool habis.', s['jumlah_timeout']),
+    ):
+        baris += [f'# HELP {nama} {bantuan}', f'# TYPE {nama} {jenis}', f'{nama} {nilai}']
+
+    nama = 'db_pool_tunggu_detik'
+    baris += [f'# HELP {nama} Waktu menunggu checkout koneksi.', f'# TYPE {nama} histogram']
+    for item in s['histogram_tunggu']:
+        baris.append(f'{nama}_bucket{{le="{item["le"]}"}} {item["jumlah"]}')
+    baris.append(f'{nama}_sum {_format_angka(s["total_tunggu_detik"])}')
+    baris.append(f'{nama}_count {s["jumlah_checkout"]}')
+    return baris
+
+
+def render_metrik(db):
+    baris = []
+    for metrik in SEMUA_METRIK:
+        baris.extend(metrik.render())
+    baris.extend(_render_pool(db))
+    return '\n'.join(baris) + '\n'
+
+
+def pasang_metrik(app, db):
+    """Mendaftarkan hook request dan endpoint GET /metrics pada aplikasi."""
+
+    @app.before_request
+    def _mulai_request():
+        g._metrik_mulai = time.perf_counter()
+        g._metrik_sql_jumlah = 0
+        g._metrik_sql_durasi = 0.0
+
+    @app.teardown_request
+    def _selesai_request(error=None):
+        # teardown juga berjalan untuk response error/exception, sehingga 500 ikut tercatat
+        mulai = g.pop('_metrik_mulai', None)
+        if mulai is None:
+            return
+        endpoint = request.endpoint or 'tidak_ditemukan'
+        status = g.pop('_metrik_status', 500 if error is not None else 200)
+        HTTP_DURASI.observe(time.perf_counter() - mulai, endpoint=endpoint, method=request.method)
+        HTTP_TOTAL.inc(endpoint=endpoint, method=request.method, status=status)
+        SQL_QUERY_PER_REQUEST.observe(g.pop('_metrik_sql_jumlah', 0), endpoint=endpoint)
+        SQL_DURASI_PER_REQUEST.observe(g.pop('_metrik_sql_durasi', 0.0), endpoint=endpoint)
+
+    @app.after_request
+    def _catat_status(response):
+        g._metrik_status = response.status_code
+        return response
+
+    def metrics():
+        return app.response_class(render_metrik(db), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
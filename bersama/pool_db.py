@@ -0,0 +1,126 @@
+# FILE: bersama/pool_db.py
+#
+# Konfigurasi pool koneksi database dari environment + statistik pool langsung.
+#   DB_POOL_SIZE             koneksi tetap per proses            (default 5)
+#   DB_MAX_OVERFLOW          koneksi tambahan saat ramai          (default 10)
+#   DB_POOL_TIMEOUT          detik menunggu koneksi bebas         (default 30)
+#   DB_POOL_RECYCLE          detik umur maksimum koneksi          (default 1800)
+#   DB_POOL_PRE_PING         cek koneksi sebelum dipakai (1/0)    (default 1)
+#   DB_STATEMENT_TIMEOUT_MS  statement_timeout Postgres, 0 = mati (default 0)
+# Total koneksi maksimum = jumlah proses worker x (DB_POOL_SIZE + DB_MAX_OVERFLOW);
+# angka ini harus di bawah max_connections Postgres (dibagi dengan service lain).
+
+import os
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Batas atas bucket histogram waktu tunggu checkout (detik)
+BUCKET_TUNGGU = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+
+def _env_bool(nama, default):
+    return os.getenv(nama, default).strip().lower() in ('1', 'true', 'yes', 'ya')
+
+
+class PoolTerukur(QueuePool):
+    """QueuePool yang mencatat jumlah checkout, timeout dan lama menunggu koneksi."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock_statistik = threading.Lock()
+        self.jumlah_checkout = 0
+        self.jumlah_timeout = 0
+        self.total_tunggu = 0.0
+        self.tunggu_maks = 0.0
+        self.bucket_tunggu = [0] * len(BUCKET_TUNGGU)
+
+    def _do_get(self):
+        # Waktu di sini = menunggu koneksi bebas (+ membuka koneksi baru jika perlu)
+        mulai = time.perf_counter()
+        try:
+            koneksi = super()._do_get()
+        except PoolTimeoutError:
+            with self._lock_statistik:
+                self.jumlah_timeout += 1
+            raise
+        lama = time.perf_counter() - mulai
+        with self._lock_statistik:
+            self.jumlah_checkout += 1
+            self.total_tunggu += lama
+            self.tunggu_maks = max(self.tunggu_maks, lama)
+            for i, batas in enumerate(BUCKET_TUNGGU):
+                if lama <= batas:
+                    self.bucket_tunggu[i] += 1
+                    break
+        return koneksi
+
+    def _histogram_kumulatif(self):
+        hasil, total = [], 0
+        for batas, jumlah in zip(BUCKET_TUNGGU, self.bucket_tunggu):
+            total += jumlah
+            hasil.append({'le': '+Inf' if batas == float('inf') else str(batas), 'jumlah': total})
+        return hasil
+
+    def statistik(self):
+        """Snapshot statistik pool untuk endpoint monitoring."""
+        with self._lock_statistik:
+            checkout = self.jumlah_checkout
+            return {
+                'ukuran_pool': self.size(),
+                'maks_overflow': self._max_overflow,
+                'koneksi_dipakai': self.checkedout(),
+                'koneksi_menganggur': self.checkedin(),
+                'overflow_aktif': max(self.overflow(), 0),
+                'jumlah_checkout': checkout,
+                'jumlah_timeout': self.jumlah_timeout,
+                'rata_tunggu_ms': round(self.total_tunggu / checkout * 1000, 3) if checkout else 0.0,
+                'tunggu_maks_ms': round(self.tunggu_maks * 1000, 3),
+                'total_tunggu_detik': self.total_tunggu,
+                # Kumulatif per batas atas (format 'le' seperti histogram Prometheus)
+                'histogram_tunggu': self._histogram_kumulatif(),
+            }
+
+
+def opsi_engine(database_uri, nama_aplikasi):
+    """Nilai untuk SQLALCHEMY_ENGINE_OPTIONS, dibaca dari environment."""
+    if not database_uri or database_uri.startswith('sqlite'):
+        # SQLite (development): biarkan default Flask-SQLAlchemy
+        return {}
+
+    opsi = {
+        'poolclass': PoolTerukur,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        # Koneksi basi setelah Postgres restart dibuang sebelum dipakai
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', '1'),
+    }
+
+    connect_args = {'application_name': nama_aplikasi}
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    if statement_timeout > 0:
+        connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+    opsi['connect_args'] = connect_args
+    return opsi
+
+
+def info_pool(engine):
+    """Konfigurasi + statistik pool, ditambah kapasitas server Postgres jika tersedia."""
+    pool = engine.pool
+    info = {'kelas_pool': type(pool).__name__}
+    if isinstance(pool, PoolTerukur):
+        info['statistik'] = pool.statistik()
+        info['koneksi_maks_per_proses'] = pool.size() + pool._max_overflow
+
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            row = conn.exec_driver_sql(
+                "SELECT current_setting('max_connections')::int, "
+                "(SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database())"
+            ).one()
+        info['server'] = {'max_connections': row[0], 'koneksi_aktif_database': row[1]}
+    return info
@@ -0,0 +1,173 @@
+# FILE: bersama/profiler_sql.py
+#
+# Profiler SQL per request (opt-in, SQL_PROFILER=1) dengan deteksi pola N+1.
+# - Setiap statement direkam lewat hook SQL bersama/metrik.py (tambah_pendengar_query),
+#   sehingga hanya ada satu pasang listener Engine untuk metrik dan profiler.
+# - Statement dinormalisasi menjadi "bentuk" (placeholder daftar IN dan literal
+#   angka diseragamkan); bentuk yang berulang >= SQL_PROFILER_AMBANG_N1 kali
+#   dalam satu request ditandai sebagai kemungkinan N+1 (lazy load di template).
+# - Ringkasan dikirim di header response (X-SQL-*, Server-Timing) dan log.
+# Untuk uji regresi, batas_query() / periksa_jumlah_query() menggagalkan assert
+# jika sebuah route menjalankan lebih banyak query dari batasnya.
+#
+# Catatan: untuk response streaming, header dihitung sebelum body dialirkan.
+
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+
+from .metrik import tambah_pendengar_query
+
+AMBANG_N1_DEFAULT = 3
+
+# Perekam yang aktif pada konteks saat ini (request profiler dan/atau helper uji)
+_perekam_aktif = ContextVar('perekam_sql_aktif', default=())
+
+_POLA_DAFTAR_PARAM = re.compile(r'(%\(\w+\)s|\?|:\w+)(\s*,\s*(%\(\w+\)s|\?|:\w+))+')
+_POLA_PARAM = re.compile(r'%\(\w+\)s|\?|:\w+')
+_POLA_ANGKA = re.compile(r'\b\d+(\.\d+)?\b')
+_POLA_SPASI = re.compile(r'\s+')
+
+
+def bentuk_statement(statement):
+    """Menormalkan statement SQL sehingga query yang sama dengan parameter berbeda punya bentuk sama."""
+    bentuk = _POLA_DAFTAR_PARAM.sub('?', statement)
+    bentuk = _POLA_PARAM.sub('?', bentuk)
+    bentuk = _POLA_ANGKA.sub('N', bentuk)
+    return _POLA_SPASI.sub(' ', bentuk).strip()
+
+
+class PerekamQuery:
+    """Kumpulan statement yang dijalankan dalam satu request/blok."""
+
+    def __init__(self):
+        self.query = []  # list of (statement, durasi_detik)
+
+    def catat(self, statement, durasi):
+        self.query.append((statement, durasi))
+
+    @property
+    def jumlah(self):
+        return len(self.query)
+
+    @property
+    def total_durasi(self):
+        return sum(durasi for _statement, durasi in self.query)
+
+    def pola_berulang(self, ambang=AMBANG_N1_DEFAULT):
+        """[(bentuk, jumlah), ...] untuk bentuk statement yang muncul >= ambang kali."""
+        hitung = Counter(bentuk_statement(statement) for statement, _durasi in self.query)
+        return [(bentuk, n) for bentuk, n in hitung.most_common() if n >= ambang]
+
+
+# ---------------------------------------------------------------------
+# PENDENGAR HOOK SQL (murah jika tidak ada perekam aktif)
+# ---------------------------------------------------------------------
+
+@tambah_pendengar_query
+def _catat_ke_perekam(statement, durasi):
+    for perekam in _perekam_aktif.get():
+        perekam.catat(statement, durasi)
+
+
+@contextmanager
+def rekam_query():
+    """Merekam semua query SQL di dalam blok: `with rekam_query() as perekam: ...`"""
+    perekam = PerekamQuery()
+    sebelumnya = _perekam_aktif.get()
+    _perekam_aktif.set(sebelumnya + (perekam,))
+    try:
+        yield perekam
+    finally:
+        _perekam_aktif.set(sebelumnya)
+
+
+# ---------------------------------------------------------------------
+# MIDDLEWARE PROFILER PER REQUEST
+# ---------------------------------------------------------------------
+
+def pasang_profiler(app):
+    """Mendaftarkan hook profiler. Aktif hanya jika app.config['SQL_PROFILER'] bernilai True."""
+
+    @app.before_request
+    def _mulai_profil():
+        if not current_app.config.get('SQL_PROFILER'):
+            return
+        g._profiler_sebelumnya = _perekam_aktif.get()
+        g._profiler_perekam = PerekamQuery()
+        _perekam_aktif.set(g._profiler_sebelumnya + (g._profiler_perekam,))
+
+    @app.after_request
+    def _laporkan_profil(response):
+        perekam = g.get('_profiler_perekam')
+        if perekam is None:
+            return response
+
+        ambang = current_app.config.get('SQL_PROFILER_AMBANG_N1', AMBANG_N1_DEFAULT)
+        berulang = perekam.pola_berulang(ambang)
+        total_ms = perekam.total_durasi * 1000
+
+        response.headers['X-SQL-Query-Count'] = str(perekam.jumlah)
+        response.headers['X-SQL-Query-Time-Ms'] = f'{total_ms:.2f}'
+        response.headers['X-SQL-N-Plus-1'] = str(len(berulang))
+        response.headers.add('Server-Timing', f'sql;dur={total_ms:.2f};desc="{perekam.jumlah} query"')
+
+        logging.debug(f"SQL PROFILER {request.method} {request.path}: {perekam.jumlah} query, {total_ms:.2f} ms")
+        for bentuk, jumlah in berulang:
+            logging.warning(f"SQL PROFILER kemungkinan N+1 di {request.endpoint} ({jumlah}x): {bentuk[:300]}")
+        return response
+
+    @app.teardown_request
+    def _selesai_profil(error=None):
+        if g.pop('_profiler_perekam', None) is not None:
+            _perekam_aktif.set(g.pop('_profiler_sebelumnya', ()))
+
+
+# ---------------------------------------------------------------------
+# HELPER UJI: BATAS JUMLAH QUERY PER ROUTE
+# ---------------------------------------------------------------------
+
+class BatasQueryTerlampaui(AssertionError):
+    """Route menjalankan lebih banyak query dari batas yang ditetapkan."""
+
+
+def _pesan_pelanggaran(judul, perekam, ambang):
+    baris = [judul]
+    for bentuk, jumlah in perekam.pola_berulang(ambang):
+        baris.append(f'  N+1? {jumlah}x {bentuk[:200]}')
+    for i, (statement, durasi) in enumerate(perekam.query, start=1):
+        baris.append(f'  {i}. ({durasi * 1000:.2f} ms) {_POLA_SPASI.sub(" ", statement)[:200]}')
+    return '\n'.join(baris)
+
+
+@contextmanager
+def batas_query(maks, tolak_n1=False, ambang_n1=AMBANG_N1_DEFAULT):
+    """
+    Assert jumlah query di dalam blok <= maks (dan opsional tanpa pola N+1).
+
+        with batas_query(5):
+            client.get('/transaksi/list')           # Management Service
+    """
+    with rekam_query() as perekam:
+        yield perekam
+    if perekam.jumlah > maks:
+        raise BatasQueryTerlampaui(_pesan_pelanggaran(
+            f'{perekam.jumlah} query dijalankan, batas {maks}.', perekam, ambang_n1))
+    if tolak_n1 and perekam.pola_berulang(ambang_n1):
+        raise BatasQueryTerlampaui(_pesan_pelanggaran('Pola N+1 terdeteksi.', perekam, ambang_n1))
+
+
+def periksa_jumlah_query(client, url, maks, method='GET', tolak_n1=True, **kwargs):
+    """
+    Menjalankan satu request lewat Flask test client dan memastikan jumlah query <= maks.
+    Mengembalikan response. Dipakai oleh management_service/tests/ dan pricing_service/tests/:
+
+        periksa_jumlah_query(client, '/transaksi/list', 1)
+    """
+    with batas_query(maks, tolak_n1=tolak_n1):
+        response = client.open(url, method=method, **kwargs)
+    return response
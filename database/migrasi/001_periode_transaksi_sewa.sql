@@ -0,0 +1,42 @@
+-- FILE: database/migrasi/001_periode_transaksi_sewa.sql
+--
+-- Migrasi untuk database yang dibuat sebelum kolom periode ada
+-- (database baru sudah mendapatkannya dari setup_tables.sql):
+--   psql "$DATABASE_URL" -f database/migrasi/001_periode_transaksi_sewa.sql
+--
+-- Menambahkan kolom periode (daterange) dan constraint EXCLUDE sehingga satu
+-- aset tidak bisa disewa dua kali pada periode yang tumpang tindih. Aman
+-- dijalankan ulang. Jika masih ada sewa yang tumpang tindih, migrasi
+-- dibatalkan seluruhnya dan daftar pasangan yang bentrok ditampilkan.
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE transaksi_sewa
+    ADD COLUMN IF NOT EXISTS periode DATERANGE
+    GENERATED ALWAYS AS (daterange(tanggal_mulai, tanggal_akhir, '[]')) STORED;
+
+-- Pasangan sewa yang bentrok (harus diperbaiki manual sebelum constraint bisa dipasang)
+SELECT a.aset_id, a.sewa_id AS sewa_id_1, a.periode AS periode_1, b.sewa_id AS sewa_id_2, b.periode AS periode_2
+FROM transaksi_sewa a
+JOIN transaksi_sewa b ON b.aset_id = a.aset_id AND b.sewa_id > a.sewa_id AND b.periode && a.periode
+ORDER BY a.aset_id, a.sewa_id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'transaksi_sewa_periode_tidak_tumpang_tindih'
+    ) THEN
+        ALTER TABLE transaksi_sewa
+            ADD CONSTRAINT transaksi_sewa_periode_tidak_tumpang_tindih
+            EXCLUDE USING gist (aset_id WITH =, periode WITH &&);
+    END IF;
+END
+$$;
+
+COMMIT;
+
+ANALYZE transaksi_sewa;
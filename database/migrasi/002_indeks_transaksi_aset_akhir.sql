@@ -0,0 +1,15 @@
+-- FILE: database/migrasi/002_indeks_transaksi_aset_akhir.sql
+--
+--   psql "$DATABASE_URL" -f database/migrasi/002_indeks_transaksi_aset_akhir.sql
+--
+-- Indeks untuk job kedaluwarsa status sewa (management_service/src/kedaluwarsa_sewa.py):
+-- NOT EXISTS (aset_id = ? AND tanggal_akhir >= hari ini) per aset menjadi satu
+-- penelusuran indeks. CONCURRENTLY agar tabel tetap bisa ditulis selama indeks
+-- dibangun (tidak boleh di dalam BEGIN/COMMIT).
+
+\set ON_ERROR_STOP on
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transaksi_sewa_aset_akhir
+ON transaksi_sewa (aset_id, tanggal_akhir);
+
+ANALYZE transaksi_sewa;
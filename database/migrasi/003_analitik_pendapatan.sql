@@ -0,0 +1,40 @@
+-- FILE: database/migrasi/003_analitik_pendapatan.sql
+--
+--   psql "$DATABASE_URL" -f database/migrasi/003_analitik_pendapatan.sql
+--
+-- Materialized view rollup pendapatan untuk halaman/API /analitik
+-- (management_service/src/analitik.py). Aman dijalankan ulang.
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+-- Kolom yang dipakai model TransaksiSewa tetapi belum ada di setup_tables.sql lama
+ALTER TABLE transaksi_sewa ADD COLUMN IF NOT EXISTS status_pembayaran VARCHAR(50) NOT NULL DEFAULT 'Belum Bayar';
+ALTER TABLE transaksi_sewa ADD COLUMN IF NOT EXISTS tanggal_transaksi TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_pendapatan_bulanan AS
+SELECT date_trunc('month', tanggal_mulai)::date AS bulan,
+       harga_sewa_id,
+       status_pembayaran,
+       count(*) AS jumlah_transaksi,
+       sum(nilai_sewa) AS total_nilai_sewa,
+       now() AS diperbarui_pada
+FROM transaksi_sewa
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_pendapatan_bulanan
+ON mv_pendapatan_bulanan (bulan, harga_sewa_id, status_pembayaran);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_pendapatan_aset AS
+SELECT aset_id,
+       status_pembayaran,
+       count(*) AS jumlah_transaksi,
+       sum(nilai_sewa) AS total_nilai_sewa
+FROM transaksi_sewa
+GROUP BY aset_id, status_pembayaran;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_pendapatan_aset
+ON mv_pendapatan_aset (aset_id, status_pembayaran);
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- FILE: database/migrasi/004_indeks_transaksi_penyewa.sql
+--
+--   psql "$DATABASE_URL" -f database/migrasi/004_indeks_transaksi_penyewa.sql
+--
+-- Indeks untuk GET /api/v1/transaksi?penyewa_id=... (management_service/src/routes/api_v1_routes.py):
+-- foreign key penyewa_id tidak otomatis berindeks di PostgreSQL. Kolom kedua
+-- sewa_id membuat filter + paginasi keyset (ORDER BY sewa_id DESC) cukup satu
+-- penelusuran indeks. CONCURRENTLY agar tabel tetap bisa ditulis selama indeks
+-- dibangun (tidak boleh di dalam BEGIN/COMMIT).
+
+\set ON_ERROR_STOP on
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transaksi_sewa_penyewa
+ON transaksi_sewa (penyewa_id, sewa_id);
+
+ANALYZE transaksi_sewa;
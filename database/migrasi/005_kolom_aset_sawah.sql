@@ -0,0 +1,18 @@
+-- FILE: database/migrasi/005_kolom_aset_sawah.sql
+--
+--   psql "$DATABASE_URL" -f database/migrasi/005_kolom_aset_sawah.sql
+--
+-- Kolom tanaman_saat_ini dan tanggal_dibuat sudah lama ada di model AsetSawah
+-- (management_service/models/aset_model.py) dan dipakai oleh impor aset
+-- (src/impor_aset.py), seed data (database/seed_data.py) serta
+-- GET /api/v1/aset?fields=tanaman_saat_ini,tanggal_dibuat, tetapi tidak pernah
+-- ditambahkan ke skema SQL. Aset lama mendapat tanggal_dibuat = waktu migrasi.
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+ALTER TABLE aset_sawah ADD COLUMN IF NOT EXISTS tanaman_saat_ini VARCHAR(100);
+ALTER TABLE aset_sawah ADD COLUMN IF NOT EXISTS tanggal_dibuat TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+COMMIT;
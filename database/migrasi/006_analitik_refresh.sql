@@ -0,0 +1,38 @@
+-- FILE: database/migrasi/006_analitik_refresh.sql
+--
+--   psql "$DATABASE_URL" -f database/migrasi/006_analitik_refresh.sql
+--
+-- mv_pendapatan_bulanan (migrasi 003) menyimpan now() AS diperbarui_pada di
+-- setiap baris, sehingga REFRESH MATERIALIZED VIEW CONCURRENTLY menganggap semua
+-- baris berubah dan menulis ulang seluruh view di setiap refresh. Waktu refresh
+-- kini dicatat sekali di tabel analitik_refresh (management_service/src/analitik.py)
+-- dan view dibuat ulang tanpa kolom tersebut. Aman dijalankan ulang.
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS analitik_refresh (
+    nama VARCHAR(100) PRIMARY KEY,
+    diperbarui_pada TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- View hanya rollup (bisa dibangun ulang dari transaksi_sewa): drop + create
+DROP MATERIALIZED VIEW IF EXISTS mv_pendapatan_bulanan;
+
+CREATE MATERIALIZED VIEW mv_pendapatan_bulanan AS
+SELECT date_trunc('month', tanggal_mulai)::date AS bulan,
+       harga_sewa_id,
+       status_pembayaran,
+       count(*) AS jumlah_transaksi,
+       sum(nilai_sewa) AS total_nilai_sewa
+FROM transaksi_sewa
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX uq_mv_pendapatan_bulanan
+ON mv_pendapatan_bulanan (bulan, harga_sewa_id, status_pembayaran);
+
+INSERT INTO analitik_refresh (nama, diperbarui_pada) VALUES ('pendapatan', now())
+ON CONFLICT (nama) DO UPDATE SET diperbarui_pada = EXCLUDED.diperbarui_pada;
+
+COMMIT;
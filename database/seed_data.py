@@ -0,0 +1,320 @@
+# FILE: database/seed_data.py
+#
+# Generator data sintetis untuk uji performa (PostgreSQL + PostGIS).
+# Semua baris dibuat di sisi server dengan INSERT ... SELECT generate_series,
+# sehingga 1 juta transaksi selesai dalam hitungan menit, bukan jam.
+#
+# Distribusi yang dipakai (mendekati data lapangan):
+# - harga_sewa  : satu harga per tahun, naik ~6%/tahun dengan sedikit variasi
+# - penyewa     : nama & alamat dari daftar desa; sebagian kecil penyewa
+#                 memegang banyak kontrak (distribusi miring)
+# - aset_sawah  : luas log-normal (median ~2.000 m2), titik lokasi berkelompok
+#                 di sekitar pusat desa; status 'Disewa' jika ada kontrak aktif
+# - transaksi   : kontrak berurutan per aset sejak tahun awal (tidak tumpang tindih),
+#                 durasi 6/12/24/36 bulan dengan jeda 0-60 hari, nilai sewa dihitung
+#                 dengan rumus yang sama (pricing_service/tarif.py)
+#
+# Contoh:
+#   python database/seed_data.py --skala besar --hapus     # 100k aset, 1 juta transaksi
+#   python database/seed_data.py --aset 5000 --transaksi 50000 --seed 7
+
+import argparse
+import os
+import random
+import time
+from datetime import date
+
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SKALA = {
+    'kecil': {'aset': 1_000, 'penyewa': 500, 'transaksi': 10_000},
+    'sedang': {'aset': 10_000, 'penyewa': 5_000, 'transaksi': 100_000},
+    'besar': {'aset': 100_000, 'penyewa': 30_000, 'transaksi': 1_000_000},
+}
+
+# (nama desa, longitude, latitude) - pusat kelompok sawah di sekitar Klaten/Sleman
+DESA = [
+    ('Karanganom', 110.6431, -7.6372), ('Ceper', 110.6789, -7.6817), ('Delanggu', 110.7034, -7.6195),
+    ('Juwiring', 110.7507, -7.6426), ('Polanharjo', 110.6725, -7.5880), ('Wonosari', 110.7271, -7.6080),
+    ('Pedan', 110.7001, -7.6993), ('Trucuk', 110.6671, -7.7195), ('Prambanan', 110.4946, -7.7515),
+    ('Kalasan', 110.4720, -7.7670), ('Berbah', 110.4390, -7.8030), ('Minggir', 110.2440, -7.7300),
+]
+NAMA_DEPAN = [
+    'Slamet', 'Sutrisno', 'Suparman', 'Wagiman', 'Sri', 'Siti', 'Tukiyem', 'Parjo', 'Joko', 'Budi',
+    'Agus', 'Wahyu', 'Sumarni', 'Rahayu', 'Bambang', 'Heru', 'Purwanto', 'Ngatini', 'Darmini', 'Teguh',
+]
+NAMA_BELAKANG = [
+    'Riyadi', 'Santoso', 'Wibowo', 'Susanto', 'Lestari', 'Wulandari', 'Prasetyo', 'Hartono', 'Widodo',
+    'Suryani', 'Mulyono', 'Handayani', 'Nugroho', 'Setiawan', 'Purnomo', 'Rahmawati',
+]
+TANAMAN = ['Padi', 'Padi', 'Padi', 'Padi', 'Jagung', 'Kedelai', 'Tebu', 'Cabai', 'Bawang Merah']
+DURASI_BULAN = [6, 12, 12, 12, 12, 24, 24, 36]
+
+HARGA_DASAR = 3_000_000  # harga per 100 boto per tahun pada tahun awal
+
+
+def _koneksi(database_url):
+    conn = psycopg2.connect(database_url, application_name='seed_data')
+    conn.autocommit = False
+    return conn
+
+
+def _catat(pesan, mulai):
+    print(f"  {pesan} ({time.perf_counter() - mulai:.1f} dtk)")
+
+
+def hapus_data(cur):
+    cur.execute("TRUNCATE transaksi_sewa, aset_sawah, penyewa, harga_sewa RESTART IDENTITY CASCADE")
+
+
+def seed_harga(cur, tahun_awal, tahun_akhir):
+    """Satu harga per tahun; tahun yang sudah punya harga aktif dilewati."""
+    cur.execute("""
+        INSERT INTO harga_sewa (harga_per_boto, tanggal_mulai_efektif, tanggal_akhir_efektif,
+                                tahun_penetapan, tanggal_diperbarui)
+        SELECT round((%(dasar)s * power(1.06, t - %(awal)s) * (0.97 + random() * 0.06))::numeric, -3),
+               make_date(t, 1, 1), make_date(t, 12, 31), t, now()
+        FROM generate_series(%(awal)s, %(akhir)s) AS t
+        WHERE NOT EXISTS (
+            SELECT 1 FROM harga_sewa h
+            WHERE h.tanggal_mulai_efektif <= make_date(t, 12, 31)
+              AND COALESCE(h.tanggal_akhir_efektif, 'infinity') >= make_date(t, 1, 1)
+        )
+    """, {'dasar': HARGA_DASAR, 'awal': tahun_awal, 'akhir': tahun_akhir})
+    return cur.rowcount
+
+
+def seed_penyewa(cur, jumlah):
+    cur.execute("SELECT COALESCE(MAX(penyewa_id), 0) FROM penyewa")
+    offset = cur.fetchone()[0]
+    cur.execute("""
+        INSERT INTO penyewa (nama_lengkap, nik, alamat, nomor_kontak)
+        SELECT %(depan)s[1 + floor(g.r1 * cardinality(%(depan)s))::int] || ' '
+                   || %(belakang)s[1 + floor(g.r2 * cardinality(%(belakang)s))::int],
+               -- NIK 16 digit: kode wilayah 3310 (Klaten) + nomor urut unik
+               '3310' || lpad((%(offset)s + g.i)::text, 12, '0'),
+               'Dusun ' || (1 + floor(g.r3 * 12))::int || ', Desa '
+                   || %(desa)s[1 + floor(g.r4 * cardinality(%(desa)s))::int] || ', Klaten',
+               '08' || (11 + floor(g.r5 * 9))::int || lpad(floor(random() * 100000000)::bigint::text, 8, '0')
+        FROM (
+            SELECT i, random() AS r1, random() AS r2, random() AS r3, random() AS r4, random() AS r5
+            FROM generate_series(1, %(jumlah)s) AS i
+        ) AS g
+    """, {
+        'depan': NAMA_DEPAN, 'belakang': NAMA_BELAKANG, 'desa': [d[0] for d in DESA],
+        'offset': offset, 'jumlah': jumlah,
+    })
+    return cur.rowcount
+
+
+def seed_aset(cur, jumlah, batch):
+    cur.execute("SELECT COALESCE(MAX(aset_id), 0) FROM aset_sawah")
+    offset = cur.fetchone()[0]
+    total = 0
+    for awal in range(1, jumlah + 1, batch):
+        akhir = min(awal + batch - 1, jumlah)
+        cur.execute("""
+            INSERT INTO aset_sawah (nama_sebutan, nomor_sertifikat, luas_m2, luas_boto, lokasi,
+                                    tanaman_saat_ini, status_sewa, tanggal_dibuat)
+            SELECT 'Sawah ' || %(desa)s[g.d] || ' ' || (%(offset)s + g.i),
+                   'SHM-' || lpad((%(offset)s + g.i)::text, 9, '0'),
+                   l.luas_m2,
+                   round(l.luas_m2 / 14, 2),
+                   -- Sebaran normal +-~1,5 km di sekitar pusat desa
+                   ST_SetSRID(ST_MakePoint(
+                       %(lon)s[g.d] + 0.012 * sqrt(-2 * ln(g.r2)) * cos(2 * pi() * g.r3),
+                       %(lat)s[g.d] + 0.012 * sqrt(-2 * ln(g.r2)) * sin(2 * pi() * g.r3)
+                   ), 4326),
+                   %(tanaman)s[1 + floor(g.r4 * cardinality(%(tanaman)s))::int],
+                   'Tidak Disewa',
+                   now() - make_interval(days => floor(g.r5 * 3650)::int)
+            FROM (
+                SELECT i, 1 + floor(random() * cardinality(%(desa)s))::int AS d,
+                       1 - random() AS r1, 1 - random() AS r2, random() AS r3, random() AS r4, random() AS r5,
+                       random() AS r6
+                FROM generate_series(%(awal)s, %(akhir)s) AS i
+            ) AS g
+            -- Luas log-normal: median 2.000 m2, minimal 200 m2
+            CROSS JOIN LATERAL (
+                SELECT round(greatest(200, 2000 * exp(0.6 * sqrt(-2 * ln(g.r1)) * cos(2 * pi() * g.r6)))::numeric, 2)
+                       AS luas_m2
+            ) AS l
+        """, {
+            'desa': [d[0] for d in DESA], 'lon': [d[1] for d in DESA], 'lat': [d[2] for d in DESA],
+            'tanaman': TANAMAN, 'offset': offset, 'awal': awal, 'akhir': akhir,
+        })
+        total += cur.rowcount
+        cur.connection.commit()
+        print(f"    aset {total}/{jumlah}")
+    return offset
+
+
+def seed_transaksi(cur, jumlah, batch, tahun_awal, offset_aset):
+    """
+    Kontrak berurutan per aset (aset_id > offset_aset) untuk semua penyewa.
+    Periode kontrak satu aset tidak pernah tumpang tindih (constraint
+    transaksi_sewa_periode_tidak_tumpang_tindih); kontrak yang baru akan
+    dimulai setelah hari ini tidak dibuat, sehingga jumlah akhir bisa sedikit
+    di bawah target bila rentang sejak --tahun-awal terlalu pendek.
+    """
+    cur.execute("SELECT array_agg(aset_id ORDER BY aset_id) FROM aset_sawah WHERE aset_id > %s", (offset_aset,))
+    aset_ids = cur.fetchone()[0] or []
+    cur.execute("SELECT array_agg(penyewa_id ORDER BY penyewa_id) FROM penyewa")
+    penyewa_ids = cur.fetchone()[0] or []
+    if not penyewa_ids:
+        raise SystemExit('Tabel penyewa kosong: jalankan dengan --penyewa > 0.')
+
+    per_aset = -(-jumlah // len(aset_ids))
+    aset_ids = aset_ids[:-(-jumlah // per_aset)]
+    aset_per_batch = max(1, batch // per_aset)
+
+    total = 0
+    for awal in range(0, len(aset_ids), aset_per_batch):
+        cur.execute("""
+            INSERT INTO transaksi_sewa (aset_id, penyewa_id, harga_sewa_id, tanggal_mulai, tanggal_akhir,
+                                        durasi_bulan, nilai_sewa, status_pembayaran,
+                                        jenis_tanaman_disepakati, tanggal_transaksi)
+            SELECT a.aset_id, k.penyewa_id, h.id, k.mulai,
+                   -- Inklusif: kontrak 12 bulan mulai 1 Jan berakhir 31 Des
+                   (k.mulai + make_interval(months => k.durasi))::date - 1,
+                   k.durasi,
+                   round(a.luas_boto * (h.harga_per_boto / 100) * (k.durasi / 12.0), 2),
+                   -- Kontrak baru lebih sering belum dibayar
+                   CASE WHEN k.mulai > current_date - 60 AND k.r1 < 0.6 THEN 'Belum Bayar'
+                        WHEN k.r1 < 0.05 THEN 'Belum Bayar'
+                        ELSE 'Lunas' END,
+                   %(tanaman)s[1 + floor(k.r2 * cardinality(%(tanaman)s))::int],
+                   k.mulai - make_interval(days => floor(k.r3 * 14)::int)
+            FROM (
+                -- Mulai kontrak ke-n = awal bulan + total durasi kontrak sebelumnya (bulan)
+                -- + total jeda (hari). Bulan ditambahkan dari tanggal 1 sehingga tidak pernah
+                -- terpotong di akhir bulan dan kontrak berikutnya selalu mulai setelah yang sebelumnya.
+                SELECT s.*,
+                       (make_date(%(tahun_awal)s, 1, 1)
+                        + make_interval(months => (sum(s.durasi) OVER w - s.durasi)::int,
+                                        days => (sum(s.jeda) OVER w)::int))::date AS mulai
+                FROM (
+                    SELECT g.aset_id, n,
+                           -- power(random(), 2): penyewa dengan id kecil mendapat lebih banyak kontrak
+                           (%(penyewa)s::int[])[1 + floor(power(random(), 2) * %(jumlah_penyewa)s)::int] AS penyewa_id,
+                           (%(durasi)s::int[])[1 + floor(random() * cardinality(%(durasi)s::int[]))::int] AS durasi,
+                           -- Kontrak pertama mulai acak dalam tahun awal, berikutnya berjeda 0-60 hari
+                           floor(random() * CASE WHEN n = 1 THEN 365 ELSE 61 END)::int AS jeda,
+                           random() AS r1, random() AS r2, random() AS r3
+                    FROM unnest(%(aset)s::int[]) AS g(aset_id)
+                    CROSS JOIN generate_series(1, %(per_aset)s) AS n
+                ) AS s
+                WINDOW w AS (PARTITION BY s.aset_id ORDER BY s.n ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+            ) AS k
+            JOIN aset_sawah a ON a.aset_id = k.aset_id
+            JOIN LATERAL (
+                SELECT id, harga_per_boto FROM harga_sewa
+                WHERE tanggal_mulai_efektif <= k.mulai
+                ORDER BY tanggal_mulai_efektif DESC
+                LIMIT 1
+            ) AS h ON true
+            WHERE k.mulai <= current_date
+        """, {
+            'tanaman': TANAMAN, 'durasi': DURASI_BULAN, 'penyewa': penyewa_ids, 'jumlah_penyewa': len(penyewa_ids),
+            'aset': aset_ids[awal:awal + aset_per_batch], 'per_aset': per_aset, 'tahun_awal': tahun_awal,
+        })
+        total += cur.rowcount
+        cur.connection.commit()
+        print(f"    transaksi {total}/{jumlah}")
+    return total
+
+
+def perbarui_status_aset(cur, offset_aset):
+    """Aset dengan kontrak yang masih berjalan ditandai 'Disewa'."""
+    cur.execute("""
+        UPDATE aset_sawah a SET status_sewa = 'Disewa'
+        WHERE a.aset_id > %s
+          AND EXISTS (
+              SELECT 1 FROM transaksi_sewa t
+              WHERE t.aset_id = a.aset_id AND t.tanggal_akhir >= current_date
+          )
+    """, (offset_aset,))
+    return cur.rowcount
+
+
+def seed(database_url, aset, penyewa, transaksi, tahun_awal, seed_acak, batch, hapus):
+    conn = _koneksi(database_url)
+    cur = conn.cursor()
+    # setseed() membuat random() di server deterministik untuk sesi ini
+    cur.execute("SELECT setseed(%s)", (random.Random(seed_acak).uniform(-1, 1),))
+
+    mulai = time.perf_counter()
+    if hapus:
+        hapus_data(cur)
+        conn.commit()
+        _catat('Data lama dihapus', mulai)
+
+    n = seed_harga(cur, tahun_awal, date.today().year)
+    conn.commit()
+    _catat(f'{n} harga_sewa', mulai)
+
+    n = seed_penyewa(cur, penyewa)
+    conn.commit()
+    _catat(f'{n} penyewa', mulai)
+
+    offset_aset = seed_aset(cur, aset, batch)
+    _catat(f'{aset} aset_sawah', mulai)
+
+    if transaksi and aset:
+        n = seed_transaksi(cur, transaksi, batch, tahun_awal, offset_aset)
+        _catat(f'{n} transaksi_sewa', mulai)
+        n = perbarui_status_aset(cur, offset_aset)
+        conn.commit()
+        _catat(f'{n} aset ditandai Disewa', mulai)
+
+    # Statistik planner harus segar sebelum benchmark
+    conn.autocommit = True
+    # View analitik (database/migrasi/003) mengikuti data baru; refresh penuh lebih cepat dari CONCURRENTLY
+    for mv in ('mv_pendapatan_bulanan', 'mv_pendapatan_aset'):
+        cur.execute("SELECT to_regclass(%s)", (mv,))
+        if cur.fetchone()[0]:
+            cur.execute(f"REFRESH MATERIALIZED VIEW {mv}")
+            _catat(f'{mv} di-refresh', mulai)
+    cur.execute("SELECT to_regclass('analitik_refresh')")
+    if cur.fetchone()[0]:
+        cur.execute("""
+            INSERT INTO analitik_refresh (nama, diperbarui_pada) VALUES ('pendapatan', now())
+            ON CONFLICT (nama) DO UPDATE SET diperbarui_pada = EXCLUDED.diperbarui_pada
+        """)
+    cur.execute("ANALYZE harga_sewa, penyewa, aset_sawah, transaksi_sewa")
+    _catat('ANALYZE selesai', mulai)
+
+    cur.close()
+    conn.close()
+    print("✅ Seed data selesai.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mengisi database dengan data sintetis untuk benchmark.')
+    parser.add_argument('--skala', choices=sorted(SKALA), default='kecil', help='Preset jumlah baris.')
+    parser.add_argument('--aset', type=int, help='Jumlah aset_sawah (menimpa preset).')
+    parser.add_argument('--penyewa', type=int, help='Jumlah penyewa (menimpa preset).')
+    parser.add_argument('--transaksi', type=int, help='Jumlah transaksi_sewa (menimpa preset).')
+    parser.add_argument('--tahun-awal', type=int, default=date.today().year - 15,
+                        help='Tahun harga/kontrak pertama (~10 kontrak berurutan per aset butuh ~15 tahun).')
+    parser.add_argument('--seed', type=int, default=42, help='Seed acak agar hasil dapat diulang.')
+    parser.add_argument('--batch', type=int, default=100_000, help='Baris per INSERT (commit per batch).')
+    parser.add_argument('--hapus', action='store_true', help='TRUNCATE tabel data terlebih dahulu.')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'), help='Default: DATABASE_URL.')
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error('DATABASE_URL belum diatur.')
+
+    preset = SKALA[args.skala]
+    jumlah = {k: getattr(args, k) if getattr(args, k) is not None else v for k, v in preset.items()}
+    print(f"Seed data: {jumlah['aset']} aset, {jumlah['penyewa']} penyewa, {jumlah['transaksi']} transaksi")
+    seed(args.database_url, jumlah['aset'], jumlah['penyewa'], jumlah['transaksi'],
+         args.tahun_awal, args.seed, args.batch, args.hapus)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 -- Mengaktifkan ekstensi PostGIS
 CREATE EXTENSION IF NOT EXISTS postgis;
+-- btree_gist: operator = untuk integer di indeks GiST (constraint periode transaksi_sewa)
+CREATE EXTENSION IF NOT EXISTS btree_gist;
 
 -- 0. Hapus tabel anak terlebih dahulu (untuk pengujian ulang)
 
 -- Urutan yang Benar: Hapus anak sebelum induk
+DROP MATERIALIZED VIEW IF EXISTS mv_pendapatan_bulanan;
+DROP MATERIALIZED VIEW IF EXISTS mv_pendapatan_aset;
+DROP TABLE IF EXISTS analitik_refresh;
+DROP TABLE IF EXISTS antrian_job;
 DROP TABLE IF EXISTS transaksi_sewa; 
 DROP TABLE IF EXISTS aset_sawah;    -- Kini dapat dihapus karena transaksi_sewa sudah hilang
 DROP TABLE IF EXISTS penyewa;
@@ -22,9 +28,11 @@ CREATE TABLE aset_sawah (
     luas_m2 NUMERIC(10, 2) NOT NULL,
     luas_boto NUMERIC(10, 2),
     lokasi GEOMETRY(Point, 4326), -- Tipe data PostGIS untuk menyimpan koordinat (SRID 4326 = WGS 84)
+    tanaman_saat_ini VARCHAR(100),
     status_sewa VARCHAR(50) DEFAULT 'Available',
     keterangan_tambahan TEXT,
-    link_foto_lokasi TEXT
+    link_foto_lokasi TEXT,
+    tanggal_dibuat TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Opsional: Tambahkan indeks spasial untuk performa query berbasis lokasi
@@ -75,11 +83,90 @@ CREATE TABLE transaksi_sewa (
     tanggal_akhir DATE NOT NULL,
     durasi_bulan INTEGER NOT NULL,
     nilai_sewa NUMERIC(15, 2) NOT NULL,
+    status_pembayaran VARCHAR(50) NOT NULL DEFAULT 'Belum Bayar',
     jenis_tanaman_disepakati VARCHAR(100),
     link_bukti_bayar TEXT,
+    tanggal_transaksi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    -- Periode sewa inklusif [tanggal_mulai, tanggal_akhir], dihitung otomatis oleh database
+    periode DATERANGE GENERATED ALWAYS AS (daterange(tanggal_mulai, tanggal_akhir, '[]')) STORED,
+
     -- Constraint untuk memastikan tanggal akhir tidak sebelum tanggal mulai
     CONSTRAINT check_tanggal_sewa_validity
-    CHECK (tanggal_akhir >= tanggal_mulai)
+    CHECK (tanggal_akhir >= tanggal_mulai),
+
+    -- Satu aset tidak boleh disewa dua kali pada periode yang tumpang tindih.
+    -- Indeks GiST (aset_id, periode) sekaligus dipakai untuk cek ketersediaan
+    -- (lihat management_service/src/kalender_sewa.py)
+    CONSTRAINT transaksi_sewa_periode_tidak_tumpang_tindih
+    EXCLUDE USING gist (aset_id WITH =, periode WITH &&)
+);
+
+-- Job kedaluwarsa status sewa: NOT EXISTS (aset_id = ? AND tanggal_akhir >= hari ini)
+-- per aset menjadi satu penelusuran indeks (lihat management_service/src/kedaluwarsa_sewa.py)
+CREATE INDEX IF NOT EXISTS idx_transaksi_sewa_aset_akhir
+ON transaksi_sewa (aset_id, tanggal_akhir);
+
+-- Filter GET /api/v1/transaksi?penyewa_id=... + paginasi keyset sewa_id
+-- (lihat management_service/src/routes/api_v1_routes.py)
+CREATE INDEX IF NOT EXISTS idx_transaksi_sewa_penyewa
+ON transaksi_sewa (penyewa_id, sewa_id);
+
+-- 5. Tabel ANTRIAN_JOB (Antrian pekerjaan latar belakang, dipakai kedua service)
+-- Diambil worker dengan SELECT ... FOR UPDATE SKIP LOCKED (lihat bersama/antrian.py)
+CREATE TABLE IF NOT EXISTS antrian_job (
+    id BIGSERIAL PRIMARY KEY,
+    antrian VARCHAR(50) NOT NULL,                       -- 'management' / 'pricing'
+    nama_tugas VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status VARCHAR(20) NOT NULL DEFAULT 'menunggu',     -- menunggu / berjalan / selesai / gagal
+    percobaan INTEGER NOT NULL DEFAULT 0,
+    maks_percobaan INTEGER NOT NULL DEFAULT 5,
+    jalankan_setelah TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    dikunci_oleh VARCHAR(100),
+    dikunci_pada TIMESTAMP WITH TIME ZONE,
+    error_terakhir TEXT,
+    hasil JSONB,
+    dibuat_pada TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    selesai_pada TIMESTAMP WITH TIME ZONE
 );
 
+-- Indeks parsial: hanya job yang menunggu, urut sesuai query pengambilan job
+CREATE INDEX IF NOT EXISTS idx_antrian_job_siap
+ON antrian_job (antrian, jalankan_setelah, id)
+WHERE status = 'menunggu';
+
+-- 6. Rollup pendapatan untuk analitik (lihat management_service/src/analitik.py)
+-- Di-refresh CONCURRENTLY oleh job antrian 'refresh_analitik' setelah transaksi berubah;
+-- indeks unik wajib ada agar REFRESH ... CONCURRENTLY bisa dipakai.
+-- Bulan pendapatan = bulan tanggal_mulai kontrak.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_pendapatan_bulanan AS
+SELECT date_trunc('month', tanggal_mulai)::date AS bulan,
+       harga_sewa_id,
+       status_pembayaran,
+       count(*) AS jumlah_transaksi,
+       sum(nilai_sewa) AS total_nilai_sewa
+FROM transaksi_sewa
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_pendapatan_bulanan
+ON mv_pendapatan_bulanan (bulan, harga_sewa_id, status_pembayaran);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_pendapatan_aset AS
+SELECT aset_id,
+       status_pembayaran,
+       count(*) AS jumlah_transaksi,
+       sum(nilai_sewa) AS total_nilai_sewa
+FROM transaksi_sewa
+GROUP BY aset_id, status_pembayaran;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_pendapatan_aset
+ON mv_pendapatan_aset (aset_id, status_pembayaran);
+
+-- Waktu refresh terakhir view analitik, satu baris per rollup. Sengaja bukan
+-- kolom now() di dalam view: nilai itu berubah di setiap baris pada setiap
+-- refresh sehingga REFRESH CONCURRENTLY selalu menulis ulang seluruh view.
+CREATE TABLE IF NOT EXISTS analitik_refresh (
+    nama VARCHAR(100) PRIMARY KEY,
+    diperbarui_pada TIMESTAMP WITH TIME ZONE NOT NULL
+);
@@ -0,0 +1,49 @@
+# management_service/gunicorn.conf.py
+#
+# Konfigurasi gunicorn Management Service:  gunicorn -c gunicorn.conf.py wsgi:app
+#   GUNICORN_BIND       alamat listen                         (default 0.0.0.0:5002)
+#   WEB_CONCURRENCY     jumlah proses worker                  (default 2 x CPU + 1)
+#   GUNICORN_THREADS    thread per worker (gthread jika > 1)  (default 1)
+#   GUNICORN_PRELOAD    bangun aplikasi di master (1/0)       (default 1)
+#   GUNICORN_MAX_REQUESTS  daur ulang worker setelah N request, 0 = mati (default 0)
+# Total koneksi DB = WEB_CONCURRENCY x (DB_POOL_SIZE + DB_MAX_OVERFLOW), lihat bersama/pool_db.py.
+#
+# Preload + gc.freeze(): objek yang dibuat saat impor dipindahkan ke generasi
+# permanen GC sebelum fork, sehingga siklus GC di worker tidak menyentuh (dan
+# menyalin) halaman memori milik master. RSS unik per worker turun dan worker
+# baru siap hampir seketika karena tidak perlu mengimpor ulang aplikasi.
+
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5002')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = os.getenv('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+accesslog = '-'
+
+# Tanpa GC selama impor aplikasi: tidak ada "lubang" di heap master sebelum
+# dibekukan. Harus di tingkat modul, karena dengan preload_app gunicorn
+# membangun aplikasi (Arbiter.setup) SEBELUM hook on_starting dipanggil;
+# file konfigurasi ini sendiri dimuat lebih dulu.
+if preload_app:
+    gc.disable()
+
+
+def when_ready(server):
+    # Aplikasi sudah dimuat (preload): bekukan semua objek yang ada sebelum worker
+    # di-fork, lalu aktifkan lagi GC (master dan worker mewarisi status ini)
+    if preload_app:
+        gc.freeze()
+        gc.enable()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from wsgi import setelah_fork
+        setelah_fork()
@@ -1,151 +1,242 @@
-# management_service/main.py (KODE FINAL TERKOREKSI DAN STABIL)
+# management_service/main.py
+#
+# Application factory Management Service.
+#   Development : flask --app main run --port 5002   (atau: python main.py)
+#   Produksi    : gunicorn -c gunicorn.conf.py wsgi:app   (lihat wsgi.py)
+# Modul ini tidak membuat aplikasi, folder, maupun koneksi saat diimpor;
+# semuanya terjadi di create_app().
 
 import os
-import requests 
-from datetime import date
+import sys
 from dotenv import load_dotenv
 
-# Tambahkan 'send_from_directory' untuk menayangkan file upload (KTP)
-from flask import Flask, render_template, redirect, url_for, flash, request, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
-from flask_wtf import FlaskForm
-# Import semua yang dibutuhkan dari wtforms (Hanya di main.py jika model ada di sini)
-from wtforms import StringField, DecimalField, SelectField, SubmitField, IntegerField, TextAreaField, DateField
-from wtforms.validators import DataRequired, Length
+# Tentukan direktori root project
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# Paket bersama kedua service (bersama/: antrian, metrik, pool DB, profiler SQL)
+# berada di root repo, satu tingkat di atas folder ini
+DIR_REPO = os.path.dirname(BASE_DIR)
+if DIR_REPO not in sys.path:
+    sys.path.append(DIR_REPO)
+
+from flask import Flask, render_template, redirect, url_for, flash, jsonify
 from sqlalchemy.exc import SQLAlchemyError
-from decimal import Decimal 
-from sqlalchemy import func # Diperlukan untuk perhitungan statistik
 
 # --- PENTING ---
 # 1. Import objek db global dari aset_model (db = SQLAlchemy())
 # 2. Import semua Model dari models/aset_model.py
-from models.aset_model import db, AsetSawah, Penyewa, TransaksiSewa, HargaSewa 
+from models.aset_model import db, HargaSewa
 
 # Import Forms (Asumsikan Form Anda ada di src/forms.py)
-from src.forms import AsetForm, PenyewaForm, TransaksiForm, HargaForm # Pastikan HargaForm diimport
+from src.forms import HargaForm
 
 # Import Blueprints (Menggunakan impor sederhana yang sudah diperbaiki)
 from src.routes.aset_routes import aset_bp
 from src.routes.penyewa_routes import penyewa_bp
 from src.routes.transaksi_routes import transaksi_bp
+from src.routes.analitik_routes import analitik_bp
+from src.routes.api_v1_routes import api_v1_bp
+from src.statistik import ambil_statistik
+from src.thumbnail import url_thumbnail, url_tampilan
+from src.kirim_upload import kirim_upload
+from src.antrian import AntrianJob, perintah_worker
+from bersama.pool_db import opsi_engine, info_pool
+from bersama.metrik import pasang_metrik
+from bersama.profiler_sql import pasang_profiler
+from src.langganan_harga import pasang_langganan_harga
+from src.kedaluwarsa_sewa import pasang_penjadwal_kedaluwarsa
 
+load_dotenv()
 
-# ===============================================
-# KONSTANTA MICROSERVICE
-# ===============================================
-# Ambil dari env atau default ke 5003
-PRICING_SERVICE_URL = os.getenv('PRICING_SERVICE_URL', "http://localhost:5003") 
 
 # ---------------------------------------------------\
-# 1. SETUP APLIKASI DAN DATABASE 
+# 1. KONFIGURASI
 # ---------------------------------------------------\
 
-load_dotenv()
-app = Flask(__name__)
+class Config:
+    """Konfigurasi Management Service, dibaca dari environment variables."""
+    # Konfigurasi DB
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    # Pool koneksi (DB_POOL_SIZE, DB_MAX_OVERFLOW, ... lihat bersama/pool_db.py)
+    SQLALCHEMY_ENGINE_OPTIONS = opsi_engine(SQLALCHEMY_DATABASE_URI, 'management_service')
+    SECRET_KEY = os.getenv('SECRET_KEY', 'dev_secret')
 
-# Tentukan direktori root project
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))\
+    # Konfigurasi Upload:
+    UPLOAD_FOLDER = os.path.join(os.path.dirname(BASE_DIR), 'uploads')
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # Batas 16MB
+
+    # Cache tile vektor peta aset (lihat src/tile_cache.py)
+    TILE_CACHE_FOLDER = os.getenv('TILE_CACHE_FOLDER', os.path.join(os.path.dirname(BASE_DIR), 'tile_cache'))
 
-# Konfigurasi Upload:
-UPLOAD_FOLDER = os.path.join(os.path.dirname(BASE_DIR), 'uploads')
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024 # Batas 16MB
+    # Konfigurasi klien Pricing Service (lihat src/pricing_client.py)
+    PRICING_SERVICE_URL = os.getenv('PRICING_SERVICE_URL', 'http://localhost:5003')
+    PRICING_CACHE_TTL = int(os.getenv('PRICING_CACHE_TTL', 60))              # detik, data dianggap segar
+    PRICING_CACHE_STALE_TTL = int(os.getenv('PRICING_CACHE_STALE_TTL', 600)) # detik, batas data basi boleh dilayani
+    PRICING_CACHE_TTL_PUSH = int(os.getenv('PRICING_CACHE_TTL_PUSH', 3600))  # detik, selama LISTEN harga aktif
 
-# Konfigurasi DB
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev_secret')
+    # Notifikasi perubahan harga dari Pricing Service (lihat src/langganan_harga.py)
+    HARGA_LISTEN = os.getenv('HARGA_LISTEN', '1').lower() in ('1', 'true', 'yes')
+    HARGA_WEBHOOK_SECRET = os.getenv('HARGA_WEBHOOK_SECRET', '')
 
+    # Cache statistik dashboard (detik), diinvalidasi oleh jalur tulis
+    STATISTIK_CACHE_TTL = int(os.getenv('STATISTIK_CACHE_TTL', 30))
 
-# --- PERBAIKAN KRITIS: INIT DB ---
-# Hubungkan objek db yang diimport dari aset_model ke aplikasi Flask
-db.init_app(app) 
+    # Mode penayangan /uploads: 'flask' (default, dilayani worker dengan ETag + Range),
+    # 'x-accel' (Nginx X-Accel-Redirect) atau 'x-sendfile' (Apache/Lighttpd X-Sendfile)
+    UPLOAD_SERVE_MODE = os.getenv('UPLOAD_SERVE_MODE', 'flask').lower()
+    # Prefix location internal Nginx yang menunjuk ke UPLOAD_FOLDER (mode x-accel)
+    UPLOAD_ACCEL_PREFIX = os.getenv('UPLOAD_ACCEL_PREFIX', '/_uploads_internal/')
+    USE_X_SENDFILE = UPLOAD_SERVE_MODE == 'x-sendfile'
 
-# Cek dan buat folder uploads jika belum ada
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+    # Profiler SQL per request + deteksi N+1 (lihat bersama/profiler_sql.py), default mati
+    SQL_PROFILER = os.getenv('SQL_PROFILER', '0').lower() in ('1', 'true', 'yes')
+    SQL_PROFILER_AMBANG_N1 = int(os.getenv('SQL_PROFILER_AMBANG_N1', 3))
+
+    # Antrian job latar belakang (lihat src/antrian.py, jalankan: flask worker)
+    JOB_MAKS_PERCOBAAN = int(os.getenv('JOB_MAKS_PERCOBAAN', 5))
+    JOB_BACKOFF_DASAR = int(os.getenv('JOB_BACKOFF_DASAR', 10))   # detik
+    JOB_BACKOFF_MAKS = int(os.getenv('JOB_BACKOFF_MAKS', 3600))   # detik
+    JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', 900))              # detik, job 'berjalan' dianggap macet
+
+    # Job kedaluwarsa status sewa (lihat src/kedaluwarsa_sewa.py, CLI: flask kedaluwarsa-sewa)
+    KEDALUWARSA_PENJADWAL = os.getenv('KEDALUWARSA_PENJADWAL', '0').lower() in ('1', 'true', 'yes')
+    KEDALUWARSA_INTERVAL = int(os.getenv('KEDALUWARSA_INTERVAL', 3600))  # detik
+
+    # Jeda (detik) sebelum job refresh view analitik berjalan setelah penulisan (lihat src/analitik.py)
+    ANALITIK_REFRESH_TUNDA = int(os.getenv('ANALITIK_REFRESH_TUNDA', 10))
+
+    # Kompresi respons /api/v1 (br jika modul brotli terpasang, selain itu gzip; lihat src/kompresi.py)
+    KOMPRESI_MIN_BYTES = int(os.getenv('KOMPRESI_MIN_BYTES', 1024))
+    KOMPRESI_LEVEL_GZIP = int(os.getenv('KOMPRESI_LEVEL_GZIP', 6))
+    KOMPRESI_LEVEL_BR = int(os.getenv('KOMPRESI_LEVEL_BR', 5))
+
+    # Jumlah thread worker pembuat thumbnail upload (lihat src/thumbnail.py)
+    THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
 
 
 # ---------------------------------------------------\
-# 3. DAFTARKAN BLUEPRINTS
+# 2. APPLICATION FACTORY
 # ---------------------------------------------------\
 
-app.register_blueprint(aset_bp)
-app.register_blueprint(penyewa_bp)
-app.register_blueprint(transaksi_bp, url_prefix='/transaksi')
+def create_app(config_class=Config, **config_tambahan):
+    """Membangun aplikasi Management Service. `config_tambahan` menimpa nilai Config (misal untuk benchmark)."""
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    app.config.update(config_tambahan)
+
+    # Hubungkan objek db yang diimport dari aset_model ke aplikasi Flask
+    db.init_app(app)
+
+    # Cek dan buat folder uploads jika belum ada
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    # DAFTARKAN BLUEPRINTS
+    app.register_blueprint(aset_bp)
+    app.register_blueprint(penyewa_bp)
+    app.register_blueprint(transaksi_bp, url_prefix='/transaksi')
+    app.register_blueprint(analitik_bp)
+    # REST API JSON read-only: /api/v1/aset, /api/v1/penyewa, /api/v1/transaksi
+    app.register_blueprint(api_v1_bp)
+    _daftarkan_route_utama(app)
+
+    # Metrik Prometheus: GET /metrics (latensi request, SQL per request, Pricing Service, pool DB)
+    pasang_metrik(app, db)
+    pasang_profiler(app)
+
+    # Perubahan harga di-push Pricing Service: LISTEN harga_berubah + POST /sistem/webhook/harga
+    pasang_langganan_harga(app, db)
+
+    # Perintah CLI worker antrian job: flask worker [--sekali]
+    app.cli.add_command(perintah_worker)
+    # Status 'Disewa' -> 'Expired' saat kontrak berakhir: flask kedaluwarsa-sewa / penjadwal opsional
+    pasang_penjadwal_kedaluwarsa(app)
+
+    # Helper template untuk thumbnail upload
+    app.add_template_global(url_thumbnail)
+    app.add_template_global(url_tampilan)
+
+    return app
 
 
 # ---------------------------------------------------\
-# 4. ROUTE UTAMA DAN SISTEM
+# 3. ROUTE UTAMA DAN SISTEM
 # ---------------------------------------------------\
 
-# ROUTE DASHBOARD UTAMA
-@app.route('/')
-def index():
-    """Menampilkan dashboard utama dengan ringkasan statistik."""
-    try:
-        total_aset = db.session.query(AsetSawah).count()
-        aset_tersedia = db.session.query(AsetSawah).filter_by(status_sewa='Tersedia').count()
-        total_penyewa = db.session.query(Penyewa).count()
-        total_transaksi = db.session.query(TransaksiSewa).count()
-        
-    except SQLAlchemyError as e:
-        # Jika database belum siap atau ada masalah koneksi
-        flash(f'Gagal mengambil statistik database: {e}', 'danger')
-        total_aset = aset_tersedia = total_penyewa = total_transaksi = 0
-
-    context = {
-        'total_aset': total_aset,
-        'aset_tersedia': aset_tersedia,
-        'total_penyewa': total_penyewa,
-        'total_transaksi': total_transaksi
-    }
-    
-    # render_template('index.html') akan berhasil karena file sudah ada dan terdaftar
-    return render_template('index.html', context=context)
-
-
-# ROUTE WAJIB: MENAYANGKAN FILE UPLOAD (KTP, dll.)
-# Route ini memungkinkan file diakses melalui URL: /uploads/namafile.jpg
-@app.route('/uploads/<path:filename>')
-def uploaded_file(filename):
-    # Menggunakan path:filename untuk menangani subdirektori (walaupun tidak digunakan saat ini)
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
-
-
-# ROUTE PENGATURAN HARGA (Jika Anda ingin mengelola harga di Management Service)
-@app.route('/pengaturan/harga', methods=['GET', 'POST'])
-def pengaturan_harga():
-    # Karena HargaSewa sudah ada di models/aset_model.py, ini akan menggunakan DB yang sama
-    harga = HargaSewa.query.first()
-    form = HargaForm(obj=harga)
-
-    if form.validate_on_submit():
-        if harga:
-            harga.harga_per_boto = form.harga_per_boto.data
-            flash('Harga sewa per boto berhasil diperbarui!', 'success')
-        else:
-            new_harga = HargaSewa(harga_per_boto=form.harga_per_boto.data)
-            db.session.add(new_harga)
-            flash('Harga sewa per boto berhasil disimpan!', 'success')
-            
-        try:
-            db.session.commit()
-            return redirect(url_for('pengaturan_harga'))
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            flash(f'Gagal menyimpan harga: {e}', 'danger')
+def _daftarkan_route_utama(app):
+    """Route tingkat aplikasi (nama endpoint tanpa prefix blueprint: 'index', 'uploaded_file', ...)."""
 
+    # ROUTE DASHBOARD UTAMA
+    @app.route('/')
+    def index():
+        """Menampilkan dashboard utama dengan ringkasan statistik."""
+        try:
+            # Satu query agregat, dilayani dari cache ringkasan (lihat src/statistik.py)
+            context = ambil_statistik()
 
-    return render_template('form_pengaturan_harga.html', form=form, title='Pengaturan Harga Sewa')
+        except SQLAlchemyError as e:
+            # Jika database belum siap atau ada masalah koneksi
+            flash(f'Gagal mengambil statistik database: {e}', 'danger')
+            context = {
+                'total_aset': 0,
+                'aset_tersedia': 0,
+                'total_penyewa': 0,
+                'total_transaksi': 0
+            }
+
+        return render_template('index.html', context=context)
+
+    # ROUTE WAJIB: MENAYANGKAN FILE UPLOAD (KTP, dll.)
+    # Route ini memungkinkan file diakses melalui URL: /uploads/namafile.jpg
+    @app.route('/uploads/<path:filename>')
+    def uploaded_file(filename):
+        # Menggunakan path:filename untuk menangani subdirektori (cas/ab/cd/..., turunan/...)
+        return kirim_upload(filename)
+
+    # ROUTE STATISTIK POOL KONEKSI DB (untuk menentukan jumlah worker vs max_connections)
+    @app.route('/sistem/pool')
+    def statistik_pool():
+        try:
+            return jsonify(info_pool(db.engine))
+        except SQLAlchemyError as e:
+            return jsonify({'error': 'Gagal membaca status database.', 'details': str(e)}), 503
+
+    # ROUTE STATUS JOB ANTRIAN (untuk polling setelah pekerjaan dijadwalkan)
+    @app.route('/sistem/job/<int:job_id>')
+    def status_job(job_id):
+        job = db.session.get(AntrianJob, job_id)
+        if job is None:
+            return jsonify({'error': 'Job tidak ditemukan.'}), 404
+        return jsonify(job.ke_dict())
+
+    # ROUTE PENGATURAN HARGA (Jika Anda ingin mengelola harga di Management Service)
+    @app.route('/pengaturan/harga', methods=['GET', 'POST'])
+    def pengaturan_harga():
+        # Karena HargaSewa sudah ada di models/aset_model.py, ini akan menggunakan DB yang sama
+        harga = HargaSewa.query.first()
+        form = HargaForm(obj=harga)
+
+        if form.validate_on_submit():
+            if harga:
+                harga.harga_per_boto = form.harga_per_boto.data
+                flash('Harga sewa per boto berhasil diperbarui!', 'success')
+            else:
+                new_harga = HargaSewa(harga_per_boto=form.harga_per_boto.data)
+                db.session.add(new_harga)
+                flash('Harga sewa per boto berhasil disimpan!', 'success')
+
+            try:
+                db.session.commit()
+                return redirect(url_for('pengaturan_harga'))
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                flash(f'Gagal menyimpan harga: {e}', 'danger')
+
+        return render_template('form_pengaturan_harga.html', form=form, title='Pengaturan Harga Sewa')
 
 
 # ---------------------------------------------------\
-# 5. RUN APLIKASI
+# 4. RUN APLIKASI (development)
 # ---------------------------------------------------\
 
 if __name__ == '__main__':
-    with app.app_context():
-        # JANGAN gunakan db.create_all() secara otomatis di sini jika Anda menggunakan Alembic/migrasi
-        # Tetapi jika Anda yakin ingin membuatnya secara otomatis: db.create_all()
-        pass
-    app.run(debug=True, port=5002) # Port 5002 untuk Management Service
\ No newline at end of file
+    create_app().run(debug=os.getenv('FLASK_DEBUG', '0') == '1', port=5002) # Port 5002 untuk Management Service
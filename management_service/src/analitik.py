@@ -0,0 +1,212 @@
+# FILE: management_service/src/analitik.py
+#
+# Analitik pendapatan sewa (nilai_sewa) dari materialized view rollup:
+# - mv_pendapatan_bulanan : per (bulan mulai kontrak, harga_sewa_id, status_pembayaran)
+#                           -> ratusan baris; dasar laporan per bulan/tahun/harga/status
+# - mv_pendapatan_aset    : per (aset_id, status_pembayaran) -> laporan per aset
+# Definisi view ada di database/setup_tables.sql (database/migrasi/003_..., 006_...).
+#
+# View di-refresh dengan REFRESH MATERIALIZED VIEW CONCURRENTLY (pembaca tidak
+# terblokir) oleh job antrian 'refresh_analitik'. Jalur tulis transaksi memanggil
+# jadwalkan_refresh_analitik() sebelum commit; rentetan penulisan dalam
+# ANALITIK_REFRESH_TUNDA detik digabung menjadi satu refresh (antrikan_sekali).
+# Di luar PostgreSQL (misal SQLite saat pengembangan) laporan dihitung langsung
+# dari transaksi_sewa dan refresh dilewati.
+
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import column, func, select, table, text
+
+from models.aset_model import db, AsetSawah, TransaksiSewa
+from src.antrian import AntrianJob, NAMA_ANTRIAN, STATUS_MENUNGGU, antrikan_sekali, tugas
+
+MV_BULANAN = 'mv_pendapatan_bulanan'
+MV_ASET = 'mv_pendapatan_aset'
+SEMUA_MV = (MV_BULANAN, MV_ASET)
+
+NAMA_TUGAS_REFRESH = 'refresh_analitik'
+NAMA_ROLLUP = 'pendapatan'
+
+DIMENSI = ('bulan', 'tahun', 'harga', 'status', 'aset')
+LIMIT_ASET_DEFAULT = 50
+LIMIT_ASET_MAKS = 1000
+
+_mv_bulanan = table(
+    MV_BULANAN,
+    column('bulan'), column('harga_sewa_id'), column('status_pembayaran'),
+    column('jumlah_transaksi'), column('total_nilai_sewa'),
+)
+_mv_aset = table(
+    MV_ASET,
+    column('aset_id'), column('status_pembayaran'),
+    column('jumlah_transaksi'), column('total_nilai_sewa'),
+)
+# Satu baris per rollup; di-upsert oleh refresh_analitik()
+_analitik_refresh = table('analitik_refresh', column('nama'), column('diperbarui_pada'))
+
+
+class FilterAnalitikTidakValid(ValueError):
+    """Kombinasi parameter laporan tidak didukung (misal filter bulan untuk per=aset)."""
+
+
+def _pakai_mv():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _sumber_bulanan():
+    """Selectable berkolom sama dengan mv_pendapatan_bulanan; bulan berformat 'YYYY-MM-01'."""
+    if _pakai_mv():
+        return _mv_bulanan
+    bulan = func.strftime('%Y-%m-01', TransaksiSewa.tanggal_mulai)
+    return select(
+        bulan.label('bulan'),
+        TransaksiSewa.harga_sewa_id,
+        TransaksiSewa.status_pembayaran,
+        func.count().label('jumlah_transaksi'),
+        func.sum(TransaksiSewa.nilai_sewa).label('total_nilai_sewa'),
+    ).group_by(bulan, TransaksiSewa.harga_sewa_id, TransaksiSewa.status_pembayaran).subquery(MV_BULANAN)
+
+
+def _sumber_aset():
+    if _pakai_mv():
+        return _mv_aset
+    return select(
+        TransaksiSewa.aset_id,
+        TransaksiSewa.status_pembayaran,
+        func.count().label('jumlah_transaksi'),
+        func.sum(TransaksiSewa.nilai_sewa).label('total_nilai_sewa'),
+    ).group_by(TransaksiSewa.aset_id, TransaksiSewa.status_pembayaran).subquery(MV_ASET)
+
+
+def _baris(kunci, jumlah, total, **tambahan):
+    return {'kunci': kunci, **tambahan, 'jumlah_transaksi': int(jumlah or 0), 'total_nilai_sewa': str(Decimal(total or 0))}
+
+
+def ringkasan_pendapatan(per, dari=None, sampai=None, status=None, harga_sewa_id=None, limit=LIMIT_ASET_DEFAULT):
+    """
+    Pendapatan per `per` (bulan/tahun/harga/status/aset). `dari`/`sampai` adalah
+    date awal bulan (inklusif). Mengembalikan list dict berurutan.
+    """
+    if per not in DIMENSI:
+        raise FilterAnalitikTidakValid(f"per harus salah satu dari: {', '.join(DIMENSI)}.")
+    if per == 'aset':
+        if dari or sampai:
+            raise FilterAnalitikTidakValid('Filter bulan tidak tersedia untuk per=aset (rollup aset sepanjang waktu).')
+        if harga_sewa_id is not None:
+            raise FilterAnalitikTidakValid('Filter harga_sewa_id tidak tersedia untuk per=aset.')
+        return _per_aset(status, limit)
+
+    sumber = _sumber_bulanan()
+    c = sumber.c
+    kondisi = []
+    if dari:
+        kondisi.append(c.bulan >= (dari if _pakai_mv() else dari.isoformat()))
+    if sampai:
+        kondisi.append(c.bulan <= (sampai if _pakai_mv() else sampai.isoformat()))
+    if status:
+        kondisi.append(c.status_pembayaran == status)
+    if harga_sewa_id is not None:
+        kondisi.append(c.harga_sewa_id == harga_sewa_id)
+
+    kunci = {'bulan': c.bulan, 'tahun': c.bulan, 'harga': c.harga_sewa_id, 'status': c.status_pembayaran}[per]
+    rows = db.session.execute(
+        select(kunci.label('kunci'), func.sum(c.jumlah_transaksi), func.sum(c.total_nilai_sewa))
+        .where(*kondisi)
+        .group_by(kunci)
+        .order_by(kunci)
+    ).all()
+
+    if per == 'bulan':
+        return [_baris(str(k)[:7], j, t) for k, j, t in rows]
+    if per == 'tahun':
+        # Paling banyak ratusan baris bulan: gabungkan per tahun di Python
+        per_tahun = OrderedDict()
+        for k, j, t in rows:
+            akumulasi = per_tahun.setdefault(str(k)[:4], [0, Decimal(0)])
+            akumulasi[0] += int(j or 0)
+            akumulasi[1] += Decimal(t or 0)
+        return [_baris(tahun, j, t) for tahun, (j, t) in per_tahun.items()]
+    return [_baris(k, j, t) for k, j, t in rows]
+
+
+def _per_aset(status, limit):
+    sumber = _sumber_aset()
+    c = sumber.c
+    total = func.sum(c.total_nilai_sewa)
+    query = (
+        select(c.aset_id, AsetSawah.nama_sebutan, func.sum(c.jumlah_transaksi), total)
+        .join(AsetSawah, AsetSawah.aset_id == c.aset_id)
+        .group_by(c.aset_id, AsetSawah.nama_sebutan)
+        .order_by(total.desc(), c.aset_id)
+        .limit(max(1, min(limit, LIMIT_ASET_MAKS)))
+    )
+    if status:
+        query = query.where(c.status_pembayaran == status)
+    return [_baris(aset_id, j, t, nama_sebutan=nama) for aset_id, nama, j, t in db.session.execute(query)]
+
+
+# ---------------------------------------------------------------------
+# REFRESH MATERIALIZED VIEW
+# ---------------------------------------------------------------------
+
+def refresh_analitik(concurrently=True):
+    """
+    REFRESH semua view analitik (TIDAK commit). CONCURRENTLY memakai indeks unik
+    view sehingga laporan tetap bisa dibaca selama refresh. Waktu refresh dicatat
+    di tabel analitik_refresh, bukan di dalam view, agar CONCURRENTLY hanya
+    menulis baris yang benar-benar berubah.
+    """
+    if not _pakai_mv():
+        return {'dilewati': True}
+    durasi = {}
+    for mv in SEMUA_MV:
+        mulai = time.perf_counter()
+        db.session.execute(text(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{mv}"))
+        durasi[mv] = round((time.perf_counter() - mulai) * 1000, 1)
+    db.session.execute(text(
+        "INSERT INTO analitik_refresh (nama, diperbarui_pada) VALUES (:nama, now()) "
+        "ON CONFLICT (nama) DO UPDATE SET diperbarui_pada = EXCLUDED.diperbarui_pada"
+    ), {'nama': NAMA_ROLLUP})
+    return {'durasi_ms': durasi}
+
+
+@tugas(NAMA_TUGAS_REFRESH)
+def tugas_refresh_analitik(payload):
+    """Job antrian: refresh view analitik (idempoten, selalu membaca data terbaru)."""
+    return refresh_analitik()
+
+
+def jadwalkan_refresh_analitik(tunda_detik=None):
+    """
+    Dipanggil jalur tulis SEBELUM commit: job refresh ikut transaksi pemanggil.
+    Job yang masih menunggu dipakai ulang, jadi rentetan penulisan = satu refresh.
+    """
+    if not _pakai_mv():
+        return None
+    if tunda_detik is None:
+        tunda_detik = current_app.config.get('ANALITIK_REFRESH_TUNDA', 10)
+    return antrikan_sekali(NAMA_TUGAS_REFRESH, tunda_detik=tunda_detik)
+
+
+def info_refresh():
+    """Waktu refresh terakhir (tabel analitik_refresh) dan apakah refresh masih menunggu."""
+    if not _pakai_mv():
+        return {'sumber': 'langsung', 'diperbarui_pada': None, 'refresh_tertunda': False}
+    terakhir = db.session.execute(
+        select(_analitik_refresh.c.diperbarui_pada).where(_analitik_refresh.c.nama == NAMA_ROLLUP)
+    ).scalar()
+    menunggu = db.session.execute(
+        select(func.count(AntrianJob.id)).where(
+            AntrianJob.antrian == NAMA_ANTRIAN,
+            AntrianJob.nama_tugas == NAMA_TUGAS_REFRESH,
+            AntrianJob.status == STATUS_MENUNGGU,
+        )
+    ).scalar()
+    return {
+        'sumber': 'materialized_view',
+        'diperbarui_pada': terakhir.isoformat() if terakhir else None,
+        'refresh_tertunda': bool(menunggu),
+    }
@@ -0,0 +1,26 @@
+# FILE: management_service/src/antrian.py
+#
+# Antrian job Management Service (antrian = 'management'), dibangun dari
+# antrian bersama (bersama/antrian.py) dengan objek db milik service ini.
+# Handler didaftarkan dengan @tugas(...); worker: flask worker [--sekali]
+
+from bersama.antrian import (  # noqa: F401 (diekspor ulang untuk modul service)
+    Antrian, JobGagalPermanen, hitung_backoff,
+    STATUS_MENUNGGU, STATUS_BERJALAN, STATUS_SELESAI, STATUS_GAGAL,
+)
+from models.aset_model import db
+
+NAMA_ANTRIAN = 'management'
+
+_antrian = Antrian(db, NAMA_ANTRIAN)
+
+AntrianJob = _antrian.AntrianJob
+REGISTRI_TUGAS = _antrian.registri
+tugas = _antrian.tugas
+antrikan = _antrian.antrikan
+antrikan_sekali = _antrian.antrikan_sekali
+pulihkan_job_macet = _antrian.pulihkan_job_macet
+ambil_job = _antrian.ambil_job
+proses_job = _antrian.proses_job
+jalankan_worker = _antrian.jalankan_worker
+perintah_worker = _antrian.perintah_worker
@@ -1,9 +1,49 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, DecimalField, SubmitField, SelectField, TextAreaField, DateField, IntegerField
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import StringField, DecimalField, SubmitField, SelectField, TextAreaField, DateField, IntegerField, BooleanField
 # PENTING: Tambahkan Optional di sini
 from wtforms.validators import DataRequired, ValidationError, NumberRange, Length, Optional 
 import re
 
+# Pilihan status sewa aset (dipakai AsetForm dan impor CSV aset)
+STATUS_SEWA_PILIHAN = [
+    ('Disewa', 'Disewa'),
+    ('Tidak Disewa', 'Tidak Disewa'),
+    # Diisi otomatis oleh job kedaluwarsa (src/kedaluwarsa_sewa.py) saat kontrak berakhir
+    ('Expired', 'Expired (kontrak berakhir)')
+]
+
+# Pilihan status pembayaran transaksi (dipakai TransaksiForm dan filter ekspor CSV transaksi)
+STATUS_PEMBAYARAN_PILIHAN = [
+    ('Belum Bayar', 'Belum Bayar'),
+    ('Lunas', 'Lunas')
+]
+
+POLA_LOKASI = re.compile(r'^\s*-?\d{1,3}\.\d+,\s*-?\d{1,2}\.\d+\s*$')
+
+
+def validasi_lokasi(teks):
+    """
+    Validasi format lokasi harus "lon,lat" dengan nilai numerik valid.
+    Contoh valid: 112.062692,-7.73961
+    Mengembalikan tuple (lon, lat) bertipe float, atau raise ValidationError.
+    """
+    if not teks or not POLA_LOKASI.match(teks):
+        raise ValidationError(
+            "Format lokasi tidak valid. Gunakan format: 112.062692,-7.73961 (longitude,latitude)"
+        )
+
+    try:
+        lon, lat = map(float, teks.split(','))
+    except ValueError:
+        raise ValidationError("Koordinat harus berupa angka desimal valid.")
+
+    # Validasi rentang geografis dasar
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValidationError("Koordinat di luar rentang valid bumi.")
+    return lon, lat
+
+
 class AsetForm(FlaskForm):
     nama_sebutan = StringField('Nama Sebutan', validators=[DataRequired()])
     nomor_sertifikat = StringField('Nomor Sertifikat', validators=[DataRequired()])
@@ -11,32 +51,23 @@ class AsetForm(FlaskForm):
     luas_boto = DecimalField('Luas (boto)', validators=[Optional(), NumberRange(min=0)])
     lokasi = StringField('Lokasi (longitude,latitude)', validators=[DataRequired()])
     tanaman_saat_ini = StringField('Tanaman Saat Ini', validators=[DataRequired()])
-    status_sewa = SelectField('Status Sewa', choices=[
-        ('Disewa', 'Disewa'),
-        ('Tidak Disewa', 'Tidak Disewa')
-    ], validators=[DataRequired()])
+    status_sewa = SelectField('Status Sewa', choices=STATUS_SEWA_PILIHAN, validators=[DataRequired()])
 
     submit = SubmitField('Simpan')
 
-    # 🔍 Custom validator untuk field lokasi
+    # 🔍 Custom validator untuk field lokasi (aturan yang sama dipakai impor CSV)
     def validate_lokasi(self, field):
-        """
-        Validasi format lokasi harus "lon,lat" dengan nilai numerik valid.
-        Contoh valid: 112.062692,-7.73961
-        """
-        pattern = r'^\s*-?\d{1,3}\.\d+,\s*-?\d{1,2}\.\d+\s*$'
-        if not re.match(pattern, field.data):
-            raise ValidationError(
-                "Format lokasi tidak valid. Gunakan format: 112.062692,-7.73961 (longitude,latitude)"
-            )
-
-        # Validasi rentang geografis dasar
-        try:
-            lon, lat = map(float, field.data.split(','))
-            if not (-180 <= lon <= 180 and -90 <= lat <= 90):
-                raise ValidationError("Koordinat di luar rentang valid bumi.")
-        except ValueError:
-            raise ValidationError("Koordinat harus berupa angka desimal valid.")
+        validasi_lokasi(field.data)
+
+
+class ImporAsetForm(FlaskForm):
+    csv_file = FileField('File CSV Aset', validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'txt'], 'Hanya file CSV yang didukung.')
+    ])
+    dry_run = BooleanField('Hanya periksa (dry-run), jangan simpan')
+    latar_belakang = BooleanField('Proses di latar belakang (untuk file besar)')
+    submit = SubmitField('Impor')
 
 class PenyewaForm(FlaskForm):
     nama_lengkap = StringField('Nama Lengkap', validators=[DataRequired(), Length(max=255)])
@@ -59,15 +90,17 @@ class TransaksiForm(FlaskForm):
     # KOREKSI 2: Nilai Sewa diubah menjadi OPSIONAL
     nilai_sewa = DecimalField('Nilai Sewa', validators=[Optional(), NumberRange(min=0)], places=2)
     # 🚨 TAMBAHKAN FIELD STATUS PEMBAYARAN 🚨
-    status_pembayaran = SelectField('Status Pembayaran', choices=[
-        ('Belum Bayar', 'Belum Bayar'),
-        ('Lunas', 'Lunas')
-    ], validators=[DataRequired()])
+    status_pembayaran = SelectField('Status Pembayaran', choices=STATUS_PEMBAYARAN_PILIHAN, validators=[DataRequired()])
     # -------------------------------------
     
     jenis_tanaman_disepakati = StringField('Jenis Tanaman Disepakati', validators=[Length(max=100)])
     submit = SubmitField('Simpan')
 
+    def validate_tanggal_akhir(self, field):
+        # Sama dengan CHECK check_tanggal_sewa_validity; periode sewa wajib rentang yang valid
+        if self.tanggal_mulai.data and field.data and field.data < self.tanggal_mulai.data:
+            raise ValidationError("Tanggal Akhir tidak boleh sebelum Tanggal Mulai.")
+
 # management_service/src/forms.py (Tambahkan ini)
 
 class HargaForm(FlaskForm):
@@ -0,0 +1,230 @@
+# FILE: management_service/src/impor_aset.py
+#
+# Impor massal aset_sawah dari CSV.
+# 1. Setiap baris divalidasi dengan aturan yang sama seperti AsetForm
+#    (validasi_lokasi, status sewa, luas numerik).
+# 2. Baris valid dimuat sekaligus ke tabel staging sementara lewat COPY.
+# 3. Duplikat nomor_sertifikat (di dalam file maupun yang sudah ada di DB)
+#    dilaporkan secara massal dengan satu query masing-masing.
+# 4. Sisa baris digabung ke aset_sawah dengan satu INSERT ... SELECT;
+#    luas_boto dan geometry lokasi dihitung di SQL.
+
+import csv
+import io
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from sqlalchemy import text
+from wtforms.validators import ValidationError
+
+from models.aset_model import db
+from src.forms import STATUS_SEWA_PILIHAN, validasi_lokasi
+
+KOLOM_WAJIB = ('nama_sebutan', 'nomor_sertifikat', 'luas_m2', 'lokasi', 'tanaman_saat_ini')
+STATUS_DEFAULT = 'Tidak Disewa'
+STATUS_VALID = {nilai for nilai, _label in STATUS_SEWA_PILIHAN}
+# luas_m2 NUMERIC(10, 2): 2 desimal, nilai di bawah 10^8
+LUAS_M2_SKALA = Decimal('0.01')
+LUAS_M2_MAKS = Decimal('1e8')
+
+# Kolom tabel staging (urutan = urutan kolom pada COPY)
+KOLOM_STAGING = ('baris', 'nama_sebutan', 'nomor_sertifikat', 'luas_m2', 'lon', 'lat', 'tanaman_saat_ini', 'status_sewa')
+
+
+class FormatCSVTidakValid(ValueError):
+    """Header CSV tidak lengkap atau file tidak dapat dibaca sebagai CSV."""
+
+
+def _validasi_baris(row):
+    """Mengembalikan (data_bersih, daftar_error) untuk satu baris CSV."""
+    errors = []
+    nilai = {k: (row.get(k) or '').strip() for k in KOLOM_WAJIB + ('status_sewa',)}
+
+    if not nilai['nama_sebutan']:
+        errors.append('nama_sebutan wajib diisi.')
+    elif len(nilai['nama_sebutan']) > 255:
+        errors.append('nama_sebutan maksimal 255 karakter.')
+
+    if not nilai['nomor_sertifikat']:
+        errors.append('nomor_sertifikat wajib diisi.')
+    elif len(nilai['nomor_sertifikat']) > 100:
+        errors.append('nomor_sertifikat maksimal 100 karakter.')
+
+    luas_m2 = None
+    try:
+        luas_m2 = Decimal(nilai['luas_m2'])
+        if not luas_m2.is_finite() or luas_m2 < 0:
+            raise InvalidOperation
+    except InvalidOperation:
+        luas_m2 = None
+        errors.append('luas_m2 harus angka tidak negatif.')
+    else:
+        # Dibulatkan seperti kolom NUMERIC(10, 2); nilai yang tidak muat dilaporkan per
+        # baris, bukan menggagalkan COPY (numeric overflow) untuk seluruh file
+        if luas_m2 < LUAS_M2_MAKS:
+            luas_m2 = luas_m2.quantize(LUAS_M2_SKALA, rounding=ROUND_HALF_UP)
+        if luas_m2 >= LUAS_M2_MAKS:
+            luas_m2 = None
+            errors.append(f'luas_m2 harus kurang dari {LUAS_M2_MAKS:,.0f}.')
+
+    lon = lat = None
+    try:
+        lon, lat = validasi_lokasi(nilai['lokasi'])
+    except ValidationError as e:
+        errors.append(f'lokasi: {e}')
+
+    if not nilai['tanaman_saat_ini']:
+        errors.append('tanaman_saat_ini wajib diisi.')
+    elif len(nilai['tanaman_saat_ini']) > 100:
+        errors.append('tanaman_saat_ini maksimal 100 karakter.')
+
+    status = nilai['status_sewa'] or STATUS_DEFAULT
+    if status not in STATUS_VALID:
+        errors.append(f"status_sewa harus salah satu dari: {', '.join(sorted(STATUS_VALID))}.")
+
+    data = {
+        'nama_sebutan': nilai['nama_sebutan'],
+        'nomor_sertifikat': nilai['nomor_sertifikat'],
+        'luas_m2': luas_m2,
+        'lon': lon,
+        'lat': lat,
+        'tanaman_saat_ini': nilai['tanaman_saat_ini'],
+        'status_sewa': status,
+    }
+    return data, errors
+
+
+def _buka_reader(stream):
+    """csv.DictReader dengan deteksi pemisah (',' / ';' / tab) dari baris header."""
+    header = stream.readline()
+    if not header.strip():
+        raise FormatCSVTidakValid('File CSV kosong.')
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    fieldnames = [h.strip().lower() for h in next(csv.reader([header], dialect))]
+    kurang = [k for k in KOLOM_WAJIB if k not in fieldnames]
+    if kurang:
+        raise FormatCSVTidakValid(f"Kolom wajib tidak ada di header CSV: {', '.join(kurang)}.")
+    return csv.DictReader(stream, fieldnames=fieldnames, dialect=dialect)
+
+
+def impor_aset_csv(stream, dry_run=False):
+    """
+    Mengimpor aset dari `stream` teks CSV. TIDAK melakukan commit; pemanggil
+    melakukan commit (atau rollback untuk dry-run). Mengembalikan laporan dict.
+    """
+    reader = _buka_reader(stream)
+
+    laporan = {
+        'dry_run': dry_run,
+        'jumlah_baris': 0,
+        'jumlah_valid': 0,
+        'jumlah_dimuat': 0,
+        'baris_tidak_valid': [],
+        'duplikat_di_file': [],
+        'duplikat_di_database': [],
+    }
+
+    # --- 1. VALIDASI DI PYTHON, TULIS BARIS VALID KE BUFFER COPY ---
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for nomor_baris, row in enumerate(reader, start=2):  # baris 1 = header
+        if not any((v or '').strip() for v in row.values() if isinstance(v, str)):
+            continue  # lewati baris kosong
+        laporan['jumlah_baris'] += 1
+        data, errors = _validasi_baris(row)
+        if errors:
+            laporan['baris_tidak_valid'].append({
+                'baris': nomor_baris,
+                'nomor_sertifikat': data['nomor_sertifikat'],
+                'errors': errors,
+            })
+            continue
+        laporan['jumlah_valid'] += 1
+        writer.writerow([nomor_baris] + [data[k] for k in KOLOM_STAGING[1:]])
+
+    if laporan['jumlah_valid'] == 0:
+        return laporan
+    buffer.seek(0)
+
+    # --- 2. COPY KE TABEL STAGING (dalam transaksi sesi yang sama) ---
+    db.session.execute(text("""
+        CREATE TEMP TABLE aset_sawah_impor (
+            baris INTEGER NOT NULL,
+            nama_sebutan VARCHAR(255) NOT NULL,
+            nomor_sertifikat VARCHAR(100) NOT NULL,
+            luas_m2 NUMERIC(10, 2) NOT NULL,
+            lon DOUBLE PRECISION NOT NULL,
+            lat DOUBLE PRECISION NOT NULL,
+            tanaman_saat_ini VARCHAR(100),
+            status_sewa VARCHAR(50) NOT NULL
+        ) ON COMMIT DROP
+    """))
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY aset_sawah_impor ({', '.join(KOLOM_STAGING)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+    # --- 3. LAPORAN DUPLIKAT SECARA MASSAL ---
+    laporan['duplikat_di_file'] = [
+        {'nomor_sertifikat': r.nomor_sertifikat, 'baris': list(r.daftar_baris)}
+        for r in db.session.execute(text("""
+            SELECT nomor_sertifikat, array_agg(baris ORDER BY baris) AS daftar_baris
+            FROM aset_sawah_impor
+            GROUP BY nomor_sertifikat
+            HAVING COUNT(*) > 1
+            ORDER BY MIN(baris)
+        """))
+    ]
+    laporan['duplikat_di_database'] = [
+        {'baris': r.baris, 'nomor_sertifikat': r.nomor_sertifikat, 'aset_id': r.aset_id}
+        for r in db.session.execute(text("""
+            SELECT s.baris, s.nomor_sertifikat, a.aset_id
+            FROM aset_sawah_impor s
+            JOIN aset_sawah a ON a.nomor_sertifikat = s.nomor_sertifikat
+            ORDER BY s.baris
+        """))
+    ]
+
+    # Baris yang bisa dimuat: tidak duplikat di file maupun di database
+    kondisi_unik = """
+        NOT EXISTS (SELECT 1 FROM aset_sawah a WHERE a.nomor_sertifikat = s.nomor_sertifikat)
+        AND NOT EXISTS (
+            SELECT 1 FROM aset_sawah_impor s2
+            WHERE s2.nomor_sertifikat = s.nomor_sertifikat AND s2.baris <> s.baris
+        )
+    """
+
+    if dry_run:
+        laporan['jumlah_dimuat'] = db.session.execute(
+            text(f"SELECT COUNT(*) FROM aset_sawah_impor s WHERE {kondisi_unik}")
+        ).scalar()
+        return laporan
+
+    # --- 4. MERGE KE aset_sawah (luas_boto & geometry dihitung di SQL) ---
+    result = db.session.execute(text(f"""
+        INSERT INTO aset_sawah (
+            nama_sebutan, nomor_sertifikat, luas_m2, luas_boto, lokasi,
+            tanaman_saat_ini, status_sewa, tanggal_dibuat
+        )
+        SELECT s.nama_sebutan,
+               s.nomor_sertifikat,
+               s.luas_m2,
+               ROUND(s.luas_m2 / 14.0, 2),
+               ST_SetSRID(ST_MakePoint(s.lon, s.lat), 4326),
+               s.tanaman_saat_ini,
+               s.status_sewa,
+               NOW()
+        FROM aset_sawah_impor s
+        WHERE {kondisi_unik}
+        ORDER BY s.baris
+        ON CONFLICT (nomor_sertifikat) DO NOTHING
+    """))
+    laporan['jumlah_dimuat'] = result.rowcount
+    return laporan
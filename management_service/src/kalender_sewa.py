@@ -0,0 +1,59 @@
+# FILE: management_service/src/kalender_sewa.py
+#
+# Kalender sewa per aset berbasis kolom transaksi_sewa.periode (daterange
+# inklusif [tanggal_mulai, tanggal_akhir], kolom generated di database) dan
+# constraint EXCLUDE transaksi_sewa_periode_tidak_tumpang_tindih, yaitu indeks
+# GiST (aset_id, periode). Lihat database/setup_tables.sql dan database/migrasi/.
+# - Cek bentrok dan "aset kosong pada rentang X" memakai operator && sehingga
+#   dijawab lewat indeks GiST, bukan memindai seluruh riwayat kontrak.
+# - Constraint tetap menjadi penjaga terakhir jika dua request menyimpan sewa
+#   untuk aset yang sama bersamaan (SQLSTATE 23P01, lihat adalah_bentrok_periode).
+# Kolom periode sengaja tidak dipetakan di model TransaksiSewa: nilainya selalu
+# dihitung database, sehingga ORM tidak perlu (dan tidak boleh) menulisnya.
+
+from sqlalchemy import and_, func, literal_column
+from sqlalchemy.dialects.postgresql import DATERANGE
+
+from models.aset_model import db, TransaksiSewa
+
+NAMA_CONSTRAINT = 'transaksi_sewa_periode_tidak_tumpang_tindih'
+SQLSTATE_EXCLUSION = '23P01'
+
+PERIODE = literal_column('transaksi_sewa.periode', type_=DATERANGE)
+
+
+def tumpang_tindih(mulai, akhir):
+    """Filter TransaksiSewa yang periodenya beririsan dengan [mulai, akhir] (inklusif)."""
+    if db.engine.dialect.name == 'postgresql':
+        return PERIODE.op('&&')(func.daterange(mulai, akhir, '[]'))
+    # Database tanpa tipe range (misal SQLite saat pengembangan): perbandingan biasa
+    return and_(TransaksiSewa.tanggal_mulai <= akhir, TransaksiSewa.tanggal_akhir >= mulai)
+
+
+def sewa_bentrok(aset_id, mulai, akhir, kecuali_sewa_id=None):
+    """Transaksi paling awal pada aset yang sama yang beririsan dengan [mulai, akhir], atau None."""
+    query = TransaksiSewa.query.filter(
+        TransaksiSewa.aset_id == aset_id,
+        tumpang_tindih(mulai, akhir),
+    )
+    if kecuali_sewa_id is not None:
+        query = query.filter(TransaksiSewa.sewa_id != kecuali_sewa_id)
+    return query.order_by(TransaksiSewa.tanggal_mulai).first()
+
+
+def filter_aset_kosong(kolom_aset_id, mulai, akhir):
+    """
+    NOT EXISTS kontrak yang beririsan dengan [mulai, akhir] untuk `kolom_aset_id`
+    (berkorelasi dengan query luar). Dijalankan planner sebagai anti-join yang
+    memakai indeks GiST (aset_id, periode) per aset.
+    """
+    return ~db.session.query(TransaksiSewa.sewa_id).filter(
+        TransaksiSewa.aset_id == kolom_aset_id,
+        tumpang_tindih(mulai, akhir),
+    ).exists()
+
+
+def adalah_bentrok_periode(error):
+    """True jika IntegrityError berasal dari constraint periode (dua sewa disimpan bersamaan)."""
+    orig = getattr(error, 'orig', None)
+    return getattr(orig, 'pgcode', None) == SQLSTATE_EXCLUSION or NAMA_CONSTRAINT in str(orig)
@@ -0,0 +1,174 @@
+# FILE: management_service/src/kedaluwarsa_sewa.py
+#
+# Status aset_sawah.status_sewa diubah menjadi 'Disewa' saat transaksi dibuat,
+# tetapi tidak pernah kembali ketika kontrak berakhir. Modul ini mengubah
+# status SEMUA aset 'Disewa' yang tidak lagi memiliki kontrak berjalan/akan
+# datang menjadi 'Expired' dengan SATU statement:
+#
+#   UPDATE aset_sawah SET status_sewa = 'Expired'
+#   WHERE status_sewa = 'Disewa'
+#     AND NOT EXISTS (SELECT 1 FROM transaksi_sewa t
+#                     WHERE t.aset_id = aset_sawah.aset_id AND t.tanggal_akhir >= :hari_ini)
+#
+# NOT EXISTS dijawab lewat indeks idx_transaksi_sewa_aset_akhir (aset_id, tanggal_akhir).
+# Dijalankan dari:
+# - CLI: flask kedaluwarsa-sewa [--tanggal YYYY-MM-DD] [--dry-run] (misal dari cron)
+# - Penjadwal dalam proses (KEDALUWARSA_PENJADWAL=1), setiap KEDALUWARSA_INTERVAL detik.
+#   Kunci advisory Postgres memastikan hanya satu worker yang menjalankan UPDATE per putaran.
+
+import logging
+import os
+import threading
+import time
+from datetime import date
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+
+from models.aset_model import db, AsetSawah, TransaksiSewa
+from src.statistik import invalidasi_statistik
+from src.tile_cache import invalidasi_titik, hapus_semua_tile
+
+STATUS_DISEWA = 'Disewa'
+STATUS_EXPIRED = 'Expired'
+
+# Kunci pg_try_advisory_xact_lock untuk job ini (bilangan tetap, unik di database)
+KUNCI_ADVISORY = 7_340_021
+# Di atas jumlah ini seluruh cache tile dikosongkan, bukan per titik
+BATAS_INVALIDASI_TILE = 200
+
+
+def _filter_kedaluwarsa(hari_ini):
+    masih_berjalan = select(TransaksiSewa.sewa_id).where(
+        TransaksiSewa.aset_id == AsetSawah.aset_id,
+        TransaksiSewa.tanggal_akhir >= hari_ini,
+    ).exists()
+    return (AsetSawah.status_sewa == STATUS_DISEWA, ~masih_berjalan)
+
+
+def hitung_kedaluwarsa(hari_ini=None):
+    """Jumlah aset yang akan berubah menjadi 'Expired' (untuk --dry-run)."""
+    hari_ini = hari_ini or date.today()
+    return db.session.execute(
+        select(func.count(AsetSawah.aset_id)).where(*_filter_kedaluwarsa(hari_ini))
+    ).scalar()
+
+
+def kedaluwarsakan_sewa(hari_ini=None):
+    """
+    Menjalankan UPDATE set-based. Mengembalikan daftar (aset_id, longitude, latitude)
+    aset yang berubah (koordinat None selain di PostGIS). Tidak melakukan commit.
+    """
+    hari_ini = hari_ini or date.today()
+    stmt = update(AsetSawah).where(
+        *_filter_kedaluwarsa(hari_ini)
+    ).values(status_sewa=STATUS_EXPIRED).execution_options(synchronize_session=False)
+
+    if db.engine.dialect.name == 'postgresql':
+        # RETURNING koordinat untuk invalidasi tile yang memuat aset tersebut
+        stmt = stmt.returning(AsetSawah.aset_id, func.ST_X(AsetSawah.lokasi), func.ST_Y(AsetSawah.lokasi))
+        return [tuple(row) for row in db.session.execute(stmt)]
+
+    hasil = db.session.execute(stmt)
+    return [(None, None, None)] * hasil.rowcount
+
+
+def jalankan_kedaluwarsa(hari_ini=None):
+    """
+    Satu putaran job: kunci advisory, UPDATE, commit, lalu invalidasi cache
+    statistik dan tile. Mengembalikan jumlah aset yang berubah, atau None jika
+    putaran ini sedang dijalankan proses lain.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        dapat_kunci = db.session.execute(select(func.pg_try_advisory_xact_lock(KUNCI_ADVISORY))).scalar()
+        if not dapat_kunci:
+            db.session.rollback()
+            return None
+
+    diubah = kedaluwarsakan_sewa(hari_ini)
+    db.session.commit()
+
+    if diubah:
+        invalidasi_statistik()
+        if len(diubah) > BATAS_INVALIDASI_TILE or any(lon is None for _id, lon, _lat in diubah):
+            hapus_semua_tile()
+        else:
+            for _aset_id, lon, lat in diubah:
+                invalidasi_titik(lon, lat)
+    return len(diubah)
+
+
+# ---------------------------------------------------------------------
+# PERINTAH CLI: flask kedaluwarsa-sewa
+# ---------------------------------------------------------------------
+
+@click.command('kedaluwarsa-sewa')
+@click.option('--tanggal', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Tanggal acuan (default: hari ini).')
+@click.option('--dry-run', is_flag=True, help='Hanya hitung aset yang akan berubah.')
+@with_appcontext
+def perintah_kedaluwarsa(tanggal, dry_run):
+    """Mengubah status aset 'Disewa' yang kontraknya sudah berakhir menjadi 'Expired'."""
+    hari_ini = tanggal.date() if tanggal else date.today()
+    if dry_run:
+        click.echo(f"[DRY-RUN] {hitung_kedaluwarsa(hari_ini)} aset akan berubah menjadi '{STATUS_EXPIRED}'.")
+        return
+
+    jumlah = jalankan_kedaluwarsa(hari_ini)
+    if jumlah is None:
+        click.echo('Job kedaluwarsa sedang dijalankan proses lain, dilewati.')
+    else:
+        click.echo(f"{jumlah} aset diubah menjadi '{STATUS_EXPIRED}'.")
+
+
+# ---------------------------------------------------------------------
+# PENJADWAL DALAM PROSES (opsional)
+# ---------------------------------------------------------------------
+
+class PenjadwalKedaluwarsa(threading.Thread):
+    """Thread daemon yang menjalankan jalankan_kedaluwarsa() setiap `interval` detik."""
+
+    def __init__(self, app, interval):
+        super().__init__(name='penjadwal-kedaluwarsa', daemon=True)
+        self.app = app
+        self.interval = interval
+
+    def run(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    jumlah = jalankan_kedaluwarsa()
+                    if jumlah:
+                        logging.info(f"PENJADWAL: {jumlah} aset diubah menjadi '{STATUS_EXPIRED}'.")
+                except Exception:
+                    # Bukan hanya SQLAlchemyError: error apa pun tidak boleh menghentikan thread penjadwal
+                    db.session.rollback()
+                    logging.exception('PENJADWAL: job kedaluwarsa sewa gagal')
+            time.sleep(self.interval)
+
+
+_penjadwal_lock = threading.Lock()
+_penjadwal_pid = None
+
+
+def pasang_penjadwal_kedaluwarsa(app):
+    """Mendaftarkan perintah CLI dan (jika KEDALUWARSA_PENJADWAL) penjadwal per proses."""
+    app.cli.add_command(perintah_kedaluwarsa)
+
+    if not app.config.get('KEDALUWARSA_PENJADWAL', False):
+        return
+
+    @app.before_request
+    def _mulai_penjadwal():
+        # Dimulai saat request pertama di setiap proses (aman setelah fork gunicorn)
+        global _penjadwal_pid
+        if _penjadwal_pid == os.getpid():
+            return
+        with _penjadwal_lock:
+            if _penjadwal_pid == os.getpid():
+                return
+            app_asli = current_app._get_current_object()
+            PenjadwalKedaluwarsa(app_asli, app_asli.config.get('KEDALUWARSA_INTERVAL', 3600)).start()
+            _penjadwal_pid = os.getpid()
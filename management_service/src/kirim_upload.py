@@ -0,0 +1,77 @@
+# FILE: management_service/src/kirim_upload.py
+#
+# Penayangan file /uploads.
+# Mode (UPLOAD_SERVE_MODE):
+#   'flask'      -> dilayani worker: ETag kuat, If-None-Match/304 dan Range (206)
+#   'x-accel'    -> Nginx membaca file sendiri lewat header X-Accel-Redirect
+#   'x-sendfile' -> Apache/Lighttpd lewat header X-Sendfile (USE_X_SENDFILE)
+# Path berbasis konten (cas/... dan turunannya) tidak pernah berubah isinya,
+# jadi dikirim dengan Cache-Control: public, max-age=1 tahun, immutable.
+# File lama (nama bebas) harus divalidasi ulang setiap kali (no-cache + ETag).
+
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import abort, current_app, send_file
+from werkzeug.security import safe_join
+
+from src.thumbnail import FOLDER_TURUNAN
+from src.upload_store import FOLDER_CAS, adalah_path_cas
+
+MAX_AGE_IMMUTABLE = 365 * 24 * 3600
+
+
+def _sha256_dari_path(filename):
+    """Hash isi dari nama file berbasis konten, atau None untuk file lama."""
+    bagian = filename.split('/')
+    if adalah_path_cas(filename):
+        jenis = ''
+    elif len(bagian) > 3 and bagian[0] == FOLDER_TURUNAN and bagian[2] == FOLDER_CAS:
+        # turunan/<jenis>/cas/ab/cd/<sha256>.jpg: ditentukan penuh oleh file asli
+        jenis = bagian[1]
+    else:
+        return None, None
+    sha256 = bagian[-1].split('.', 1)[0]
+    if len(sha256) != 64:
+        return None, None
+    return sha256, jenis
+
+
+def kirim_upload(filename):
+    """Response untuk route uploaded_file sesuai UPLOAD_SERVE_MODE."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    path = safe_join(upload_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    sha256, jenis = _sha256_dari_path(filename)
+    immutable = sha256 is not None
+    # ETag kuat: hash isi (ditambah jenis turunan agar thumbnail != file asli)
+    etag = (f'{sha256}-{jenis}' if jenis else sha256) if immutable else True
+    mode = current_app.config.get('UPLOAD_SERVE_MODE', 'flask')
+
+    if mode == 'x-accel':
+        # Proxy yang membaca file, menangani Range dan mengirim byte ke klien
+        prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/_uploads_internal/')
+        rv = current_app.response_class()
+        rv.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(filename)
+        rv.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if immutable:
+            rv.set_etag(etag)
+    else:
+        # 'flask' dan 'x-sendfile' (send_file menambahkan X-Sendfile jika USE_X_SENDFILE)
+        rv = send_file(
+            path,
+            etag=etag,
+            max_age=MAX_AGE_IMMUTABLE if immutable else 0,
+            conditional=True,
+        )
+
+    if immutable:
+        rv.cache_control.public = True
+        rv.cache_control.max_age = MAX_AGE_IMMUTABLE
+        rv.cache_control.immutable = True
+    else:
+        rv.cache_control.no_cache = True
+    return rv
@@ -0,0 +1,73 @@
+# FILE: management_service/src/kompresi.py
+#
+# Kompresi respons JSON (Content-Encoding br / gzip) sesuai Accept-Encoding klien.
+# Dipasang sebagai after_request blueprint API (lihat src/routes/api_v1_routes.py):
+#   api_bp.after_request(kompres_respons)
+# - br dipakai hanya jika modul `brotli` terpasang (opsional, pip install brotli);
+#   tanpa itu cukup gzip dari pustaka standar.
+# - Respons kecil (< KOMPRESI_MIN_BYTES) dikirim apa adanya: header + CPU
+#   kompresi lebih mahal daripada byte yang dihemat.
+# - Respons streaming/file (direct_passthrough) dan yang sudah ber-Content-Encoding dilewati.
+
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JENIS_DIKOMPRES = ('application/json', 'application/geo+json')
+
+
+def _encoding_terpilih(accept_encoding):
+    """'br', 'gzip' atau None berdasarkan Accept-Encoding (q=0 berarti ditolak)."""
+    diterima = {}
+    for bagian in accept_encoding.split(','):
+        nama, _, parameter = bagian.strip().partition(';')
+        q = 1.0
+        parameter = parameter.strip()
+        if parameter.startswith('q='):
+            try:
+                q = float(parameter[2:])
+            except ValueError:
+                q = 0.0
+        diterima[nama.strip().lower()] = q
+
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        if diterima.get(encoding, diterima.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def kompres_respons(response):
+    """after_request: mengompres body respons jika klien mendukung dan ukurannya layak."""
+    if response.mimetype not in JENIS_DIKOMPRES:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if (response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+
+    encoding = _encoding_terpilih(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < current_app.config.get('KOMPRESI_MIN_BYTES', 1024):
+        return response
+
+    if encoding == 'br':
+        # quality 5: rasio mendekati gzip -9 dengan biaya CPU jauh lebih kecil dari quality 11
+        body = brotli.compress(body, quality=current_app.config.get('KOMPRESI_LEVEL_BR', 5))
+    else:
+        body = gzip.compress(body, compresslevel=current_app.config.get('KOMPRESI_LEVEL_GZIP', 6))
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
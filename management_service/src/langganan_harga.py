@@ -0,0 +1,179 @@
+# FILE: management_service/src/langganan_harga.py
+#
+# Menerima peristiwa perubahan katalog harga dari Pricing Service
+# (pricing_service/notifikasi_harga.py) dan menambal cache PricingClient
+# tepat pada entri yang berubah, alih-alih menunggu TTL habis.
+# - LISTEN harga_berubah (Postgres, database bersama): satu thread per proses
+#   worker, dimulai saat request pertama. Cache katalog boleh dilayani hingga
+#   PRICING_CACHE_TTL_PUSH hanya setelah NOTIFY benar-benar diterima pada
+#   koneksi ini (Pricing Service bisa saja berjalan dengan HARGA_NOTIFIKASI=webhook).
+# - POST /sistem/webhook/harga (fallback): WAJIB HARGA_WEBHOOK_SECRET (tanpa
+#   itu 403). Diverifikasi HMAC-SHA256 atas "<X-Harga-Timestamp>.<body>"
+#   (header X-Harga-Signature); timestamp di luar WEBHOOK_TOLERANSI ditolak
+#   (replay). Webhook hanya sampai ke satu proses; proses lain tetap
+#   konsisten lewat TTL biasa.
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from flask import current_app, jsonify, request
+
+from src.pricing_client import get_pricing_client
+
+CHANNEL = 'harga_berubah'
+PATH_WEBHOOK = '/sistem/webhook/harga'
+HEADER_TANDA_TANGAN = 'X-Harga-Signature'
+HEADER_TIMESTAMP = 'X-Harga-Timestamp'
+WEBHOOK_TOLERANSI = 300  # detik, selisih maksimum timestamp webhook dengan jam lokal
+
+AKSI_VALID = ('insert', 'update', 'delete')
+INTERVAL_CEK = 30        # detik tanpa notifikasi sebelum koneksi LISTEN diperiksa
+JEDA_SAMBUNG_MAKS = 60   # detik, batas backoff reconnect
+
+
+def tanda_tangan(secret, timestamp, body):
+    """HMAC-SHA256 atas "<timestamp>.<body>" (hex), sama dengan pricing_service/notifikasi_harga.py."""
+    pesan = f'{timestamp}.'.encode('utf-8') + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), pesan, hashlib.sha256).hexdigest()
+
+
+def terapkan_peristiwa(client, peristiwa):
+    """Menerapkan satu peristiwa ke cache client. Mengembalikan True jika valid."""
+    if not isinstance(peristiwa, dict) or peristiwa.get('aksi') not in AKSI_VALID:
+        return False
+    harga_id = peristiwa.get('harga_id')
+    if not isinstance(harga_id, int):
+        return False
+    client.terapkan_perubahan(peristiwa['aksi'], harga_id, peristiwa.get('entri'))
+    return True
+
+
+# ---------------------------------------------------------------------
+# LISTEN/NOTIFY (Postgres)
+# ---------------------------------------------------------------------
+
+class PendengarHarga(threading.Thread):
+    """Thread daemon yang memegang satu koneksi psycopg2 khusus untuk LISTEN."""
+
+    def __init__(self, engine, client):
+        super().__init__(name='langganan-harga', daemon=True)
+        self.engine = engine
+        self.client = client
+
+    def _sambung(self):
+        # Koneksi di luar pool: LISTEN terikat ke koneksi dan tidak boleh dikembalikan ke pool
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        cparams.setdefault('application_name', 'management_service_langganan_harga')
+        conn = self.engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+    def _dengarkan(self, conn):
+        while True:
+            siap, _, _ = select.select([conn], [], [], INTERVAL_CEK)
+            if not siap:
+                # Tidak ada notifikasi: pastikan koneksi belum putus diam-diam
+                with conn.cursor() as cur:
+                    cur.execute('SELECT 1')
+                continue
+            conn.poll()
+            if conn.notifies:
+                # Pricing Service terbukti mengirim NOTIFY: cache boleh hidup hingga ttl_push
+                self.client.atur_mode_push(True)
+            while conn.notifies:
+                notif = conn.notifies.pop(0)
+                try:
+                    peristiwa = json.loads(notif.payload)
+                except ValueError:
+                    logging.warning(f"Payload {CHANNEL} tidak valid: {notif.payload!r}")
+                    continue
+                if not terapkan_peristiwa(self.client, peristiwa):
+                    logging.warning(f"Peristiwa {CHANNEL} diabaikan: {peristiwa!r}")
+
+    def run(self):
+        jeda = 1
+        while True:
+            conn = None
+            try:
+                conn = self._sambung()
+                logging.info(f"Mendengarkan channel {CHANNEL} (pid {os.getpid()}).")
+                # Peristiwa selama terputus bisa hilang: mulai dari katalog segar
+                self.client.invalidasi()
+                jeda = 1
+                self._dengarkan(conn)
+            except Exception as e:
+                logging.warning(f"Koneksi LISTEN {CHANNEL} terputus: {e}. Mencoba lagi dalam {jeda} detik.")
+            finally:
+                self.client.atur_mode_push(False)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(jeda)
+            jeda = min(jeda * 2, JEDA_SAMBUNG_MAKS)
+
+
+_pendengar_lock = threading.Lock()
+_pendengar_pid = None
+
+
+def _pastikan_pendengar(db):
+    """Memulai PendengarHarga sekali per proses (aman setelah fork gunicorn)."""
+    global _pendengar_pid
+    if _pendengar_pid == os.getpid():
+        return
+    if not current_app.config.get('HARGA_LISTEN', True) or db.engine.dialect.name != 'postgresql':
+        return
+    with _pendengar_lock:
+        if _pendengar_pid == os.getpid():
+            return
+        PendengarHarga(db.engine, get_pricing_client()).start()
+        _pendengar_pid = os.getpid()
+
+
+# ---------------------------------------------------------------------
+# WEBHOOK (fallback)
+# ---------------------------------------------------------------------
+
+def webhook_harga():
+    """Body JSON: {"peristiwa": [{"aksi": ..., "harga_id": ..., "entri": {...}|null}, ...]}"""
+    secret = current_app.config.get('HARGA_WEBHOOK_SECRET', '')
+    if not secret:
+        return jsonify({'error': 'Webhook harga nonaktif: HARGA_WEBHOOK_SECRET belum diisi.'}), 403
+
+    timestamp = request.headers.get(HEADER_TIMESTAMP, '')
+    try:
+        kedaluwarsa = abs(time.time() - int(timestamp)) > WEBHOOK_TOLERANSI
+    except ValueError:
+        kedaluwarsa = True
+    harapan = tanda_tangan(secret, timestamp, request.get_data())
+    if kedaluwarsa or not hmac.compare_digest(request.headers.get(HEADER_TANDA_TANGAN, ''), harapan):
+        return jsonify({'error': 'Tanda tangan atau timestamp webhook tidak valid.'}), 401
+
+    payload = request.get_json(silent=True) or {}
+    peristiwa = payload.get('peristiwa')
+    if not isinstance(peristiwa, list):
+        return jsonify({'error': 'Body JSON wajib berisi array "peristiwa".'}), 400
+
+    client = get_pricing_client()
+    diterapkan = sum(1 for p in peristiwa if terapkan_peristiwa(client, p))
+    return jsonify({'diterapkan': diterapkan, 'diabaikan': len(peristiwa) - diterapkan}), 200
+
+
+def pasang_langganan_harga(app, db):
+    """Mendaftarkan endpoint webhook dan pemicu thread LISTEN pada aplikasi."""
+
+    @app.before_request
+    def _mulai_langganan():
+        _pastikan_pendengar(db)
+
+    app.add_url_rule(PATH_WEBHOOK, 'webhook_harga', webhook_harga, methods=['POST'])
@@ -0,0 +1,25 @@
+# FILE: management_service/src/metrik.py
+#
+# Metrik khusus Management Service di atas metrik bersama (bersama/metrik.py):
+# latensi & error panggilan keluar ke Pricing Service (dicatat oleh pricing_client).
+
+import time
+
+from bersama.metrik import Counter, Histogram, daftarkan_metrik
+
+UPSTREAM_DURASI = Histogram('pricing_upstream_durasi_detik', 'Latensi panggilan ke Pricing Service.',
+                            ('operasi', 'status'))
+UPSTREAM_ERROR = Counter('pricing_upstream_error_total', 'Panggilan ke Pricing Service yang gagal.',
+                         ('operasi', 'jenis'))
+
+daftarkan_metrik(UPSTREAM_DURASI, UPSTREAM_ERROR)
+
+
+def catat_upstream(operasi, mulai, status=None, error=None):
+    """Dipanggil pricing_client setelah setiap panggilan HTTP (berhasil maupun gagal)."""
+    durasi = time.perf_counter() - mulai
+    UPSTREAM_DURASI.observe(durasi, operasi=operasi, status=status if status is not None else 'error')
+    if error is not None:
+        UPSTREAM_ERROR.inc(operasi=operasi, jenis=type(error).__name__)
+    elif status is not None and status >= 500:
+        UPSTREAM_ERROR.inc(operasi=operasi, jenis=f'HTTP {status}')
@@ -0,0 +1,105 @@
+# FILE: management_service/src/pagination.py
+#
+# Paginasi keyset (cursor) untuk daftar yang diurutkan berdasarkan primary key.
+# Berbeda dengan OFFSET, biaya setiap halaman tetap (satu query berindeks)
+# berapapun jumlah baris di tabel.
+
+# Pilihan ukuran halaman yang ditampilkan di UI
+PER_PAGE_PILIHAN = (25, 50, 100, 200)
+PER_PAGE_DEFAULT = 50
+PER_PAGE_MAKS = max(PER_PAGE_PILIHAN)
+
+
+class CursorTidakValid(ValueError):
+    """?sebelum= / ?sesudah= diisi tetapi bukan bilangan bulat."""
+
+
+class Halaman:
+    """Hasil satu halaman paginasi keyset beserta cursor navigasinya."""
+
+    def __init__(self, items, per_page, cursor_berikutnya=None, cursor_sebelumnya=None):
+        self.items = items
+        self.per_page = per_page
+        # Dipakai sebagai ?sebelum=<cursor> (halaman berikutnya = data lebih lama)
+        self.cursor_berikutnya = cursor_berikutnya
+        # Dipakai sebagai ?sesudah=<cursor> (halaman sebelumnya = data lebih baru)
+        self.cursor_sebelumnya = cursor_sebelumnya
+
+    @property
+    def ada_berikutnya(self):
+        return self.cursor_berikutnya is not None
+
+    @property
+    def ada_sebelumnya(self):
+        return self.cursor_sebelumnya is not None
+
+
+def ambil_per_page(args, default=PER_PAGE_DEFAULT):
+    """Membaca ?per_page= dari query string dan membatasinya ke rentang yang aman."""
+    per_page = args.get('per_page', type=int)
+    if not per_page or per_page < 1:
+        return default
+    return min(per_page, PER_PAGE_MAKS)
+
+
+def paginasi_keyset(query, kolom, sebelum=None, sesudah=None, per_page=PER_PAGE_DEFAULT, kunci=None):
+    """
+    Mengambil satu halaman dari `query` yang diurutkan menurun berdasarkan `kolom`.
+
+    - `sebelum`: ambil baris dengan kolom < cursor (halaman berikutnya).
+    - `sesudah`: ambil baris dengan kolom > cursor (halaman sebelumnya).
+    - `kunci`: fungsi untuk membaca nilai cursor dari satu baris hasil
+      (default: atribut dengan nama yang sama dengan `kolom`).
+
+    Query TIDAK boleh sudah memiliki ORDER BY. Satu baris ekstra diambil
+    untuk mengetahui apakah masih ada halaman lanjutan tanpa COUNT(*).
+    """
+    if kunci is None:
+        kunci = lambda row: getattr(row, kolom.key)
+
+    if sesudah is not None:
+        # Mundur ke data yang lebih baru: urut naik, lalu dibalik agar tetap menurun
+        rows = query.filter(kolom > sesudah).order_by(kolom.asc()).limit(per_page + 1).all()
+        masih_ada_lebih_baru = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        cursor_berikutnya = kunci(rows[-1]) if rows else None
+        cursor_sebelumnya = kunci(rows[0]) if rows and masih_ada_lebih_baru else None
+    else:
+        if sebelum is not None:
+            query = query.filter(kolom < sebelum)
+        rows = query.order_by(kolom.desc()).limit(per_page + 1).all()
+        masih_ada_lebih_lama = len(rows) > per_page
+        rows = rows[:per_page]
+        cursor_berikutnya = kunci(rows[-1]) if rows and masih_ada_lebih_lama else None
+        cursor_sebelumnya = kunci(rows[0]) if rows and sebelum is not None else None
+
+    return Halaman(rows, per_page, cursor_berikutnya, cursor_sebelumnya)
+
+
+def ambil_cursor(args, nama_param):
+    """
+    Membaca cursor dari query string (None jika tidak diisi). Cursor yang rusak
+    ditolak (CursorTidakValid), bukan diabaikan diam-diam menjadi halaman pertama.
+    """
+    nilai = args.get(nama_param)
+    if not nilai:
+        return None
+    try:
+        return int(nilai)
+    except ValueError:
+        raise CursorTidakValid(f'Parameter {nama_param} harus bilangan bulat: {nilai}.')
+
+
+def paginasi_dari_request(query, kolom, args, kunci=None):
+    """
+    Pembungkus paginasi_keyset yang membaca ?sebelum=, ?sesudah= dan ?per_page=.
+    Melempar CursorTidakValid jika cursor bukan bilangan bulat.
+    """
+    return paginasi_keyset(
+        query,
+        kolom,
+        sebelum=ambil_cursor(args, 'sebelum'),
+        sesudah=ambil_cursor(args, 'sesudah'),
+        per_page=ambil_per_page(args),
+        kunci=kunci,
+    )
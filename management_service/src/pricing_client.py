@@ -0,0 +1,221 @@
+# FILE: management_service/src/pricing_client.py
+#
+# Klien bersama untuk Pricing Service (Port 5003).
+# - Satu requests.Session per proses (koneksi keep-alive + connection pool)
+# - Cache TTL di memori untuk katalog harga (/api/v1/harga/list_all)
+# - Stale-while-revalidate: data lama tetap dilayani saat refresh berjalan
+#   di thread latar belakang, sehingga render form biasanya tanpa round-trip.
+# - Latensi dan error setiap panggilan HTTP dicatat ke /metrics (src/metrik.py)
+# - Perubahan harga yang di-push Pricing Service (src/langganan_harga.py) langsung
+#   ditambal ke cache; TTL diperpanjang ke ttl_push hanya setelah NOTIFY diterima.
+
+import threading
+import time
+import logging
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from src.metrik import catat_upstream
+
+DEFAULT_PRICING_SERVICE_URL = 'http://127.0.0.1:5003'
+
+# Batas waktu (detik) koneksi dan baca ke Pricing Service
+TIMEOUT = (3.05, 10)
+
+
+class PricingClient:
+    """Klien Pricing Service dengan connection pool dan cache katalog harga."""
+
+    def __init__(self, base_url, ttl=60, stale_ttl=600, pool_maxsize=10, ttl_push=3600):
+        self.base_url = base_url.rstrip('/')
+        # Setelah `ttl` detik data dianggap basi dan di-refresh di latar belakang.
+        self.ttl = ttl
+        # Setelah `stale_ttl` detik data tidak boleh dilayani lagi (refresh sinkron).
+        self.stale_ttl = max(stale_ttl, ttl)
+        # TTL selama notifikasi perubahan harga diterima (lihat atur_mode_push)
+        self._ttl_dasar = ttl
+        self._stale_ttl_dasar = self.stale_ttl
+        self.ttl_push = max(ttl_push, ttl)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._katalog = None
+        self._etag = None
+        self._diambil_pada = 0.0
+        self._sedang_refresh = False
+        # Naik setiap kali cache ditambal/diinvalidasi; hasil fetch yang dimulai
+        # sebelum perubahan tidak boleh menimpa cache yang sudah lebih baru.
+        self._versi = 0
+
+    # -----------------------------------------------------------------
+    # Akses HTTP mentah
+    # -----------------------------------------------------------------
+
+    def _panggil(self, operasi, method, path, **kwargs):
+        """Satu panggilan HTTP ke Pricing Service, dengan pencatatan latensi/error."""
+        mulai = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', timeout=TIMEOUT, **kwargs)
+        except requests.exceptions.RequestException as e:
+            catat_upstream(operasi, mulai, error=e)
+            raise
+        catat_upstream(operasi, mulai, status=response.status_code)
+        return response
+
+    def _ambil_katalog_dari_api(self):
+        # Revalidasi dengan ETag: jika katalog tidak berubah, Pricing Service
+        # membalas 304 tanpa payload dan cache lama cukup diperpanjang.
+        headers = {}
+        with self._lock:
+            versi_awal = self._versi
+            if self._katalog is not None and self._etag:
+                headers['If-None-Match'] = self._etag
+
+        response = self._panggil('list_all', 'GET', '/api/v1/harga/list_all', headers=headers)
+        if response.status_code == 304:
+            with self._lock:
+                if self._versi == versi_awal and self._katalog is not None:
+                    self._diambil_pada = time.monotonic()
+                    return self._katalog
+            # Cache berubah/dibuang selama revalidasi: ambil ulang tanpa ETag
+            with self._lock:
+                self._etag = None
+            return self._ambil_katalog_dari_api()
+
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, list):
+            raise ValueError('Format katalog harga tidak valid.')
+        with self._lock:
+            if self._versi == versi_awal:
+                self._katalog = data
+                self._etag = response.headers.get('ETag')
+                self._diambil_pada = time.monotonic()
+        return data
+
+    def _refresh_latar_belakang(self):
+        try:
+            self._ambil_katalog_dari_api()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # Data lama tetap dipakai sampai stale_ttl habis
+            logging.warning(f"Refresh katalog harga gagal, memakai cache lama: {e}")
+        finally:
+            with self._lock:
+                self._sedang_refresh = False
+
+    # -----------------------------------------------------------------
+    # API publik
+    # -----------------------------------------------------------------
+
+    def daftar_harga(self):
+        """
+        Mengembalikan katalog harga (list of dict: id, label, harga_per_boto).
+
+        Raise requests.exceptions.RequestException / ValueError hanya jika
+        tidak ada data cache yang masih boleh dilayani.
+        """
+        with self._lock:
+            katalog = self._katalog
+            umur = time.monotonic() - self._diambil_pada
+            perlu_refresh = katalog is not None and self.ttl <= umur < self.stale_ttl and not self._sedang_refresh
+            if perlu_refresh:
+                self._sedang_refresh = True
+
+        if katalog is not None and umur < self.ttl:
+            return katalog
+
+        if perlu_refresh:
+            threading.Thread(target=self._refresh_latar_belakang, daemon=True).start()
+            return katalog
+
+        if katalog is not None and umur < self.stale_ttl:
+            # Refresh lain sedang berjalan: layani data lama
+            return katalog
+
+        # Belum ada cache atau cache terlalu lama: ambil secara sinkron
+        return self._ambil_katalog_dari_api()
+
+    def cari_harga(self, harga_id):
+        """Mencari satu entri katalog berdasarkan ID (None jika tidak ada)."""
+        return next((h for h in self.daftar_harga() if h['id'] == harga_id), None)
+
+    def kutip_nilai_sewa(self, items):
+        """
+        Meminta kutipan nilai sewa untuk banyak baris sekaligus (POST /api/v1/harga/quote).
+        `items`: list of dict berisi harga_id atau date, luas_boto, durasi_bulan.
+        Mengembalikan list hasil dengan urutan yang sama (baris gagal berisi 'error').
+        """
+        rows = [
+            {**item, 'luas_boto': str(item['luas_boto'])} if item.get('luas_boto') is not None else item
+            for item in items
+        ]
+        response = self._panggil('quote', 'POST', '/api/v1/harga/quote', json={'items': rows})
+        response.raise_for_status()
+        return response.json()['hasil']
+
+    def invalidasi(self):
+        """Membuang cache katalog sehingga pemanggilan berikutnya mengambil ulang."""
+        with self._lock:
+            self._versi += 1
+            self._katalog = None
+            self._etag = None
+            self._diambil_pada = 0.0
+
+    def terapkan_perubahan(self, aksi, harga_id, entri=None):
+        """
+        Menambal cache katalog dengan satu perubahan harga ('insert'/'update'/'delete')
+        tanpa mengambil ulang seluruh katalog. `entri` berformat sama dengan elemen list_all.
+        """
+        with self._lock:
+            self._versi += 1
+            if self._katalog is None:
+                return
+            if aksi != 'delete' and entri is None:
+                # Isi entri tidak diketahui: buang cache, ambil ulang saat dibutuhkan
+                self._katalog = None
+                self._etag = None
+                return
+            katalog = [h for h in self._katalog if h['id'] != harga_id]
+            if aksi != 'delete':
+                katalog.append(entri)
+                # Urutan sama dengan Pricing Service: mulai efektif terbaru lebih dulu
+                katalog.sort(key=lambda h: (h.get('tanggal_mulai_efektif') or '', h['id']), reverse=True)
+            self._katalog = katalog
+            # ETag lama tidak lagi mewakili isi cache
+            self._etag = None
+
+    def atur_mode_push(self, aktif):
+        """Selama notifikasi perubahan harga diterima, cache boleh dilayani hingga ttl_push."""
+        with self._lock:
+            self.ttl = self.ttl_push if aktif else self._ttl_dasar
+            self.stale_ttl = max(self._stale_ttl_dasar, self.ttl)
+
+
+# Satu klien per base URL per proses
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_pricing_client():
+    """Mengembalikan PricingClient bersama sesuai konfigurasi aplikasi aktif."""
+    config = current_app.config
+    base_url = config.get('PRICING_SERVICE_URL', DEFAULT_PRICING_SERVICE_URL)
+
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = PricingClient(
+                base_url,
+                ttl=config.get('PRICING_CACHE_TTL', 60),
+                stale_ttl=config.get('PRICING_CACHE_STALE_TTL', 600),
+                pool_maxsize=config.get('PRICING_POOL_MAXSIZE', 10),
+                ttl_push=config.get('PRICING_CACHE_TTL_PUSH', 3600),
+            )
+            _clients[base_url] = client
+    return client
@@ -0,0 +1,129 @@
+# FILE: management_service/src/routes/analitik_routes.py
+#
+# Halaman dan API analitik pendapatan sewa. Semua angka dibaca dari
+# materialized view rollup (src/analitik.py), bukan dari transaksi_sewa.
+
+from datetime import date
+
+import click
+import requests
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.aset_model import db
+from src.analitik import (
+    DIMENSI, LIMIT_ASET_DEFAULT, FilterAnalitikTidakValid,
+    ringkasan_pendapatan, info_refresh, refresh_analitik, jadwalkan_refresh_analitik,
+)
+from src.pricing_client import get_pricing_client
+
+analitik_bp = Blueprint('analitik', __name__, url_prefix='/analitik')
+
+
+def _parse_bulan(nama_param):
+    """?dari=YYYY-MM -> date tanggal 1 bulan tersebut (ValueError jika format salah)."""
+    nilai = request.args.get(nama_param)
+    if not nilai:
+        return None
+    return date.fromisoformat(f'{nilai}-01')
+
+
+# ---------------------------------------------------------------------
+# 1. API: PENDAPATAN PER DIMENSI
+# ---------------------------------------------------------------------
+
+@analitik_bp.route('/api/pendapatan')
+def api_pendapatan():
+    """
+    ?per=bulan|tahun|harga|status|aset [&dari=YYYY-MM&sampai=YYYY-MM]
+    [&status_pembayaran=Lunas|Belum Bayar] [&harga_sewa_id=<id>] [&limit=<n> untuk per=aset]
+    """
+    try:
+        dari = _parse_bulan('dari')
+        sampai = _parse_bulan('sampai')
+    except ValueError:
+        return jsonify({'error': 'Parameter dari/sampai wajib dalam format YYYY-MM.'}), 400
+
+    per = request.args.get('per', 'bulan')
+    try:
+        data = ringkasan_pendapatan(
+            per,
+            dari=dari,
+            sampai=sampai,
+            status=request.args.get('status_pembayaran') or None,
+            harga_sewa_id=request.args.get('harga_sewa_id', type=int),
+            limit=request.args.get('limit', default=LIMIT_ASET_DEFAULT, type=int),
+        )
+        info = info_refresh()
+    except FilterAnalitikTidakValid as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': 'Gagal mengambil data analitik.', 'details': str(e)}), 500
+
+    return jsonify({'per': per, 'data': data, **info}), 200
+
+
+# ---------------------------------------------------------------------
+# 2. HALAMAN ANALITIK (WEB UI)
+# ---------------------------------------------------------------------
+
+@analitik_bp.route('/')
+def halaman_analitik():
+    """Ringkasan pendapatan per tahun, 24 bulan terakhir, status bayar, harga dan aset teratas."""
+    laporan = {}
+    info = None
+    try:
+        for per in DIMENSI:
+            laporan[per] = ringkasan_pendapatan(per)
+        laporan['bulan'] = laporan['bulan'][-24:]
+        info = info_refresh()
+    except SQLAlchemyError as e:
+        flash(f'Gagal mengambil data analitik: {e}', 'danger')
+
+    # Label harga dari katalog Pricing Service (cache bersama); cukup ID jika tidak tersedia
+    label_harga = {}
+    try:
+        label_harga = {h['id']: h['label'] for h in get_pricing_client().daftar_harga()}
+    except (requests.exceptions.RequestException, KeyError, ValueError):
+        pass
+
+    return render_template('analitik_pendapatan.html',
+                           laporan=laporan,
+                           info=info,
+                           label_harga=label_harga,
+                           title='Analitik Pendapatan')
+
+
+@analitik_bp.route('/refresh', methods=['POST'])
+def refresh_sekarang():
+    """Menjadwalkan refresh view analitik segera (dijalankan worker antrian)."""
+    try:
+        job = jadwalkan_refresh_analitik(tunda_detik=0)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        flash(f'Gagal menjadwalkan refresh analitik: {e}', 'danger')
+        return redirect(url_for('analitik.halaman_analitik'))
+
+    if job is None:
+        flash('Analitik dihitung langsung dari transaksi (tanpa materialized view).', 'info')
+    else:
+        flash(f"Refresh analitik dijadwalkan sebagai job #{job.id}. Status: {url_for('status_job', job_id=job.id)}", 'info')
+    return redirect(url_for('analitik.halaman_analitik'))
+
+
+# ---------------------------------------------------------------------
+# 3. PERINTAH CLI: flask --app main analitik refresh
+# ---------------------------------------------------------------------
+
+@analitik_bp.cli.command('refresh')
+@click.option('--penuh', is_flag=True, help='REFRESH tanpa CONCURRENTLY (lebih cepat, tetapi memblokir pembaca).')
+def refresh_cli(penuh):
+    """Me-refresh materialized view analitik pendapatan sekarang juga."""
+    hasil = refresh_analitik(concurrently=not penuh)
+    db.session.commit()
+    if hasil.get('dilewati'):
+        click.echo('Database tanpa materialized view: tidak ada yang di-refresh.')
+        return
+    for mv, durasi in hasil['durasi_ms'].items():
+        click.echo(f'{mv}: {durasi} ms')
@@ -0,0 +1,236 @@
+# FILE: management_service/src/routes/api_v1_routes.py
+#
+# REST API JSON (read-only) untuk integrasi: aplikasi mobile, Pricing Service, skrip.
+#   GET /api/v1/aset       GET /api/v1/penyewa       GET /api/v1/transaksi
+#
+# Parameter bersama:
+# - ?fields=a,b,c        : hanya kolom ini yang di-SELECT (primary key selalu ikut)
+# - ?per_page=&sebelum=&sesudah= : paginasi keyset menurun berdasarkan primary key
+#                          (src/pagination.py, sama seperti daftar transaksi di UI)
+# - filter               : HANYA kolom berindeks, agar setiap halaman tetap satu
+#                          penelusuran indeks; nilai dipisah koma menjadi IN (...)
+# Respons dikompres br/gzip sesuai Accept-Encoding (src/kompresi.py).
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Blueprint, jsonify, request, url_for
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.aset_model import db, AsetSawah, Penyewa, TransaksiSewa
+from src.kalender_sewa import tumpang_tindih
+from src.kompresi import kompres_respons
+from src.pagination import paginasi_dari_request, CursorTidakValid
+
+api_v1_bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+api_v1_bp.after_request(kompres_respons)
+
+# Batas jumlah nilai dalam satu filter IN (...)
+FILTER_NILAI_MAKS = 100
+# Parameter query yang bukan filter
+PARAMETER_UMUM = {'fields', 'per_page', 'sebelum', 'sesudah'}
+
+
+class ParameterApiTidakValid(ValueError):
+    """Parameter query API tidak dikenal atau formatnya salah (HTTP 400)."""
+
+
+# ---------------------------------------------------------------------
+# DEFINISI RESOURCE: kolom yang boleh dipilih dan filter berindeks
+# ---------------------------------------------------------------------
+
+# Kolom pertama adalah primary key (cursor paginasi)
+KOLOM_ASET = {
+    'aset_id': AsetSawah.aset_id,
+    'nama_sebutan': AsetSawah.nama_sebutan,
+    'nomor_sertifikat': AsetSawah.nomor_sertifikat,
+    'luas_m2': AsetSawah.luas_m2,
+    'luas_boto': AsetSawah.luas_boto,
+    'tanaman_saat_ini': AsetSawah.tanaman_saat_ini,
+    'status_sewa': AsetSawah.status_sewa,
+    'tanggal_dibuat': AsetSawah.tanggal_dibuat,
+    'longitude': func.ST_X(AsetSawah.lokasi),
+    'latitude': func.ST_Y(AsetSawah.lokasi),
+}
+# nama parameter -> (kolom, konversi nilai). Indeks: PK, UNIQUE nomor_sertifikat
+FILTER_ASET = {
+    'aset_id': (AsetSawah.aset_id, int),
+    'nomor_sertifikat': (AsetSawah.nomor_sertifikat, str),
+}
+
+KOLOM_PENYEWA = {
+    'penyewa_id': Penyewa.penyewa_id,
+    'nama_lengkap': Penyewa.nama_lengkap,
+    'nik': Penyewa.nik,
+    'alamat': Penyewa.alamat,
+    'nomor_kontak': Penyewa.nomor_kontak,
+    'link_ktp': Penyewa.link_ktp,
+}
+# Indeks: PK, UNIQUE nik
+FILTER_PENYEWA = {
+    'penyewa_id': (Penyewa.penyewa_id, int),
+    'nik': (Penyewa.nik, str),
+}
+
+KOLOM_TRANSAKSI = {
+    'sewa_id': TransaksiSewa.sewa_id,
+    'aset_id': TransaksiSewa.aset_id,
+    'penyewa_id': TransaksiSewa.penyewa_id,
+    'harga_sewa_id': TransaksiSewa.harga_sewa_id,
+    'tanggal_mulai': TransaksiSewa.tanggal_mulai,
+    'tanggal_akhir': TransaksiSewa.tanggal_akhir,
+    'durasi_bulan': TransaksiSewa.durasi_bulan,
+    'nilai_sewa': TransaksiSewa.nilai_sewa,
+    'status_pembayaran': TransaksiSewa.status_pembayaran,
+    'jenis_tanaman_disepakati': TransaksiSewa.jenis_tanaman_disepakati,
+    'link_bukti_bayar': TransaksiSewa.link_bukti_bayar,
+    'tanggal_transaksi': TransaksiSewa.tanggal_transaksi,
+}
+# Indeks: PK, (aset_id, tanggal_akhir), (penyewa_id, sewa_id); periode lewat GiST (aset_id, periode)
+FILTER_TRANSAKSI = {
+    'sewa_id': (TransaksiSewa.sewa_id, int),
+    'aset_id': (TransaksiSewa.aset_id, int),
+    'penyewa_id': (TransaksiSewa.penyewa_id, int),
+}
+
+
+# ---------------------------------------------------------------------
+# HELPER BERSAMA
+# ---------------------------------------------------------------------
+
+def _nilai_json(nilai):
+    """Decimal -> string (presisi uang/luas tetap utuh), tanggal -> ISO 8601."""
+    if isinstance(nilai, Decimal):
+        return str(nilai)
+    if isinstance(nilai, (date, datetime)):
+        return nilai.isoformat()
+    return nilai
+
+
+def _pilih_kolom(kolom_tersedia):
+    """Nama kolom dari ?fields= (urutan sesuai permintaan, primary key selalu pertama)."""
+    nama_pk = next(iter(kolom_tersedia))
+    fields = request.args.get('fields')
+    if not fields:
+        return list(kolom_tersedia)
+
+    diminta = [f.strip() for f in fields.split(',') if f.strip()]
+    tidak_dikenal = [f for f in diminta if f not in kolom_tersedia]
+    if tidak_dikenal:
+        raise ParameterApiTidakValid(
+            f"Field tidak dikenal: {', '.join(tidak_dikenal)}. Pilihan: {', '.join(kolom_tersedia)}."
+        )
+    return [nama_pk] + [f for f in dict.fromkeys(diminta) if f != nama_pk]
+
+
+def _kondisi_filter(filter_tersedia, parameter_khusus=()):
+    """Kondisi WHERE dari parameter filter; parameter lain yang tidak dikenal ditolak."""
+    tidak_dikenal = set(request.args) - PARAMETER_UMUM - set(filter_tersedia) - set(parameter_khusus)
+    if tidak_dikenal:
+        raise ParameterApiTidakValid(
+            f"Parameter tidak dikenal: {', '.join(sorted(tidak_dikenal))}. "
+            f"Filter yang tersedia (kolom berindeks): {', '.join(list(filter_tersedia) + list(parameter_khusus))}."
+        )
+
+    kondisi = []
+    for nama, (kolom, konversi) in filter_tersedia.items():
+        mentah = request.args.get(nama)
+        if mentah is None:
+            continue
+        try:
+            nilai = [konversi(v.strip()) for v in mentah.split(',') if v.strip()]
+        except ValueError:
+            raise ParameterApiTidakValid(f'Nilai filter {nama} tidak valid: {mentah}.')
+        if not nilai or len(nilai) > FILTER_NILAI_MAKS:
+            raise ParameterApiTidakValid(f'Filter {nama} wajib berisi 1 sampai {FILTER_NILAI_MAKS} nilai.')
+        kondisi.append(kolom == nilai[0] if len(nilai) == 1 else kolom.in_(nilai))
+    return kondisi
+
+
+def _tautan(cursor, nama_param):
+    """URL halaman lain dengan parameter yang sama, hanya cursor yang berganti."""
+    if cursor is None:
+        return None
+    args = {k: v for k, v in request.args.items() if k not in ('sebelum', 'sesudah')}
+    args[nama_param] = cursor
+    return url_for(request.endpoint, **args)
+
+
+def _daftar(kolom_tersedia, filter_tersedia, kondisi_khusus=(), parameter_khusus=()):
+    """Satu halaman resource sebagai respons JSON (atau error 400/500)."""
+    try:
+        nama_kolom = _pilih_kolom(kolom_tersedia)
+        kondisi = _kondisi_filter(filter_tersedia, parameter_khusus) + list(kondisi_khusus)
+    except ParameterApiTidakValid as e:
+        return jsonify({'error': str(e)}), 400
+
+    pk = kolom_tersedia[nama_kolom[0]]
+    query = db.session.query(*[kolom_tersedia[n].label(n) for n in nama_kolom]).filter(*kondisi)
+    try:
+        halaman = paginasi_dari_request(query, pk, request.args, kunci=lambda row: row[0])
+    except CursorTidakValid as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': 'Gagal mengambil data.', 'details': str(e)}), 500
+
+    return jsonify({
+        'data': [{n: _nilai_json(v) for n, v in zip(nama_kolom, row)} for row in halaman.items],
+        'per_page': halaman.per_page,
+        'cursor_berikutnya': halaman.cursor_berikutnya,
+        'cursor_sebelumnya': halaman.cursor_sebelumnya,
+        'tautan': {
+            'berikutnya': _tautan(halaman.cursor_berikutnya, 'sebelum'),
+            'sebelumnya': _tautan(halaman.cursor_sebelumnya, 'sesudah'),
+        },
+    }), 200
+
+
+# ---------------------------------------------------------------------
+# ENDPOINT
+# ---------------------------------------------------------------------
+
+@api_v1_bp.route('/aset')
+def daftar_aset():
+    """
+    ?fields=&per_page=&sebelum=&sesudah= [&aset_id=1,2&nomor_sertifikat=...]
+    [&bbox=minx,miny,maxx,maxy] (operator && terhadap indeks GIST lokasi)
+    """
+    kondisi = []
+    bbox = request.args.get('bbox')
+    if bbox:
+        try:
+            minx, miny, maxx, maxy = (float(v) for v in bbox.split(','))
+        except ValueError:
+            return jsonify({'error': 'Parameter bbox wajib berformat minx,miny,maxx,maxy.'}), 400
+        if not (-180 <= minx <= maxx <= 180 and -90 <= miny <= maxy <= 90):
+            return jsonify({'error': 'Parameter bbox wajib berisi kotak koordinat yang valid.'}), 400
+        kondisi.append(AsetSawah.lokasi.op('&&')(func.ST_MakeEnvelope(minx, miny, maxx, maxy, 4326)))
+    return _daftar(KOLOM_ASET, FILTER_ASET, kondisi, parameter_khusus=('bbox',))
+
+
+@api_v1_bp.route('/penyewa')
+def daftar_penyewa():
+    """?fields=&per_page=&sebelum=&sesudah= [&penyewa_id=1,2&nik=...]"""
+    return _daftar(KOLOM_PENYEWA, FILTER_PENYEWA)
+
+
+@api_v1_bp.route('/transaksi')
+def daftar_transaksi():
+    """
+    ?fields=&per_page=&sebelum=&sesudah= [&sewa_id=&aset_id=&penyewa_id=]
+    [&periode_dari=YYYY-MM-DD&periode_sampai=YYYY-MM-DD] (kontrak yang beririsan, indeks GiST periode)
+    """
+    kondisi = []
+    periode_dari = request.args.get('periode_dari')
+    periode_sampai = request.args.get('periode_sampai')
+    if periode_dari or periode_sampai:
+        try:
+            mulai = date.fromisoformat(periode_dari or '')
+            akhir = date.fromisoformat(periode_sampai or '')
+        except ValueError:
+            return jsonify({'error': 'Parameter periode_dari dan periode_sampai wajib diisi bersama dalam format YYYY-MM-DD.'}), 400
+        if akhir < mulai:
+            return jsonify({'error': 'Parameter periode_sampai tidak boleh sebelum periode_dari.'}), 400
+        kondisi.append(tumpang_tindih(mulai, akhir))
+    return _daftar(KOLOM_TRANSAKSI, FILTER_TRANSAKSI, kondisi, parameter_khusus=('periode_dari', 'periode_sampai'))
@@ -1,11 +1,23 @@
 #import GeoAlchemy2
-from flask import Blueprint, render_template, redirect, url_for, flash
-from sqlalchemy import func # Pastikan ini diimpor
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, make_response, abort, current_app
+from sqlalchemy import func, text # Pastikan ini diimpor
 from decimal import Decimal # Pastikan ini diimpor
 #from geoalchemy2 import Geometry
 from models.aset_model import db, AsetSawah
-from src.forms import AsetForm
+from src.forms import AsetForm, ImporAsetForm
 from sqlalchemy.exc import SQLAlchemyError
+from src.statistik import invalidasi_statistik
+from src.tile_cache import ZOOM_MAKS, baca_tile, simpan_tile, invalidasi_titik, hapus_semua_tile
+from src.impor_aset import impor_aset_csv, FormatCSVTidakValid
+from src.upload_store import simpan_upload
+from src.antrian import tugas, antrikan, JobGagalPermanen
+from src.kalender_sewa import filter_aset_kosong
+from src.analitik import jadwalkan_refresh_analitik
+from datetime import date
+import io
+import logging
+import os
+import click
 
 aset_bp = Blueprint('aset', __name__, url_prefix='/aset')
 
@@ -22,6 +34,14 @@ def list_aset():
     # Di template, ini akan diakses sebagai a[0] (objek AsetSawah), a.longitude, a.latitude.
     return render_template('list_aset.html', data=data)
 
+
+def _koordinat_aset(aset_id):
+    """(longitude, latitude) aset saat ini di database, untuk invalidasi tile lama."""
+    row = db.session.query(
+        func.ST_X(AsetSawah.lokasi), func.ST_Y(AsetSawah.lokasi)
+    ).filter(AsetSawah.aset_id == aset_id).first()
+    return row if row else (None, None)
+
 # FILE: aset_routes.py (Fungsi tambah_aset)
 
 @aset_bp.route('/tambah', methods=['GET', 'POST'])
@@ -66,6 +86,8 @@ def tambah_aset():
         try:
             db.session.add(aset)
             db.session.commit()
+            invalidasi_statistik()
+            invalidasi_titik(lon, lat)
             flash('Aset berhasil ditambahkan', 'success')
             return redirect(url_for('aset.list_aset'))
         
@@ -103,6 +125,8 @@ def edit_aset(aset_id):
     if form.validate_on_submit():
         
         luas_m2_data = form.luas_m2.data
+        # Koordinat lama dibutuhkan untuk menghapus tile peta yang usang
+        lon_lama, lat_lama = _koordinat_aset(aset_id)
         
         # 🚨 BLOK TRY-EXCEPT UNTUK MENANGKAP ERROR KONVERSI DATA 🚨
         try:
@@ -134,13 +158,16 @@ def edit_aset(aset_id):
             
             # 4. COMMIT
             db.session.commit()
+            invalidasi_statistik()
+            # Tile lokasi lama dan baru sama-sama berubah (posisi/atribut)
+            invalidasi_titik(lon_lama, lat_lama)
+            invalidasi_titik(lon, lat)
             flash('Aset berhasil diperbarui', 'info')
             return redirect(url_for('aset.list_aset'))
         
         except SQLAlchemyError as e:
             db.session.rollback()
             # 🚨 LOGGING DITINGKATKAN UNTUK MENDAPATKAN ERROR DB SPESIFIK 🚨
-            import logging
             logging.basicConfig(level=logging.ERROR) # Pastikan logging diaktifkan
             logging.error(f"SQLAlchemy UPDATE ASET GAGAL: {e}")
             if 'duplicate key value violates unique constraint' in str(e):
@@ -162,9 +189,326 @@ def edit_aset(aset_id):
 @aset_bp.route('/delete/<int:aset_id>', methods=['POST'])
 def delete_aset(aset_id):
     aset = AsetSawah.query.get_or_404(aset_id)
+    lon, lat = _koordinat_aset(aset_id)
     db.session.delete(aset)
+    # Transaksi aset ikut terhapus (CASCADE): rollup pendapatan perlu di-refresh
+    jadwalkan_refresh_analitik()
     db.session.commit()
+    invalidasi_statistik()
+    invalidasi_titik(lon, lat)
     flash('Aset berhasil dihapus', 'warning')
     return redirect(url_for('aset.list_aset'))
 
 
+# ---------------------------------------------------------------------
+# API PENCARIAN SPASIAL (Memakai indeks GIST idx_aset_sawah_lokasi)
+# ---------------------------------------------------------------------
+
+# Batas jumlah hasil agar klien peta tidak bisa meminta seluruh tabel
+NEAR_K_DEFAULT = 10
+NEAR_K_MAKS = 100
+BBOX_LIMIT_DEFAULT = 500
+BBOX_LIMIT_MAKS = 5000
+AVAILABLE_LIMIT_DEFAULT = 500
+AVAILABLE_LIMIT_MAKS = 5000
+
+
+def _titik(lon, lat):
+    """Geometry POINT(lon lat) dengan SRID 4326, sama dengan kolom aset_sawah.lokasi."""
+    return func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+
+
+def _kolom_ringkas_aset():
+    """Kolom ringan untuk respons JSON (tanpa memuat objek ORM utuh)."""
+    return (
+        AsetSawah.aset_id,
+        AsetSawah.nama_sebutan,
+        AsetSawah.status_sewa,
+        AsetSawah.luas_m2,
+        func.ST_X(AsetSawah.lokasi).label('longitude'),
+        func.ST_Y(AsetSawah.lokasi).label('latitude'),
+    )
+
+
+def _aset_ke_dict(row):
+    data = {
+        'aset_id': row.aset_id,
+        'nama_sebutan': row.nama_sebutan,
+        'status_sewa': row.status_sewa,
+        'luas_m2': str(row.luas_m2) if row.luas_m2 is not None else None,
+        'longitude': row.longitude,
+        'latitude': row.latitude,
+    }
+    if 'jarak_m' in row._fields:
+        data['jarak_m'] = round(row.jarak_m, 1) if row.jarak_m is not None else None
+    return data
+
+
+def _koordinat_valid(lon, lat):
+    return lon is not None and lat is not None and -180 <= lon <= 180 and -90 <= lat <= 90
+
+
+@aset_bp.route('/api/near')
+def api_near():
+    """
+    K aset terdekat dari titik (?lon=&lat=&k=), diurutkan dengan operator KNN <->
+    sehingga PostgreSQL memakai indeks GIST alih-alih memindai semua baris.
+    """
+    lon = request.args.get('lon', type=float)
+    lat = request.args.get('lat', type=float)
+    k = request.args.get('k', default=NEAR_K_DEFAULT, type=int)
+
+    if not _koordinat_valid(lon, lat):
+        return jsonify({'error': 'Parameter lon dan lat wajib diisi dengan koordinat yang valid.'}), 400
+    k = max(1, min(k, NEAR_K_MAKS))
+
+    titik = _titik(lon, lat)
+    try:
+        rows = db.session.query(
+            *_kolom_ringkas_aset(),
+            func.ST_DistanceSphere(AsetSawah.lokasi, titik).label('jarak_m')
+        ).filter(
+            AsetSawah.lokasi.isnot(None)
+        ).order_by(
+            AsetSawah.lokasi.op('<->')(titik)
+        ).limit(k).all()
+    except SQLAlchemyError as e:
+        return jsonify({'error': 'Gagal melakukan pencarian lokasi.', 'details': str(e)}), 500
+
+    return jsonify({'data': [_aset_ke_dict(r) for r in rows]}), 200
+
+
+@aset_bp.route('/api/bbox')
+def api_bbox():
+    """
+    Aset di dalam kotak pandang peta (?minx=&miny=&maxx=&maxy=[&limit=]).
+    Memakai operator && terhadap ST_MakeEnvelope (index-backed).
+    """
+    minx = request.args.get('minx', type=float)
+    miny = request.args.get('miny', type=float)
+    maxx = request.args.get('maxx', type=float)
+    maxy = request.args.get('maxy', type=float)
+    limit = request.args.get('limit', default=BBOX_LIMIT_DEFAULT, type=int)
+
+    if not (_koordinat_valid(minx, miny) and _koordinat_valid(maxx, maxy)) or minx > maxx or miny > maxy:
+        return jsonify({'error': 'Parameter minx, miny, maxx, maxy wajib diisi dengan kotak koordinat yang valid.'}), 400
+    limit = max(1, min(limit, BBOX_LIMIT_MAKS))
+
+    kotak = func.ST_MakeEnvelope(minx, miny, maxx, maxy, 4326)
+    try:
+        # Ambil satu baris ekstra untuk mengetahui apakah hasil terpotong
+        rows = db.session.query(
+            *_kolom_ringkas_aset()
+        ).filter(
+            AsetSawah.lokasi.op('&&')(kotak)
+        ).order_by(
+            AsetSawah.aset_id
+        ).limit(limit + 1).all()
+    except SQLAlchemyError as e:
+        return jsonify({'error': 'Gagal melakukan pencarian lokasi.', 'details': str(e)}), 500
+
+    return jsonify({
+        'data': [_aset_ke_dict(r) for r in rows[:limit]],
+        'terpotong': len(rows) > limit,
+    }), 200
+
+
+@aset_bp.route('/api/available')
+def api_available():
+    """
+    Aset yang tidak memiliki kontrak sewa beririsan dengan rentang
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (inklusif) [&limit=&setelah=aset_id].
+    Setiap aset diperiksa lewat indeks GiST (aset_id, periode) milik constraint
+    EXCLUDE transaksi_sewa, sehingga tidak bergantung pada panjang riwayat kontrak.
+    """
+    try:
+        mulai = date.fromisoformat(request.args.get('from', ''))
+        akhir = date.fromisoformat(request.args.get('to', ''))
+    except ValueError:
+        return jsonify({'error': 'Parameter from dan to wajib dalam format YYYY-MM-DD.'}), 400
+    if akhir < mulai:
+        return jsonify({'error': 'Parameter to tidak boleh sebelum from.'}), 400
+
+    limit = request.args.get('limit', default=AVAILABLE_LIMIT_DEFAULT, type=int)
+    limit = max(1, min(limit, AVAILABLE_LIMIT_MAKS))
+    # Keyset: lanjutkan setelah aset_id terakhir halaman sebelumnya
+    setelah = request.args.get('setelah', default=0, type=int)
+
+    try:
+        rows = db.session.query(
+            *_kolom_ringkas_aset()
+        ).filter(
+            AsetSawah.aset_id > setelah,
+            filter_aset_kosong(AsetSawah.aset_id, mulai, akhir),
+        ).order_by(
+            AsetSawah.aset_id
+        ).limit(limit + 1).all()
+    except SQLAlchemyError as e:
+        return jsonify({'error': 'Gagal memeriksa ketersediaan aset.', 'details': str(e)}), 500
+
+    data = [_aset_ke_dict(r) for r in rows[:limit]]
+    return jsonify({
+        'from': mulai.isoformat(),
+        'to': akhir.isoformat(),
+        'data': data,
+        'terpotong': len(rows) > limit,
+        'setelah_berikutnya': data[-1]['aset_id'] if len(rows) > limit else None,
+    }), 200
+
+
+# ---------------------------------------------------------------------
+# PETA ASET: VECTOR TILE (MVT) + CACHE DISK
+# ---------------------------------------------------------------------
+
+# Tile dibangun di EPSG:3857; filter && memakai envelope yang ditransformasi
+# ke SRID kolom (4326) sehingga indeks GIST tetap terpakai.
+SQL_TILE_ASET = text("""
+    WITH batas AS (
+        SELECT ST_TileEnvelope(:z, :x, :y) AS geom_3857
+    ),
+    mvtgeom AS (
+        SELECT ST_AsMVTGeom(ST_Transform(a.lokasi, 3857), batas.geom_3857) AS geom,
+               a.aset_id,
+               a.nama_sebutan,
+               a.status_sewa
+        FROM aset_sawah a, batas
+        WHERE a.lokasi && ST_Transform(batas.geom_3857, 4326)
+    )
+    SELECT ST_AsMVT(mvtgeom.*, 'aset_sawah', 4096, 'geom') FROM mvtgeom
+""")
+
+
+@aset_bp.route('/tiles/<int:z>/<int:x>/<int:y>.mvt')
+def tile_aset(z, x, y):
+    """Tile vektor aset_sawah (atribut: aset_id, nama_sebutan, status_sewa)."""
+    if not (0 <= z <= ZOOM_MAKS and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        abort(404)
+
+    data = baca_tile(z, x, y)
+    if data is None:
+        try:
+            hasil = db.session.execute(SQL_TILE_ASET, {'z': z, 'x': x, 'y': y}).scalar()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonify({'error': 'Gagal membuat tile peta.', 'details': str(e)}), 500
+        # Tile kosong tetap di-cache agar area tanpa sawah juga tidak memicu query
+        data = bytes(hasil) if hasil is not None else b''
+        simpan_tile(z, x, y, data)
+
+    response = make_response(data)
+    response.mimetype = 'application/vnd.mapbox-vector-tile'
+    # Cache server diinvalidasi saat data berubah; klien cukup menyimpan sebentar
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
+@aset_bp.route('/peta')
+def peta_aset():
+    """Halaman peta seluruh aset, memuat tile vektor sesuai area yang sedang dilihat."""
+    return render_template('peta_aset.html')
+
+
+# ---------------------------------------------------------------------
+# IMPOR MASSAL ASET DARI CSV (COPY ke staging, lalu merge)
+# ---------------------------------------------------------------------
+
+def _jalankan_impor(stream, dry_run):
+    """Menjalankan impor dan menutup transaksi: rollback untuk dry-run, commit jika tidak."""
+    try:
+        laporan = impor_aset_csv(stream, dry_run=dry_run)
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if not dry_run and laporan['jumlah_dimuat']:
+        invalidasi_statistik()
+        # Ribuan titik baru: lebih murah mengosongkan cache tile daripada per titik
+        hapus_semua_tile()
+    return laporan
+
+
+@tugas('impor_aset')
+def tugas_impor_aset(payload):
+    """Job antrian: impor CSV yang sudah disimpan di upload store (payload: path_relatif)."""
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], *payload['path_relatif'].split('/'))
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            return _jalankan_impor(f, dry_run=False)
+    except (FileNotFoundError, FormatCSVTidakValid, UnicodeDecodeError) as e:
+        # Input rusak tidak akan membaik jika diulang
+        raise JobGagalPermanen(str(e)) from e
+
+
+def _antrikan_impor(file):
+    """Menyimpan CSV ke upload store lalu menjadwalkan job impor_aset. Mengembalikan job."""
+    tersimpan = simpan_upload(file, ekstensi_diizinkan={'csv', 'txt'})
+    job = antrikan('impor_aset', {'path_relatif': tersimpan.path_relatif, 'nama_file': file.filename})
+    db.session.commit()
+    return job
+
+
+@aset_bp.route('/impor', methods=['GET', 'POST'])
+def impor_aset():
+    """Upload CSV aset (kolom: nama_sebutan, nomor_sertifikat, luas_m2, lokasi, tanaman_saat_ini, status_sewa)."""
+    form = ImporAsetForm()
+    laporan = None
+
+    if form.validate_on_submit() and form.latar_belakang.data and not form.dry_run.data:
+        # File besar: request langsung kembali, worker (`flask worker`) yang mengimpor
+        try:
+            job = _antrikan_impor(form.csv_file.data)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            flash(f'Gagal menjadwalkan impor: {e}', 'danger')
+        else:
+            flash(f"Impor dijadwalkan sebagai job #{job.id}. Status: {url_for('status_job', job_id=job.id)}", 'info')
+        return redirect(url_for('aset.impor_aset'))
+
+    if form.validate_on_submit():
+        stream = io.TextIOWrapper(form.csv_file.data.stream, encoding='utf-8-sig', newline='')
+        try:
+            laporan = _jalankan_impor(stream, dry_run=form.dry_run.data)
+        except (FormatCSVTidakValid, UnicodeDecodeError) as e:
+            flash(f'ERROR: File CSV tidak dapat dibaca. {e}', 'danger')
+        except SQLAlchemyError as e:
+            logging.error(f"IMPOR ASET GAGAL: {e}")
+            flash('ERROR DB: Gagal mengimpor data aset. Cek log server.', 'danger')
+        else:
+            if laporan['dry_run']:
+                flash(f"Dry-run selesai: {laporan['jumlah_dimuat']} dari {laporan['jumlah_baris']} baris siap diimpor.", 'info')
+            else:
+                flash(f"Impor selesai: {laporan['jumlah_dimuat']} dari {laporan['jumlah_baris']} baris berhasil disimpan.", 'success')
+
+    elif request.method == 'POST':
+        for fieldName, errorMessages in form.errors.items():
+            for err in errorMessages:
+                flash(f"Validasi Gagal di {fieldName}: {err}", 'danger')
+
+    return render_template('impor_aset.html', form=form, laporan=laporan, title='Impor Aset dari CSV')
+
+
+@aset_bp.cli.command('impor')
+@click.argument('path_csv', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, help='Hanya validasi dan laporkan duplikat, tanpa menyimpan.')
+def impor_aset_cli(path_csv, dry_run):
+    """Impor massal aset_sawah dari file CSV: flask aset impor data.csv [--dry-run]"""
+    with open(path_csv, encoding='utf-8-sig', newline='') as f:
+        try:
+            laporan = _jalankan_impor(f, dry_run=dry_run)
+        except FormatCSVTidakValid as e:
+            raise click.ClickException(str(e))
+
+    for item in laporan['baris_tidak_valid']:
+        click.echo(f"Baris {item['baris']} tidak valid: {'; '.join(item['errors'])}")
+    for item in laporan['duplikat_di_file']:
+        click.echo(f"Duplikat di file: {item['nomor_sertifikat']} (baris {', '.join(map(str, item['baris']))})")
+    for item in laporan['duplikat_di_database']:
+        click.echo(f"Sudah ada di database: {item['nomor_sertifikat']} (baris {item['baris']}, aset_id {item['aset_id']})")
+
+    awalan = '[DRY-RUN] ' if dry_run else ''
+    click.echo(f"{awalan}{laporan['jumlah_dimuat']} dari {laporan['jumlah_baris']} baris "
+               f"{'siap diimpor' if dry_run else 'berhasil diimpor'}.")
@@ -1,9 +1,11 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from models.aset_model import db, Penyewa
 from src.forms import PenyewaForm
-from werkzeug.utils import secure_filename
-import os
 from sqlalchemy.exc import SQLAlchemyError # Diperlukan untuk penanganan error DB
+from src.statistik import invalidasi_statistik
+from src.upload_store import simpan_upload, hapus_jika_baru
+from src.thumbnail import jadwalkan_olahan
+from src.analitik import jadwalkan_refresh_analitik
 
 # Inisialisasi Blueprint
 penyewa_bp = Blueprint('penyewa', __name__, url_prefix='/penyewa')
@@ -28,6 +30,7 @@ def tambah_penyewa():
     form = PenyewaForm()
     
     if form.validate_on_submit():
+        ktp_tersimpan = None
         try:
             # --- LOGIKA UPLOAD FILE KTP ---
             link_ktp = None
@@ -37,19 +40,12 @@ def tambah_penyewa():
                 
                 # Memastikan file ada dan nama file tidak kosong
                 if file and file.filename != '':
-                    filename = secure_filename(file.filename)
-                    
-                    # Cek jika folder upload sudah ada
-                    upload_folder = current_app.config.get('UPLOAD_FOLDER')
-                    if not os.path.exists(upload_folder):
-                        os.makedirs(upload_folder)
-                        
-                    # Simpan file
-                    filepath = os.path.join(upload_folder, filename)
-                    file.save(filepath)
+                    # Disimpan berdasarkan hash isi (lihat src/upload_store.py),
+                    # sehingga dua penyewa dengan nama file sama tidak saling timpa
+                    ktp_tersimpan = simpan_upload(file)
                     
                     # Simpan link relatif (yang dapat diakses oleh browser)
-                    link_ktp = os.path.join('/uploads', filename)
+                    link_ktp = ktp_tersimpan.url
             
             # --- LOGIKA PENYIMPANAN DATA UTAMA ---
             p = Penyewa(
@@ -62,6 +58,9 @@ def tambah_penyewa():
             
             db.session.add(p)
             db.session.commit()
+            invalidasi_statistik()
+            # Thumbnail dibuat di latar belakang, request tidak menunggu
+            jadwalkan_olahan(link_ktp)
             flash('Penyewa berhasil ditambahkan!', 'success')
             
             # PERBAIKAN PENTING: Gunakan 'penyewa.list_penyewa'
@@ -69,6 +68,7 @@ def tambah_penyewa():
             
         except SQLAlchemyError as e:
             db.session.rollback()
+            hapus_jika_baru(ktp_tersimpan)
             flash(f'Gagal menambahkan penyewa ke database: {e}', 'danger')
             
     # Render template, tambahkan title dan pastikan form diisi
@@ -89,6 +89,7 @@ def edit_penyewa(penyewa_id):
     form = PenyewaForm(obj=penyewa)
     
     if form.validate_on_submit():
+        ktp_tersimpan = None
         try:
             # Muat data dari form ke objek penyewa
             form.populate_obj(penyewa)
@@ -98,24 +99,22 @@ def edit_penyewa(penyewa_id):
                 file = request.files['ktp_file']
                 
                 if file and file.filename != '':
-                    # Jika penyewa sudah memiliki file KTP, hapus file lama (Optional)
-                    # if penyewa.link_ktp and os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], os.path.basename(penyewa.link_ktp))):
-                    #     os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], os.path.basename(penyewa.link_ktp)))
-                        
-                    filename = secure_filename(file.filename)
-                    upload_folder = current_app.config.get('UPLOAD_FOLDER')
-                    filepath = os.path.join(upload_folder, filename)
-                    file.save(filepath)
+                    # File KTP lama tidak dihapus: di store berbasis konten satu
+                    # file bisa dipakai oleh lebih dari satu penyewa.
+                    ktp_tersimpan = simpan_upload(file)
                     
                     # Update link KTP baru
-                    penyewa.link_ktp = os.path.join('/uploads', filename)
+                    penyewa.link_ktp = ktp_tersimpan.url
             
             db.session.commit()
+            if ktp_tersimpan is not None:
+                jadwalkan_olahan(ktp_tersimpan.url)
             flash('Data Penyewa berhasil diperbarui!', 'success')
             return redirect(url_for('penyewa.list_penyewa'))
             
         except SQLAlchemyError as e:
             db.session.rollback()
+            hapus_jika_baru(ktp_tersimpan)
             flash(f'Gagal memperbarui penyewa: {e}', 'danger')
             
     # Render form edit
@@ -143,7 +142,10 @@ def hapus_penyewa(penyewa_id):
         #         os.remove(filepath)
 
         db.session.delete(penyewa)
+        # Transaksi penyewa ikut terhapus (CASCADE): rollup pendapatan perlu di-refresh
+        jadwalkan_refresh_analitik()
         db.session.commit()
+        invalidasi_statistik()
         flash(f'Penyewa ID {penyewa_id} berhasil dihapus.', 'success')
         
     except SQLAlchemyError as e:
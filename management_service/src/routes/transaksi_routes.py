@@ -1,19 +1,28 @@
 # FILE: management_service/src/routes/transaksi_routes.py (KOREKSI TOTAL)
 
-from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request
+from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request, Response, stream_with_context, jsonify
 from models.aset_model import db, TransaksiSewa, AsetSawah, Penyewa, HargaSewa 
-from src.forms import TransaksiForm
+from src.forms import TransaksiForm, STATUS_PEMBAYARAN_PILIHAN
 import requests 
 from decimal import Decimal 
 from sqlalchemy.exc import SQLAlchemyError 
 import json 
 from wtforms.validators import DataRequired 
-from datetime import datetime # Diperlukan untuk tanggal transaksi dan timestamp
-from werkzeug.utils import secure_filename 
+from datetime import datetime, date # Diperlukan untuk tanggal transaksi dan timestamp
+import csv
+import io
 import os
-import uuid 
 import logging
 from sqlalchemy import func # Diperlukan untuk update query
+from sqlalchemy.orm import joinedload
+from src.pagination import paginasi_dari_request, PER_PAGE_PILIHAN, CursorTidakValid
+from src.pricing_client import get_pricing_client
+from src.statistik import invalidasi_statistik
+from src.tile_cache import invalidasi_titik
+from src.upload_store import simpan_upload, hapus_jika_baru, EkstensiTidakDiizinkan
+from src.thumbnail import jadwalkan_olahan
+from src.kalender_sewa import sewa_bentrok, adalah_bentrok_periode
+from src.analitik import jadwalkan_refresh_analitik
 
 # Konfigurasi logger
 logging.basicConfig(level=logging.INFO)
@@ -23,14 +32,32 @@ transaksi_bp = Blueprint('transaksi', __name__)
 # 1. ROUTE DAFTAR TRANSAKSI (List Transaksi)
 # ---------------------------------------------------------------------
 
+def _query_transaksi_dengan_relasi():
+    """
+    Query dasar daftar transaksi dengan aset & penyewa di-JOIN sekaligus,
+    sehingga template tidak memicu lazy-load (2 query tambahan per baris).
+    """
+    return TransaksiSewa.query.options(
+        joinedload(TransaksiSewa.aset),
+        joinedload(TransaksiSewa.penyewa),
+    )
+
+
 @transaksi_bp.route('/list')
 def list_transaksi():
     try:
-        data = TransaksiSewa.query.order_by(TransaksiSewa.sewa_id.desc()).all()
+        halaman = paginasi_dari_request(_query_transaksi_dengan_relasi(), TransaksiSewa.sewa_id, request.args)
+    except CursorTidakValid as e:
+        flash(f'Halaman tidak valid: {e}', 'danger')
+        halaman = None
     except SQLAlchemyError as e:
         flash(f'Gagal mengambil data transaksi: {e}', 'danger')
-        data = []
-    return render_template('list_transaksi.html', data=data, title='Daftar Transaksi Sewa')
+        halaman = None
+    return render_template('list_transaksi.html',
+                           data=halaman.items if halaman else [],
+                           halaman=halaman,
+                           per_page_pilihan=PER_PAGE_PILIHAN,
+                           title='Daftar Transaksi Sewa')
 
 # ---------------------------------------------------------------------
 # 1.1 ROUTE LIST TRANSAKSI BERDASARKAN ID HARGA (list_by_harga)
@@ -40,41 +67,171 @@ def list_transaksi():
 def list_by_harga(harga_id):
     """Menampilkan daftar transaksi yang menggunakan ID harga sewa tertentu."""
     
+    halaman = None
     try:
-        data = TransaksiSewa.query.filter_by(harga_sewa_id=harga_id).order_by(TransaksiSewa.sewa_id.desc()).all()
+        halaman = paginasi_dari_request(
+            _query_transaksi_dengan_relasi().filter_by(harga_sewa_id=harga_id),
+            TransaksiSewa.sewa_id,
+            request.args
+        )
         
         harga_obj = HargaSewa.query.get(harga_id) 
         harga_label = f"Harga ID {harga_id}"
         if harga_obj:
             harga_label = f"Rp {harga_obj.harga_per_boto:,.0f} (Tahun {harga_obj.tahun_penetapan})"
         
+    except CursorTidakValid as e:
+        flash(f'Halaman tidak valid: {e}', 'danger')
+        harga_label = f"Harga ID {harga_id}"
     except SQLAlchemyError as e:
         flash(f'Gagal mengambil data transaksi: {e}', 'danger')
-        data = []
         harga_label = f"Harga ID {harga_id}"
         
     flash(f'Menampilkan transaksi untuk penetapan harga: {harga_label}', 'info')
     
     return render_template('list_transaksi.html', 
-                           data=data, 
+                           data=halaman.items if halaman else [], 
+                           halaman=halaman,
+                           per_page_pilihan=PER_PAGE_PILIHAN,
                            title=f'Transaksi untuk Harga: {harga_label}')
 
+# ---------------------------------------------------------------------
+# 1.2 ROUTE EKSPOR CSV (Streaming dengan server-side cursor)
+# ---------------------------------------------------------------------
+
+# Jumlah baris yang diambil per batch dari server-side cursor
+EKSPOR_YIELD_PER = 1000
+
+KOLOM_EKSPOR = (
+    'sewa_id', 'tanggal_transaksi', 'aset_id', 'nama_sebutan', 'penyewa_id', 'nama_lengkap',
+    'harga_sewa_id', 'tanggal_mulai', 'tanggal_akhir', 'durasi_bulan', 'nilai_sewa',
+    'status_pembayaran', 'jenis_tanaman_disepakati',
+)
+
+
+def _parse_tanggal(nama_param):
+    teks = request.args.get(nama_param)
+    if not teks:
+        return None
+    return date.fromisoformat(teks)
+
+
+@transaksi_bp.route('/export.csv')
+def export_transaksi_csv():
+    """
+    Ekspor transaksi ke CSV secara streaming.
+    Filter opsional: ?dari=YYYY-MM-DD&sampai=YYYY-MM-DD (tanggal_mulai),
+    ?status_pembayaran=Lunas|Belum Bayar, ?harga_sewa_id=<id>. Nilai filter yang
+    tidak valid ditolak dengan 400, bukan diabaikan.
+    Baris dibaca dari server-side cursor (yield_per) sehingga memori tetap datar
+    dan byte pertama langsung terkirim.
+    """
+    try:
+        dari = _parse_tanggal('dari')
+        sampai = _parse_tanggal('sampai')
+    except ValueError:
+        return jsonify({'error': 'Parameter dari/sampai harus berformat YYYY-MM-DD.'}), 400
+
+    # Hanya kolom yang diekspor (tanpa objek ORM) agar tiap baris ringan
+    query = db.session.query(
+        TransaksiSewa.sewa_id,
+        TransaksiSewa.tanggal_transaksi,
+        TransaksiSewa.aset_id,
+        AsetSawah.nama_sebutan,
+        TransaksiSewa.penyewa_id,
+        Penyewa.nama_lengkap,
+        TransaksiSewa.harga_sewa_id,
+        TransaksiSewa.tanggal_mulai,
+        TransaksiSewa.tanggal_akhir,
+        TransaksiSewa.durasi_bulan,
+        TransaksiSewa.nilai_sewa,
+        TransaksiSewa.status_pembayaran,
+        TransaksiSewa.jenis_tanaman_disepakati,
+    ).outerjoin(
+        AsetSawah, AsetSawah.aset_id == TransaksiSewa.aset_id
+    ).outerjoin(
+        Penyewa, Penyewa.penyewa_id == TransaksiSewa.penyewa_id
+    )
+
+    if dari:
+        query = query.filter(TransaksiSewa.tanggal_mulai >= dari)
+    if sampai:
+        query = query.filter(TransaksiSewa.tanggal_mulai <= sampai)
+    status_pembayaran = request.args.get('status_pembayaran')
+    if status_pembayaran:
+        pilihan = [nilai for nilai, _label in STATUS_PEMBAYARAN_PILIHAN]
+        if status_pembayaran not in pilihan:
+            return jsonify({'error': f"Parameter status_pembayaran harus salah satu dari: {', '.join(pilihan)}."}), 400
+        query = query.filter(TransaksiSewa.status_pembayaran == status_pembayaran)
+    # Filter yang salah ketik tidak boleh diam-diam hilang (mengekspor seluruh tabel)
+    if request.args.get('harga_sewa_id'):
+        try:
+            harga_sewa_id = int(request.args['harga_sewa_id'])
+        except ValueError:
+            return jsonify({'error': 'Parameter harga_sewa_id harus bilangan bulat.'}), 400
+        query = query.filter(TransaksiSewa.harga_sewa_id == harga_sewa_id)
+
+    query = query.order_by(TransaksiSewa.sewa_id).yield_per(EKSPOR_YIELD_PER)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def kosongkan_buffer():
+            isi = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return isi
+
+        # Header dikirim segera, sebelum baris pertama diambil dari database
+        writer.writerow(KOLOM_EKSPOR)
+        yield kosongkan_buffer()
+
+        for i, row in enumerate(query, start=1):
+            writer.writerow(row)
+            # Kirim per batch agar overhead per-chunk kecil
+            if i % EKSPOR_YIELD_PER == 0:
+                yield kosongkan_buffer()
+        yield kosongkan_buffer()
+
+    nama_file = f"transaksi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{nama_file}"'}
+    )
+
 # ---------------------------------------------------------------------
 # 2. ROUTE TAMBAH TRANSAKSI (Dengan Pemilihan Harga API)
 # ---------------------------------------------------------------------
 
+def _invalidasi_tile_aset(*aset_ids):
+    """status_sewa ikut ter-encode di tile peta: hapus tile yang memuat aset-aset ini (setelah commit)."""
+    if db.engine.dialect.name != 'postgresql':
+        # Tile MVT hanya dibangun di PostGIS, tidak ada cache yang perlu dihapus
+        return
+    rows = db.session.query(
+        func.ST_X(AsetSawah.lokasi), func.ST_Y(AsetSawah.lokasi)
+    ).filter(AsetSawah.aset_id.in_({a for a in aset_ids if a is not None})).all()
+    for lon, lat in rows:
+        invalidasi_titik(lon, lat)
+
+
+def _pesan_bentrok(bentrok):
+    return (f"Aset sudah disewa pada {bentrok.tanggal_mulai.strftime('%d-%m-%Y')} s/d "
+            f"{bentrok.tanggal_akhir.strftime('%d-%m-%Y')} (transaksi #{bentrok.sewa_id}). "
+            f"Pilih aset atau tanggal lain.")
+
+
 @transaksi_bp.route('/tambah', methods=['GET', 'POST'])
 def tambah_transaksi():
     form = TransaksiForm()
     
-    PRICING_SERVICE_URL = current_app.config.get('PRICING_SERVICE_URL', 'http://127.0.0.1:5003')
     harga_list = [] 
 
-    # --- FASE 1: MEMUAT PILIHAN HARGA DARI API ---
+    # --- FASE 1: MEMUAT PILIHAN HARGA DARI API (melalui cache klien bersama) ---
     try:
-        response = requests.get(f'{PRICING_SERVICE_URL}/api/v1/harga/list_all')
-        response.raise_for_status() 
-        harga_list = response.json()
+        harga_list = get_pricing_client().daftar_harga()
         
         form.harga_pilihan_id.choices = [(h['id'], h['label']) for h in harga_list]
         
@@ -124,6 +281,12 @@ def tambah_transaksi():
             flash('ERROR: Data luas boto aset tidak ditemukan atau nol.', 'danger')
             return render_template('form_transaksi.html', form=form)
             
+        # Aset tidak boleh disewa dua kali pada periode yang beririsan (indeks GiST periode)
+        bentrok = sewa_bentrok(aset.aset_id, form.tanggal_mulai.data, form.tanggal_akhir.data)
+        if bentrok:
+            flash(_pesan_bentrok(bentrok), 'danger')
+            return render_template('form_transaksi.html', form=form, title='Tambah Transaksi')
+
         durasi = form.durasi_bulan.data
         
         # 3. Hitung Total Sewa (LOGIC MATEMATIKA FINAL)
@@ -156,14 +319,20 @@ def tambah_transaksi():
         db.session.add(tr)
         
         try:
+            jadwalkan_refresh_analitik()
             db.session.commit()
+            invalidasi_statistik()
+            _invalidasi_tile_aset(tr.aset_id)
             flash('Transaksi berhasil dibuat dan aset diperbarui!', 'success')
             return redirect(url_for('transaksi.list_transaksi'))
 
         except SQLAlchemyError as e:
             db.session.rollback()
             logging.error(f"ERROR DB (tambah_transaksi): {e}")
-            flash('ERROR DB: Gagal menyimpan transaksi. Cek log database.', 'danger')
+            if adalah_bentrok_periode(e):
+                flash('Aset baru saja disewa oleh transaksi lain pada periode yang sama. Pilih tanggal lain.', 'danger')
+            else:
+                flash('ERROR DB: Gagal menyimpan transaksi. Cek log database.', 'danger')
             return render_template('form_transaksi.html', form=form, title='Tambah Transaksi')
             
     else:
@@ -191,14 +360,11 @@ def edit_transaksi(sewa_id):
         
     form = TransaksiForm(obj=transaksi)
 
-    # --- FASE 1: MEMUAT PILIHAN HARGA DARI API ---
-    PRICING_SERVICE_URL = current_app.config.get('PRICING_SERVICE_URL', 'http://127.0.0.1:5003')
+    # --- FASE 1: MEMUAT PILIHAN HARGA DARI API (melalui cache klien bersama) ---
     harga_list = []
     
     try:
-        response = requests.get(f'{PRICING_SERVICE_URL}/api/v1/harga/list_all')
-        response.raise_for_status() 
-        harga_list = response.json()
+        harga_list = get_pricing_client().daftar_harga()
         
         form.harga_pilihan_id.choices = [(h['id'], h['label']) for h in harga_list]
 
@@ -246,6 +412,12 @@ def edit_transaksi(sewa_id):
             flash('ERROR: Data luas boto aset tidak ditemukan atau nol.', 'danger')
             return render_template('form_transaksi.html', form=form, transaksi=transaksi)
             
+        bentrok = sewa_bentrok(aset.aset_id, form.tanggal_mulai.data, form.tanggal_akhir.data,
+                               kecuali_sewa_id=transaksi.sewa_id)
+        if bentrok:
+            flash(_pesan_bentrok(bentrok), 'danger')
+            return render_template('form_transaksi.html', form=form, title='Edit Transaksi Sewa', transaksi=transaksi)
+
         durasi = form.durasi_bulan.data
         
         # 3. Hitung Total Sewa (LOGIC MATEMATIKA FINAL)
@@ -254,6 +426,7 @@ def edit_transaksi(sewa_id):
 
 
         # 4. Update objek transaksi dengan data baru
+        aset_id_lama = transaksi.aset_id
         form.populate_obj(transaksi)
         transaksi.nilai_sewa = total_sewa
         transaksi.harga_sewa_id = harga_id_digunakan 
@@ -264,14 +437,21 @@ def edit_transaksi(sewa_id):
             aset.status_sewa = 'Disewa' 
 
         try:
+            jadwalkan_refresh_analitik()
             db.session.commit()
+            invalidasi_statistik()
+            # Aset lama dan baru (jika transaksi dipindah ke aset lain)
+            _invalidasi_tile_aset(aset_id_lama, transaksi.aset_id)
             flash('Transaksi berhasil diperbarui!', 'success')
             return redirect(url_for('transaksi.list_transaksi'))
             
         except SQLAlchemyError as e:
             db.session.rollback()
             logging.error(f"ERROR DB (edit_transaksi): {e}")
-            flash(f'Gagal memperbarui transaksi: {e}', 'danger')
+            if adalah_bentrok_periode(e):
+                flash('Aset baru saja disewa oleh transaksi lain pada periode yang sama. Pilih tanggal lain.', 'danger')
+            else:
+                flash(f'Gagal memperbarui transaksi: {e}', 'danger')
             
     # Render form edit
     return render_template('form_transaksi.html', form=form, title='Edit Transaksi Sewa', transaksi=transaksi)
@@ -285,10 +465,13 @@ def hapus_transaksi(sewa_id):
     """Menghapus data transaksi."""
     transaksi = db.session.get(TransaksiSewa, sewa_id)
     if transaksi:
-        
+        aset_id = transaksi.aset_id
         db.session.delete(transaksi)
         try:
+            jadwalkan_refresh_analitik()
             db.session.commit()
+            invalidasi_statistik()
+            _invalidasi_tile_aset(aset_id)
             flash(f'Transaksi ID {sewa_id} berhasil dihapus.', 'success')
         except SQLAlchemyError:
              db.session.rollback()
@@ -327,31 +510,19 @@ def upload_bukti_bayar():
         flash("Upload hanya dapat dilakukan untuk transaksi berstatus Lunas.", 'danger')
         return redirect(url_for('transaksi.list_transaksi'))
     
-    # 3. Validasi Tipe File dan Keamanan
+    # 3. Validasi Tipe File lalu simpan di store berbasis konten (lihat src/upload_store.py).
+    #    Upload ulang file yang sama tidak menambah file baru di disk.
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'pdf'}
-    filename = secure_filename(file.filename)
-    
-    if '.' not in filename or filename.rsplit('.', 1)[1].lower() not in ALLOWED_EXTENSIONS:
+    try:
+        bukti_tersimpan = simpan_upload(file, ekstensi_diizinkan=ALLOWED_EXTENSIONS)
+    except EkstensiTidakDiizinkan:
         flash("Format file tidak didukung. Gunakan JPG, PNG, atau PDF.", 'danger')
         return redirect(url_for('transaksi.list_transaksi'))
 
-    # 4. Proses Penyimpanan File
-    UPLOAD_FOLDER = current_app.config['UPLOAD_FOLDER']
-    BUKTI_BAYAR_DIR = os.path.join(UPLOAD_FOLDER, 'bukti_bayar')
-    
-    if not os.path.exists(BUKTI_BAYAR_DIR):
-        os.makedirs(BUKTI_BAYAR_DIR)
-        
-    file_extension = filename.rsplit('.', 1)[1].lower()
-    unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
-    file_path_full = os.path.join(BUKTI_BAYAR_DIR, unique_filename)
-
-    file.save(file_path_full)
-    
-    # 5. Buat Path Relatif
-    db_link = os.path.join('bukti_bayar', unique_filename).replace('\\', '/')
+    # 4. Path relatif terhadap UPLOAD_FOLDER (dilayani oleh route uploaded_file)
+    db_link = bukti_tersimpan.path_relatif
     
-    # 6. Update Database MENGGUNAKAN QUERY (Final Fix)
+    # 5. Update Database MENGGUNAKAN QUERY (Final Fix)
     
     # Menggunakan objek Kolom Model untuk mengatasi masalah ORM state dan Unconsumed Column Name
     data_update = {
@@ -363,15 +534,16 @@ def upload_bukti_bayar():
         # Gunakan synchronize_session='fetch' untuk memastikan state sesi diperbarui
         db.session.query(TransaksiSewa).filter_by(sewa_id=sewa_id).update(data_update, synchronize_session='fetch')
         db.session.commit()
+        # Thumbnail & kompresi ulang di thread pool, respons tidak menunggu
+        jadwalkan_olahan(db_link)
         flash('Bukti pembayaran berhasil diupload dan database diperbarui!', 'success')
         return redirect(url_for('transaksi.list_transaksi'))
 
     except SQLAlchemyError as e: 
         db.session.rollback()
         
-        # Hapus file yang sudah di-upload jika gagal di DB
-        if os.path.exists(file_path_full):
-            os.remove(file_path_full)
+        # Hapus file yang sudah di-upload jika gagal di DB (kecuali duplikat yang sudah ada)
+        hapus_jika_baru(bukti_tersimpan)
             
         logging.error(f"SQLAlchemy UPDATE GAGAL: {e}") 
         flash('ERROR KRITIS: Gagal menyimpan data ke DB. Cek log server.', 'danger')
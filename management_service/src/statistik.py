@@ -0,0 +1,59 @@
+# FILE: management_service/src/statistik.py
+#
+# Ringkasan statistik dashboard (total aset, aset tersedia, penyewa, transaksi).
+# Dihitung dengan SATU statement agregat dan disimpan di cache kecil per proses.
+# Jalur tulis di blueprint memanggil invalidasi_statistik() setelah commit;
+# TTL menjadi batas atas data basi untuk perubahan dari worker lain.
+
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from models.aset_model import db, AsetSawah, Penyewa, TransaksiSewa
+
+_lock = threading.Lock()
+_cache = None
+_dihitung_pada = 0.0
+
+
+def _hitung_statistik():
+    """Satu round-trip: COUNT aset (+ FILTER status) dan subquery skalar untuk tabel lain."""
+    total_aset, aset_tersedia, total_penyewa, total_transaksi = db.session.query(
+        func.count(AsetSawah.aset_id),
+        # Tersedia = tidak sedang disewa ('Tidak Disewa', 'Expired', atau default lama 'Tersedia'/'Available')
+        func.count(AsetSawah.aset_id).filter(AsetSawah.status_sewa != 'Disewa'),
+        select(func.count(Penyewa.penyewa_id)).scalar_subquery(),
+        select(func.count(TransaksiSewa.sewa_id)).scalar_subquery(),
+    ).one()
+
+    return {
+        'total_aset': total_aset,
+        'aset_tersedia': aset_tersedia,
+        'total_penyewa': total_penyewa,
+        'total_transaksi': total_transaksi,
+    }
+
+
+def ambil_statistik():
+    """Mengembalikan statistik dashboard dari cache, menghitung ulang jika kosong/kedaluwarsa."""
+    global _cache, _dihitung_pada
+
+    ttl = current_app.config.get('STATISTIK_CACHE_TTL', 30)
+    with _lock:
+        if _cache is not None and time.monotonic() - _dihitung_pada < ttl:
+            return dict(_cache)
+
+    statistik = _hitung_statistik()
+    with _lock:
+        _cache = statistik
+        _dihitung_pada = time.monotonic()
+    return dict(statistik)
+
+
+def invalidasi_statistik():
+    """Dipanggil oleh jalur tulis (tambah/edit/hapus) setelah commit berhasil."""
+    global _cache
+    with _lock:
+        _cache = None
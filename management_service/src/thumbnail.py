@@ -0,0 +1,171 @@
+# FILE: management_service/src/thumbnail.py
+#
+# Pipeline gambar di latar belakang untuk upload (KTP, bukti bayar).
+# Setelah upload tersimpan, route hanya menjadwalkan pekerjaan ke thread pool;
+# worker membuat dua turunan di UPLOAD_FOLDER/turunan/:
+#   thumb/<path>.jpg  -> thumbnail kecil untuk halaman daftar
+#   web/<path>.jpg    -> salinan ukuran penuh yang dikompres ulang (hanya
+#                        disimpan jika lebih kecil dari file asli)
+# File asli tidak pernah diubah. Pillow bersifat opsional: tanpa Pillow tidak
+# ada turunan dan template kembali menampilkan link ke file asli.
+
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from src.upload_store import MODE_FILE
+
+# Pillow dimuat saat pertama kali dibutuhkan agar tidak memperlambat start-up worker
+_pil = None
+
+FOLDER_TURUNAN = 'turunan'
+EKSTENSI_GAMBAR = {'jpg', 'jpeg', 'png'}
+
+UKURAN_THUMBNAIL = (160, 160)
+SISI_MAKS_WEB = 2048
+KUALITAS_THUMBNAIL = 70
+KUALITAS_WEB = 82
+
+_lock = threading.Lock()
+_pool = None
+
+
+def _muat_pil():
+    """(Image, ImageOps) dari Pillow, atau (None, None) jika Pillow tidak terpasang."""
+    global _pil
+    if _pil is None:
+        try:
+            from PIL import Image, ImageOps
+            _pil = (Image, ImageOps)
+        except ImportError:
+            _pil = (None, None)
+    return _pil
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=current_app.config.get('THUMBNAIL_WORKERS', 2),
+                thread_name_prefix='thumbnail'
+            )
+        return _pool
+
+
+def _path_relatif_upload(link):
+    """Menormalkan link_ktp ('/uploads/cas/..') dan link_bukti_bayar ('cas/..') ke path relatif UPLOAD_FOLDER."""
+    if not link:
+        return None
+    link = link.replace('\\', '/')
+    if link.startswith('/uploads/'):
+        link = link[len('/uploads/'):]
+    return link.lstrip('/')
+
+
+def path_turunan(path_relatif, jenis):
+    """Path relatif turunan, misal 'turunan/thumb/cas/ab/cd/<sha256>.jpg'."""
+    dasar = path_relatif.rsplit('.', 1)[0]
+    return f'{FOLDER_TURUNAN}/{jenis}/{dasar}.jpg'
+
+
+def adalah_gambar(path_relatif):
+    return '.' in path_relatif and path_relatif.rsplit('.', 1)[1].lower() in EKSTENSI_GAMBAR
+
+
+def _simpan_jpeg(img, path_tujuan, kualitas):
+    """Menulis JPEG secara atomik (file sementara + os.replace). Mengembalikan ukuran byte."""
+    folder = os.path.dirname(path_tujuan)
+    os.makedirs(folder, exist_ok=True)
+    fd, path_sementara = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            img.save(f, 'JPEG', quality=kualitas, optimize=True, progressive=True)
+        # mkstemp membuat 0600: proxy X-Accel/X-Sendfile perlu bisa membaca turunan
+        os.chmod(path_sementara, MODE_FILE)
+        os.replace(path_sementara, path_tujuan)
+        return os.path.getsize(path_tujuan)
+    except BaseException:
+        if os.path.exists(path_sementara):
+            os.remove(path_sementara)
+        raise
+
+
+def _ke_rgb(img):
+    """JPEG tidak mendukung transparansi: latar putih untuk gambar beralpha."""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        Image = _muat_pil()[0]
+        latar = Image.new('RGB', img.size, (255, 255, 255))
+        latar.paste(img, mask=img.getchannel('A'))
+        return latar
+    return img.convert('RGB')
+
+
+def _olah_gambar(upload_folder, path_relatif):
+    """Dijalankan di thread worker (tanpa app context)."""
+    path_asli = os.path.join(upload_folder, *path_relatif.split('/'))
+    path_thumb = os.path.join(upload_folder, *path_turunan(path_relatif, 'thumb').split('/'))
+    path_web = os.path.join(upload_folder, *path_turunan(path_relatif, 'web').split('/'))
+
+    # Path berbasis konten tidak pernah berubah isinya: turunan yang sudah ada tetap valid
+    if os.path.exists(path_thumb):
+        return
+
+    Image, ImageOps = _muat_pil()
+    try:
+        with Image.open(path_asli) as img:
+            img = _ke_rgb(ImageOps.exif_transpose(img))
+
+            web = img.copy()
+            web.thumbnail((SISI_MAKS_WEB, SISI_MAKS_WEB))
+            ukuran_web = _simpan_jpeg(web, path_web, KUALITAS_WEB)
+            if ukuran_web >= os.path.getsize(path_asli):
+                # Kompresi ulang tidak menghemat apa pun: tetap layani file asli
+                os.remove(path_web)
+
+            img.thumbnail(UKURAN_THUMBNAIL)
+            _simpan_jpeg(img, path_thumb, KUALITAS_THUMBNAIL)
+    except (OSError, Image.DecompressionBombError) as e:
+        logging.warning(f"Gagal membuat thumbnail untuk {path_relatif}: {e}")
+
+
+def jadwalkan_olahan(link):
+    """
+    Menjadwalkan pembuatan thumbnail + salinan terkompresi di thread pool.
+    Dipanggil setelah commit berhasil; tidak menunggu hasil. Mengembalikan
+    Future, atau None jika file bukan gambar atau Pillow tidak tersedia.
+    """
+    path_relatif = _path_relatif_upload(link)
+    if _muat_pil()[0] is None or not path_relatif or not adalah_gambar(path_relatif):
+        return None
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    return _get_pool().submit(_olah_gambar, upload_folder, path_relatif)
+
+
+def _url_turunan(link, jenis):
+    path_relatif = _path_relatif_upload(link)
+    if not path_relatif or not adalah_gambar(path_relatif):
+        return None
+    turunan = path_turunan(path_relatif, jenis)
+    if not os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], *turunan.split('/'))):
+        return None
+    return '/uploads/' + turunan
+
+
+def url_thumbnail(link):
+    """URL thumbnail untuk template, atau None jika belum/tidak tersedia."""
+    return _url_turunan(link, 'thumb')
+
+
+def url_tampilan(link):
+    """URL salinan terkompresi jika ada, selain itu URL file asli."""
+    turunan = _url_turunan(link, 'web')
+    if turunan:
+        return turunan
+    path_relatif = _path_relatif_upload(link)
+    return '/uploads/' + path_relatif if path_relatif else None
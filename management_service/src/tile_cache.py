@@ -0,0 +1,94 @@
+# FILE: management_service/src/tile_cache.py
+#
+# Cache tile vektor (MVT) aset_sawah di disk: TILE_CACHE_FOLDER/{z}/{x}/{y}.mvt
+# Tile dibuat sekali oleh ST_AsMVT, lalu dibaca langsung dari disk.
+# Operasi tambah/edit/hapus aset hanya menghapus tile yang memuat titik
+# yang berubah (satu tile per level zoom), bukan seluruh cache.
+
+import math
+import os
+import shutil
+import tempfile
+
+from flask import current_app
+
+# Level zoom maksimum yang dilayani (tile lebih dalam tidak berguna untuk titik sawah)
+ZOOM_MAKS = 22
+
+# Batas lintang Web Mercator (EPSG:3857)
+LINTANG_MAKS = 85.0511287798
+
+# Titik yang berada tepat di batas tile (toleransi ini) juga muncul di tile tetangga
+_EPSILON = 1e-9
+
+
+def folder_cache():
+    return current_app.config['TILE_CACHE_FOLDER']
+
+
+def path_tile(z, x, y):
+    return os.path.join(folder_cache(), str(z), str(x), f'{y}.mvt')
+
+
+def baca_tile(z, x, y):
+    """Mengembalikan isi tile dari cache disk, atau None jika belum ada."""
+    try:
+        with open(path_tile(z, x, y), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def simpan_tile(z, x, y, data):
+    """Menulis tile secara atomik (file sementara + os.replace) agar pembaca tidak melihat file setengah jadi."""
+    path = path_tile(z, x, y)
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, path_sementara = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(path_sementara, path)
+    except OSError:
+        if os.path.exists(path_sementara):
+            os.remove(path_sementara)
+        raise
+
+
+def _indeks_tile(nilai, n):
+    """Indeks tile (bisa dua jika tepat di batas) dari koordinat pecahan 0..n."""
+    i = int(math.floor(nilai))
+    hasil = {min(max(i, 0), n - 1)}
+    pecahan = nilai - i
+    if pecahan < _EPSILON and i - 1 >= 0:
+        hasil.add(i - 1)
+    if pecahan > 1 - _EPSILON and i + 1 < n:
+        hasil.add(i + 1)
+    return hasil
+
+
+def tile_untuk_titik(lon, lat, z):
+    """Semua (x, y) tile XYZ pada zoom z yang memuat titik (lon, lat)."""
+    lat = max(min(lat, LINTANG_MAKS), -LINTANG_MAKS)
+    n = 2 ** z
+    fx = (lon + 180.0) / 360.0 * n
+    lat_rad = math.radians(lat)
+    fy = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return {(x, y) for x in _indeks_tile(fx, n) for y in _indeks_tile(fy, n)}
+
+
+def invalidasi_titik(lon, lat):
+    """Menghapus semua tile (di semua level zoom) yang memuat titik (lon, lat)."""
+    if lon is None or lat is None:
+        return
+    for z in range(ZOOM_MAKS + 1):
+        for x, y in tile_untuk_titik(float(lon), float(lat), z):
+            try:
+                os.remove(path_tile(z, x, y))
+            except FileNotFoundError:
+                pass
+
+
+def hapus_semua_tile():
+    """Mengosongkan seluruh cache tile (misal setelah impor massal)."""
+    shutil.rmtree(folder_cache(), ignore_errors=True)
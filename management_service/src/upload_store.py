@@ -0,0 +1,128 @@
+# FILE: management_service/src/upload_store.py
+#
+# Penyimpanan upload berbasis konten (content-addressed).
+# File di-hash SHA-256 sambil dialirkan ke file sementara, lalu disimpan
+# SEKALI di path bershard:  UPLOAD_FOLDER/cas/ab/cd/<sha256>.<ekstensi>
+# - Upload dengan isi identik tidak menambah pemakaian disk.
+# - Nama file dari klien tidak lagi dipakai, jadi tidak ada saling timpa.
+# - Isi sebuah path tidak pernah berubah, sehingga aman di-cache selamanya.
+
+import hashlib
+import os
+import tempfile
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+# Subfolder di dalam UPLOAD_FOLDER untuk semua file berbasis konten
+FOLDER_CAS = 'cas'
+
+# Ukuran potongan saat membaca stream upload
+UKURAN_CHUNK = 64 * 1024
+
+# mkstemp membuat file 0600 dan os.replace mempertahankannya, sehingga proxy
+# (X-Accel-Redirect / X-Sendfile, src/kirim_upload.py) yang berjalan sebagai
+# user lain mendapat 403. File final dibuat 0644 dikurangi umask proses
+# (umask dibaca sekali saat impor: os.umask tidak aman dipanggil antar thread).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+MODE_FILE = 0o644 & ~_UMASK
+
+
+class EkstensiTidakDiizinkan(ValueError):
+    """Ekstensi file upload tidak termasuk daftar yang diizinkan."""
+
+
+class FileTersimpan:
+    """Hasil simpan_upload: path relatif terhadap UPLOAD_FOLDER, hash, dan status baru/duplikat."""
+
+    def __init__(self, path_relatif, sha256, ukuran, baru):
+        self.path_relatif = path_relatif
+        self.sha256 = sha256
+        self.ukuran = ukuran
+        self.baru = baru
+
+    @property
+    def url(self):
+        """Link yang dapat diakses browser (dilayani oleh route uploaded_file)."""
+        return '/uploads/' + self.path_relatif
+
+
+def ekstensi_file(nama_file):
+    """Ekstensi huruf kecil dari nama file klien (sudah disanitasi), atau '' jika tidak ada."""
+    nama = secure_filename(nama_file or '')
+    if '.' not in nama:
+        return ''
+    return nama.rsplit('.', 1)[1].lower()
+
+
+def path_cas(sha256, ekstensi):
+    """Path relatif bershard dua tingkat, misal 'cas/ab/cd/abcd....jpg'."""
+    nama = f'{sha256}.{ekstensi}' if ekstensi else sha256
+    return '/'.join((FOLDER_CAS, sha256[:2], sha256[2:4], nama))
+
+
+def adalah_path_cas(path_relatif):
+    """True jika path berada di store berbasis konten (isi tidak pernah berubah)."""
+    return path_relatif.startswith(FOLDER_CAS + '/')
+
+
+def simpan_upload(file, ekstensi_diizinkan=None):
+    """
+    Menyimpan FileStorage ke store berbasis konten dan mengembalikan FileTersimpan.
+    Isi dibaca per potongan (hash + tulis ke file sementara dalam satu lintasan),
+    sehingga file besar tidak pernah dimuat utuh ke memori.
+    """
+    ekstensi = ekstensi_file(file.filename)
+    if ekstensi_diizinkan is not None and ekstensi not in ekstensi_diizinkan:
+        raise EkstensiTidakDiizinkan(ekstensi)
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    folder_sementara = os.path.join(upload_folder, FOLDER_CAS, 'tmp')
+    os.makedirs(folder_sementara, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    ukuran = 0
+    fd, path_sementara = tempfile.mkstemp(dir=folder_sementara, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = file.stream.read(UKURAN_CHUNK)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                f.write(chunk)
+                ukuran += len(chunk)
+
+        sha256 = hasher.hexdigest()
+        path_relatif = path_cas(sha256, ekstensi)
+        path_tujuan = os.path.join(upload_folder, *path_relatif.split('/'))
+
+        if os.path.exists(path_tujuan):
+            # Duplikat: isi sudah tersimpan, buang salinan sementara
+            os.remove(path_sementara)
+            return FileTersimpan(path_relatif, sha256, ukuran, baru=False)
+
+        os.makedirs(os.path.dirname(path_tujuan), exist_ok=True)
+        os.chmod(path_sementara, MODE_FILE)
+        # os.replace atomik: pembaca tidak pernah melihat file setengah jadi
+        os.replace(path_sementara, path_tujuan)
+        return FileTersimpan(path_relatif, sha256, ukuran, baru=True)
+    except BaseException:
+        if os.path.exists(path_sementara):
+            os.remove(path_sementara)
+        raise
+
+
+def hapus_jika_baru(tersimpan):
+    """
+    Membatalkan simpan_upload setelah kegagalan DB. Hanya file yang baru dibuat
+    oleh upload ini yang dihapus; file duplikat mungkin dipakai baris lain.
+    """
+    if tersimpan is None or not tersimpan.baru:
+        return
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], *tersimpan.path_relatif.split('/'))
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,95 @@
+# FILE: management_service/tests/conftest.py
+#
+# Fixture uji Management Service: aplikasi di atas SQLite sementara berisi data
+# contoh yang cukup banyak sehingga pola N+1 (satu query per baris) langsung
+# terlihat pada jumlah query. Jalankan dari root repo: python -m pytest
+#
+# Kolom lokasi di SQLite berupa teks 'POINT(lon lat)'; ST_X/ST_Y didaftarkan
+# sebagai fungsi SQLite agar route yang mengekstrak koordinat tetap berjalan.
+
+import os
+import re
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+DIR_SERVICE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DIR_SERVICE not in sys.path:
+    sys.path.insert(0, DIR_SERVICE)
+
+from main import create_app  # noqa: E402
+from models.aset_model import db, AsetSawah, Penyewa, TransaksiSewa, HargaSewa  # noqa: E402
+from src.statistik import invalidasi_statistik  # noqa: E402
+
+JUMLAH_ASET = 20
+JUMLAH_PENYEWA = 10
+JUMLAH_TRANSAKSI = 60
+
+_POLA_POINT = re.compile(r'POINT\(\s*(\S+)\s+(\S+)\s*\)')
+
+
+def _koordinat(wkt, indeks):
+    cocok = _POLA_POINT.search(wkt or '')
+    return float(cocok.group(indeks)) if cocok else None
+
+
+def _daftarkan_fungsi_spasial(dbapi_conn, _record):
+    dbapi_conn.create_function('ST_X', 1, lambda wkt: _koordinat(wkt, 1))
+    dbapi_conn.create_function('ST_Y', 1, lambda wkt: _koordinat(wkt, 2))
+
+
+def _isi_data_contoh():
+    harga = HargaSewa(harga_per_boto=Decimal('4000000'), tahun_penetapan=2024,
+                      tanggal_mulai_efektif=date(2024, 1, 1))
+    db.session.add(harga)
+    penyewa = [Penyewa(nama_lengkap=f'Penyewa {i}', nik=f'NIK{i:04d}') for i in range(JUMLAH_PENYEWA)]
+    aset = [
+        AsetSawah(nama_sebutan=f'Sawah {i}', nomor_sertifikat=f'SRT-{i:04d}', luas_m2=Decimal('1400'),
+                  luas_boto=Decimal('100'), lokasi=f'POINT(110.{i:02d} -7.{i:02d})', status_sewa='Tersedia')
+        for i in range(JUMLAH_ASET)
+    ]
+    db.session.add_all(penyewa + aset)
+    db.session.flush()
+    for i in range(JUMLAH_TRANSAKSI):
+        tahun = 2020 + i // JUMLAH_ASET
+        db.session.add(TransaksiSewa(
+            aset_id=aset[i % JUMLAH_ASET].aset_id,
+            penyewa_id=penyewa[i % JUMLAH_PENYEWA].penyewa_id,
+            harga_sewa_id=harga.id,
+            tanggal_mulai=date(tahun, 1, 1),
+            tanggal_akhir=date(tahun, 12, 31),
+            durasi_bulan=12,
+            nilai_sewa=Decimal('4000000'),
+            status_pembayaran='Lunas',
+        ))
+    db.session.commit()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'management.db'}",
+        SQLALCHEMY_ENGINE_OPTIONS={},
+        UPLOAD_FOLDER=str(tmp_path / 'uploads'),
+        TILE_CACHE_FOLDER=str(tmp_path / 'tile_cache'),
+        WTF_CSRF_ENABLED=False,
+        HARGA_LISTEN=False,
+        TESTING=True,
+    )
+    with app.app_context():
+        event.listen(db.engine, 'connect', _daftarkan_fungsi_spasial)
+        db.create_all()
+        _isi_data_contoh()
+        # Cache statistik dashboard bersifat global per proses
+        invalidasi_statistik()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,29 @@
+# FILE: management_service/tests/test_ekspor_transaksi.py
+#
+# GET /transaksi/export.csv: filter yang salah ditolak dengan 400, bukan
+# diabaikan sehingga seluruh tabel ikut terekspor.
+
+import pytest
+
+
+@pytest.mark.parametrize('query', [
+    'harga_sewa_id=abc',
+    'harga_sewa_id=1.5',
+    'status_pembayaran=lunas',
+    'dari=2024-13-01',
+])
+def test_filter_tidak_valid_ditolak(client, query):
+    response = client.get(f'/transaksi/export.csv?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_filter_valid(client):
+    response = client.get('/transaksi/export.csv?status_pembayaran=Lunas&harga_sewa_id=1')
+    assert response.status_code == 200
+    baris = response.get_data(as_text=True).strip().splitlines()
+    # Header + 60 transaksi contoh (semua Lunas, harga_sewa_id 1)
+    assert len(baris) == 61
+
+    response = client.get('/transaksi/export.csv?harga_sewa_id=999')
+    assert len(response.get_data(as_text=True).strip().splitlines()) == 1
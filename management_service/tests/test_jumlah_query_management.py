@@ -0,0 +1,36 @@
+# FILE: management_service/tests/test_jumlah_query_management.py
+#
+# Batas jumlah query SQL per route (bersama/profiler_sql.py). Jika sebuah
+# perubahan memunculkan N+1 (misal relasi di template tidak lagi di-joinedload),
+# jumlah query naik sebanding jumlah baris dan uji ini gagal beserta daftar
+# statement yang dijalankan.
+
+import pytest
+
+from bersama.profiler_sql import periksa_jumlah_query
+
+# (url, jumlah query maksimum, teks yang wajib muncul di halaman)
+# Data contoh: 20 aset, 10 penyewa, 60 transaksi (lihat conftest.py)
+BATAS_QUERY = [
+    ('/transaksi/list', 1, 'Penyewa 9'),
+    ('/transaksi/list?per_page=25&sebelum=40', 1, 'Sawah 19'),
+    ('/aset/list', 1, 'Sawah 19'),
+    ('/', 1, None),
+    ('/api/v1/aset', 1, 'SRT-0019'),
+    ('/api/v1/transaksi?per_page=200', 1, None),
+]
+
+
+@pytest.mark.parametrize('url,maks,teks', BATAS_QUERY)
+def test_jumlah_query_route(client, url, maks, teks):
+    response = periksa_jumlah_query(client, url, maks)
+    assert response.status_code == 200
+    if teks:
+        assert teks in response.get_data(as_text=True)
+
+
+def test_daftar_transaksi_menampilkan_relasi(client):
+    """Nama aset dan penyewa dirender dari data yang sudah di-joinedload (tanpa query tambahan)."""
+    response = periksa_jumlah_query(client, '/transaksi/list?per_page=50', 1)
+    body = response.get_data(as_text=True)
+    assert all(f'Penyewa {i}' in body for i in range(10))
@@ -0,0 +1,31 @@
+# FILE: management_service/tests/test_paginasi.py
+#
+# Cursor paginasi keyset (src/pagination.py): cursor yang rusak ditolak,
+# bukan diam-diam dianggap halaman pertama.
+
+import pytest
+
+
+@pytest.mark.parametrize('url', [
+    '/api/v1/transaksi?sebelum=xyz',
+    '/api/v1/aset?sesudah=1.5',
+    '/api/v1/penyewa?sebelum=5&sesudah=abc',
+])
+def test_api_cursor_tidak_valid_400(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert 'sebelum' in response.get_json()['error'] or 'sesudah' in response.get_json()['error']
+
+
+def test_api_cursor_valid(client):
+    response = client.get('/api/v1/transaksi?sebelum=11&per_page=25&fields=sewa_id')
+    assert response.status_code == 200
+    assert [baris['sewa_id'] for baris in response.get_json()['data']] == list(range(10, 0, -1))
+
+
+def test_ui_cursor_tidak_valid_tidak_menampilkan_halaman_pertama(client):
+    response = client.get('/transaksi/list?sebelum=xyz')
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'Halaman tidak valid' in body
+    assert 'Penyewa 0' not in body
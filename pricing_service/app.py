@@ -1,18 +1,30 @@
 # FILE: pricing_service/app.py
+#
+# Application factory Pricing Service.
+#   Development : flask --app pricing_service.app run --port 5003
+#   Produksi    : gunicorn -c pricing_service/gunicorn.conf.py pricing_service.wsgi:app
+# Modul ini tidak membuat aplikasi saat diimpor; API JSON ada di routes/api_routes.py.
 
-from flask import Flask, jsonify
+from flask import Flask
 import os
 from dotenv import load_dotenv
-from datetime import date 
-from sqlalchemy.exc import SQLAlchemyError # Tambahkan untuk penanganan error DB
-from sqlalchemy import func # Tambahkan jika diperlukan
 
 # --- PASTIKAN FILE PENDUKUNG ADA & IMPORT BENAR ---\
 # 1. db_instance.py: Harus berisi db = SQLAlchemy() dan definisi model HargaSewa
-from .db_instance import db, HargaSewa, TransaksiSewa # Pastikan TransaksiSewa diimpor jika diperlukan
-# 2. pricing_routes.py: Blueprint untuk rute web UI
+from .db_instance import db
+# 2. pricing_routes.py: Blueprint untuk rute web UI; api_routes.py: API JSON /api/v1/...
 from .routes.pricing_routes import harga_bp
-import locale # Untuk pemformatan mata uang lokal
+from .routes.api_routes import api_bp
+# 3. antrian.py: antrian job latar belakang (worker: flask --app pricing_service.app worker)
+from .antrian import perintah_worker
+# 4-6. Paket bersama (bersama/ di root repo, dipakai juga oleh management_service):
+#      opsi pool koneksi + statistik pool, endpoint /metrics format Prometheus,
+#      profiler SQL per request + deteksi N+1 (opt-in)
+from bersama.pool_db import opsi_engine
+from bersama.metrik import pasang_metrik
+from bersama.profiler_sql import pasang_profiler
+# 7. notifikasi_harga.py: peristiwa perubahan harga ke Management Service (NOTIFY / webhook)
+from . import notifikasi_harga  # noqa: F401 (mendaftarkan event listener)
 
 def format_currency(value):
     """Memformat nilai numerik ke format mata uang Rupiah (IDR)."""
@@ -36,8 +48,23 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL') 
     SECRET_KEY = os.getenv('SECRET_KEY_PRICING', 'price_secret') 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool koneksi (DB_POOL_SIZE, DB_MAX_OVERFLOW, ... lihat bersama/pool_db.py)
+    SQLALCHEMY_ENGINE_OPTIONS = opsi_engine(SQLALCHEMY_DATABASE_URI, 'pricing_service')
+    # Antrian job latar belakang (lihat antrian.py)
+    JOB_MAKS_PERCOBAAN = int(os.getenv('JOB_MAKS_PERCOBAAN', 5))
+    JOB_BACKOFF_DASAR = int(os.getenv('JOB_BACKOFF_DASAR', 10))
+    JOB_BACKOFF_MAKS = int(os.getenv('JOB_BACKOFF_MAKS', 3600))
+    JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', 900))
+    # Profiler SQL per request (header X-SQL-*), default mati
+    SQL_PROFILER = os.getenv('SQL_PROFILER', '0').lower() in ('1', 'true', 'yes')
+    SQL_PROFILER_AMBANG_N1 = int(os.getenv('SQL_PROFILER_AMBANG_N1', 3))
+    # Notifikasi perubahan harga (lihat notifikasi_harga.py)
+    HARGA_NOTIFIKASI = os.getenv('HARGA_NOTIFIKASI', 'auto').lower()
+    HARGA_WEBHOOK_SECRET = os.getenv('HARGA_WEBHOOK_SECRET', '')
+    MANAGEMENT_SERVICE_URL = os.getenv('MANAGEMENT_SERVICE_URL', 'http://127.0.0.1:5002')
     
-def create_app(config_class=Config):
+def create_app(config_class=Config, **config_tambahan):
+    """Membangun aplikasi Pricing Service. `config_tambahan` menimpa nilai Config (misal untuk benchmark)."""
     app = Flask(__name__)
     
     # KOREKSI: Gunakan from_mapping() untuk memuat konfigurasi dari Config Class secara langsung.
@@ -45,8 +72,19 @@ def create_app(config_class=Config):
     app.config.from_mapping(
         SQLALCHEMY_DATABASE_URI=config_class.SQLALCHEMY_DATABASE_URI,
         SECRET_KEY=config_class.SECRET_KEY,
-        SQLALCHEMY_TRACK_MODIFICATIONS=config_class.SQLALCHEMY_TRACK_MODIFICATIONS
+        SQLALCHEMY_TRACK_MODIFICATIONS=config_class.SQLALCHEMY_TRACK_MODIFICATIONS,
+        SQLALCHEMY_ENGINE_OPTIONS=config_class.SQLALCHEMY_ENGINE_OPTIONS,
+        JOB_MAKS_PERCOBAAN=config_class.JOB_MAKS_PERCOBAAN,
+        JOB_BACKOFF_DASAR=config_class.JOB_BACKOFF_DASAR,
+        JOB_BACKOFF_MAKS=config_class.JOB_BACKOFF_MAKS,
+        JOB_TIMEOUT=config_class.JOB_TIMEOUT,
+        SQL_PROFILER=config_class.SQL_PROFILER,
+        SQL_PROFILER_AMBANG_N1=config_class.SQL_PROFILER_AMBANG_N1,
+        HARGA_NOTIFIKASI=config_class.HARGA_NOTIFIKASI,
+        HARGA_WEBHOOK_SECRET=config_class.HARGA_WEBHOOK_SECRET,
+        MANAGEMENT_SERVICE_URL=config_class.MANAGEMENT_SERVICE_URL,
     )
+    app.config.update(config_tambahan)
     # --- PENDAFTARAN FILTER JINJA2 ---\
     # Daftarkan fungsi format_currency agar bisa dipanggil di template
     app.jinja_env.filters['format_currency'] = format_currency
@@ -54,66 +92,9 @@ def create_app(config_class=Config):
     # INISIALISASI DB DAN BLUEPRINT
     db.init_app(app) # db diimpor dari .db_instance
     app.register_blueprint(harga_bp)
+    app.register_blueprint(api_bp)
+    app.cli.add_command(perintah_worker)
+    pasang_metrik(app, db)
+    pasang_profiler(app)
     
     return app
-
-# --- PEMANGGILAN APLIKASI UTAMA (HANYA SEKALI) ---\
-app = create_app()
-
-
-# =====================================================================
-# --- API ENDPOINT (Wajib oleh Management Service) ---
-# =====================================================================
-
-# 1. API: HARGA SAAT INI (get_current_price)
-@app.route('/api/v1/harga/boto/current', methods=['GET'])
-def get_current_price():
-    """Mengembalikan harga sewa per boto yang paling baru dan masih berlaku hari ini."""
-    today = date.today() 
-    
-    # Cari harga yang TANGGAL MULAI EFEKTIF-nya sudah berlaku dan paling baru
-    harga = HargaSewa.query.filter(
-        HargaSewa.tanggal_mulai_efektif <= today 
-    ).order_by(
-        HargaSewa.tanggal_mulai_efektif.desc() 
-    ).first()
-    
-    if harga:
-        return jsonify({
-            'harga_id': harga.id,
-            'harga_per_boto': str(harga.harga_per_boto), # Kirim sebagai string agar aman
-            'tahun_penetapan': harga.tahun_penetapan
-        }), 200
-    else:
-        # Jika tidak ada harga yang berlaku
-        return jsonify({
-            'harga_id': None, 
-            'harga_per_boto': '0', 
-            'tahun_penetapan': None,
-            'message': 'Tidak ada harga sewa per boto yang berlaku saat ini.'
-        }), 404
-
-# 2. API: LIST SEMUA HARGA (list_all_harga - Dipindahkan dari pricing_routes.py)
-@app.route('/api/v1/harga/list_all', methods=['GET'])
-def list_all_harga():
-    """Mengembalikan daftar semua harga (ID, Harga, Tahun) dalam format JSON."""
-    
-    try:
-        # Ambil semua harga yang pernah ditetapkan
-        riwayat = HargaSewa.query.order_by(HargaSewa.tanggal_mulai_efektif.desc()).all()
-        
-        data = [{
-            'id': h.id, 
-            # Label yang mudah dibaca di dropdown Management Service
-            'label': f"Rp {h.harga_per_boto:,.0f} (Tahun {h.tahun_penetapan}, Mulai {h.tanggal_mulai_efektif.strftime('%d-%m-%Y') if h.tanggal_mulai_efektif else 'N/A'})",
-            'harga_per_boto': str(h.harga_per_boto) # Harus string agar aman dalam JSON
-        } for h in riwayat]
-        
-        return jsonify(data), 200
-    
-    except Exception as e:
-        # Jika ada error database atau lainnya
-        return jsonify({
-            'error': 'Gagal mengambil data harga.',
-            'details': str(e)
-        }), 500
\ No newline at end of file
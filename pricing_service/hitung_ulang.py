@@ -0,0 +1,85 @@
+# FILE: pricing_service/hitung_ulang.py
+#
+# Hitung ulang nilai_sewa transaksi setelah harga_per_boto diubah.
+# Semua transaksi yang terdampak diperbarui dengan SATU statement
+# UPDATE ... FROM harga_sewa, aset_sawah (rumus sama dengan tarif.py):
+#   nilai_sewa = ROUND(luas_boto * (harga_per_boto / 100) * (durasi_bulan / 12), 2)
+
+from flask import current_app
+from sqlalchemy import text
+
+from .db_instance import db
+from .antrian import antrikan_sekali
+
+# Ekspresi SQL nilai sewa baru (alias: t = transaksi_sewa, h = harga_sewa, a = aset_sawah)
+NILAI_BARU_SQL = "ROUND(a.luas_boto * (h.harga_per_boto / 100) * (CAST(t.durasi_bulan AS NUMERIC) / 12), 2)"
+
+
+def _filter(harga_id):
+    """Kondisi WHERE bersama untuk pratinjau dan update."""
+    kondisi = [
+        "h.id = t.harga_sewa_id",
+        "a.aset_id = t.aset_id",
+        "a.luas_boto IS NOT NULL",
+        # Hanya baris yang nilainya benar-benar berubah
+        f"t.nilai_sewa IS DISTINCT FROM {NILAI_BARU_SQL}",
+    ]
+    params = {}
+    if harga_id is not None:
+        kondisi.append("t.harga_sewa_id = :harga_id")
+        params['harga_id'] = harga_id
+    return " AND ".join(kondisi), params
+
+
+def pratinjau_nilai_sewa(harga_id=None, batas=200):
+    """
+    Mode dry-run: mengembalikan ringkasan dan contoh perubahan tanpa menulis apa pun.
+    Hasil: {'jumlah': int, 'total_lama': Decimal, 'total_baru': Decimal, 'perubahan': [row, ...]}
+    """
+    where, params = _filter(harga_id)
+
+    ringkasan = db.session.execute(text(f"""
+        SELECT COUNT(*) AS jumlah,
+               COALESCE(SUM(t.nilai_sewa), 0) AS total_lama,
+               COALESCE(SUM({NILAI_BARU_SQL}), 0) AS total_baru
+        FROM transaksi_sewa t, harga_sewa h, aset_sawah a
+        WHERE {where}
+    """), params).mappings().one()
+
+    perubahan = db.session.execute(text(f"""
+        SELECT t.sewa_id, t.harga_sewa_id, t.durasi_bulan, a.luas_boto, h.harga_per_boto,
+               t.nilai_sewa AS nilai_lama,
+               {NILAI_BARU_SQL} AS nilai_baru
+        FROM transaksi_sewa t, harga_sewa h, aset_sawah a
+        WHERE {where}
+        ORDER BY t.sewa_id
+        LIMIT :batas
+    """), {**params, 'batas': batas}).mappings().all()
+
+    return {
+        'jumlah': ringkasan['jumlah'],
+        'total_lama': ringkasan['total_lama'],
+        'total_baru': ringkasan['total_baru'],
+        'perubahan': perubahan,
+    }
+
+
+def hitung_ulang_nilai_sewa(harga_id=None):
+    """
+    Memperbarui nilai_sewa semua transaksi terdampak dalam satu round-trip.
+    TIDAK melakukan commit: pemanggil menentukan batas transaksinya (misal
+    bersama perubahan harga di edit_harga). Mengembalikan jumlah baris diubah.
+    """
+    where, params = _filter(harga_id)
+    result = db.session.execute(text(f"""
+        UPDATE transaksi_sewa AS t
+        SET nilai_sewa = {NILAI_BARU_SQL}
+        FROM harga_sewa h, aset_sawah a
+        WHERE {where}
+    """), params)
+    if result.rowcount and db.engine.dialect.name == 'postgresql':
+        # Rollup pendapatan Management Service (mv_pendapatan_*) ikut berubah; job
+        # 'refresh_analitik' dijalankan worker management_service setelah commit ini
+        antrikan_sekali('refresh_analitik', tunda_detik=current_app.config.get('ANALITIK_REFRESH_TUNDA', 10),
+                        antrian='management')
+    return result.rowcount
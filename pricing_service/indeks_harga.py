@@ -0,0 +1,201 @@
+# FILE: pricing_service/indeks_harga.py
+#
+# Indeks interval di memori untuk resolusi harga berdasarkan tanggal efektif.
+# Katalog harga kecil (puluhan baris) tetapi dibaca di setiap request, jadi
+# seluruh katalog disimpan terurut dan dicari dengan bisect, bukan ORDER BY
+# ke tabel harga_sewa untuk setiap tanggal.
+
+import hashlib
+import threading
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import timedelta, timezone
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import event, func
+
+from .db_instance import db, HargaSewa
+
+SKALA_HARGA = Decimal('0.01')
+
+# Salinan data murni (bukan objek ORM) agar aman dipakai lintas request/thread
+EntriHarga = namedtuple('EntriHarga', [
+    'id', 'harga_per_boto', 'tanggal_mulai_efektif', 'tanggal_akhir_efektif',
+    'tahun_penetapan', 'tanggal_diperbarui',
+])
+
+
+def _sebagai_utc(waktu):
+    """Menormalkan datetime (naive dianggap UTC) agar bisa dibandingkan antar sumber."""
+    if waktu is None:
+        return None
+    if waktu.tzinfo is None:
+        waktu = waktu.replace(tzinfo=timezone.utc)
+    return waktu.astimezone(timezone.utc)
+
+
+def sidik_katalog():
+    """
+    Penanda versi katalog harga: (max tanggal_diperbarui, jumlah baris).
+    Satu query agregat kecil, jauh lebih murah daripada memuat seluruh katalog.
+    """
+    terakhir, jumlah = db.session.query(
+        func.max(HargaSewa.tanggal_diperbarui),
+        func.count(HargaSewa.id)
+    ).one()
+    return _sebagai_utc(terakhir), jumlah
+
+
+class IndeksHarga:
+    """Katalog harga terurut + segmen interval tanpa tumpang tindih."""
+
+    def __init__(self, entri, sidik):
+        self.sidik = sidik
+        self.per_id = {e.id: e for e in entri}
+        self.digest = self._hitung_digest(self.per_id)
+
+        # Urut naik berdasarkan (mulai efektif, id) untuk pencarian "harga terbaru
+        # yang sudah mulai berlaku" (semantik lama get_current_price).
+        self._urut = sorted(
+            (e for e in entri if e.tanggal_mulai_efektif is not None),
+            key=lambda e: (e.tanggal_mulai_efektif, e.id)
+        )
+        self._mulai = [e.tanggal_mulai_efektif for e in self._urut]
+
+        self._batas, self._pemenang = self._bangun_segmen(self._urut)
+
+    @staticmethod
+    def _hitung_digest(per_id):
+        """
+        SHA-1 isi katalog (id, harga, tanggal efektif, tahun) untuk ETag. Berbeda
+        dengan sidik, nilai ini pasti berubah jika isi harga berubah, meskipun
+        tanggal_diperbarui tidak bergeser (dua perubahan dalam satu tick jam).
+        """
+        h = hashlib.sha1()
+        for id_harga in sorted(per_id):
+            e = per_id[id_harga]
+            h.update(f'{e.id}|{e.harga_per_boto}|{e.tanggal_mulai_efektif}|'
+                     f'{e.tanggal_akhir_efektif}|{e.tahun_penetapan}\n'.encode('utf-8'))
+        return h.hexdigest()
+
+    @staticmethod
+    def _bangun_segmen(urut):
+        """
+        Memecah semua interval [mulai, akhir] menjadi segmen elementer yang tidak
+        saling tumpang tindih. Setiap segmen [batas[i], batas[i+1]) memiliki satu
+        harga pemenang: harga dengan mulai efektif paling baru yang mencakup segmen
+        tersebut (sama dengan aturan get_current_price), atau None jika kosong.
+        """
+        titik = set()
+        for e in urut:
+            titik.add(e.tanggal_mulai_efektif)
+            if e.tanggal_akhir_efektif is not None:
+                titik.add(e.tanggal_akhir_efektif + timedelta(days=1))
+
+        batas, pemenang = [], []
+        for t in sorted(titik):
+            kandidat = [
+                e for e in urut
+                if e.tanggal_mulai_efektif <= t
+                and (e.tanggal_akhir_efektif is None or e.tanggal_akhir_efektif >= t)
+            ]
+            menang = max(kandidat, key=lambda e: (e.tanggal_mulai_efektif, e.id)) if kandidat else None
+            # Gabungkan segmen berurutan dengan pemenang yang sama
+            if pemenang and pemenang[-1] is menang:
+                continue
+            batas.append(t)
+            pemenang.append(menang)
+        return batas, pemenang
+
+    def __len__(self):
+        return len(self.per_id)
+
+    def semua_terbaru_dulu(self):
+        """Semua harga, mulai efektif terbaru lebih dulu."""
+        return list(reversed(self._urut))
+
+    def terbaru_sebelum(self, tanggal):
+        """Harga dengan mulai efektif <= tanggal yang paling baru (tanpa melihat tanggal akhir)."""
+        i = bisect_right(self._mulai, tanggal) - 1
+        return self._urut[i] if i >= 0 else None
+
+    def harga_pada(self, tanggal):
+        """Harga yang berlaku pada `tanggal` (mulai <= tanggal <= akhir), atau None."""
+        i = bisect_right(self._batas, tanggal) - 1
+        return self._pemenang[i] if i >= 0 else None
+
+    def harga_pada_banyak(self, daftar_tanggal):
+        """Resolusi batch: satu bisect per tanggal, tanpa query SQL."""
+        return [self.harga_pada(t) for t in daftar_tanggal]
+
+
+def entri_katalog(harga):
+    """
+    Satu entri katalog untuk Management Service (GET /api/v1/harga/list_all dan
+    notifikasi perubahan harga). `harga` boleh EntriHarga maupun objek HargaSewa.
+    """
+    return {
+        'id': harga.id,
+        # Label yang mudah dibaca di dropdown Management Service
+        'label': f"Rp {harga.harga_per_boto:,.0f} (Tahun {harga.tahun_penetapan}, Mulai {harga.tanggal_mulai_efektif.strftime('%d-%m-%Y') if harga.tanggal_mulai_efektif else 'N/A'})",
+        # Harus string agar aman dalam JSON; skala 2 desimal seperti kolom Numeric(10, 2),
+        # karena objek yang baru di-flush masih membawa nilai mentah dari form
+        'harga_per_boto': str(Decimal(str(harga.harga_per_boto)).quantize(SKALA_HARGA)),
+        # Kunci urutan katalog (terbaru dulu) agar klien bisa menyisipkan entri baru
+        'tanggal_mulai_efektif': harga.tanggal_mulai_efektif.isoformat() if harga.tanggal_mulai_efektif else None,
+    }
+
+
+def _muat_indeks(sidik):
+    rows = db.session.query(
+        HargaSewa.id,
+        HargaSewa.harga_per_boto,
+        HargaSewa.tanggal_mulai_efektif,
+        HargaSewa.tanggal_akhir_efektif,
+        HargaSewa.tahun_penetapan,
+        HargaSewa.tanggal_diperbarui,
+    ).all()
+    return IndeksHarga([EntriHarga(*row) for row in rows], sidik)
+
+
+# --- STATE INDEKS PER PROSES ---
+_lock = threading.Lock()
+_indeks = None
+_dicek_pada = 0.0
+_kotor = False
+
+
+def tandai_kotor(*_args, **_kwargs):
+    """Memaksa pengecekan ulang sidik katalog pada akses berikutnya."""
+    global _kotor
+    _kotor = True
+
+
+# Perubahan harga dari proses ini langsung menandai indeks kotor.
+# Perubahan dari proses/worker lain terdeteksi lewat sidik katalog
+# (paling lambat PRICE_INDEX_RECHECK detik).
+for _nama_event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(HargaSewa, _nama_event, tandai_kotor)
+
+
+def get_indeks():
+    """Mengembalikan indeks harga terkini, membangun ulang jika katalog berubah."""
+    global _indeks, _dicek_pada, _kotor
+
+    interval_cek = current_app.config.get('PRICE_INDEX_RECHECK', 5)
+    sekarang = time.monotonic()
+    if _indeks is not None and not _kotor and sekarang - _dicek_pada < interval_cek:
+        return _indeks
+
+    with _lock:
+        # Perubahan lokal yang diketahui selalu memicu bangun ulang, karena dua
+        # perubahan dalam satu tick jam bisa menghasilkan sidik yang sama.
+        bangun_ulang = _kotor or _indeks is None
+        _kotor = False
+        sidik = sidik_katalog()
+        if bangun_ulang or _indeks.sidik != sidik:
+            _indeks = _muat_indeks(sidik)
+        _dicek_pada = time.monotonic()
+        return _indeks
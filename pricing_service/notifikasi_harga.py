@@ -0,0 +1,136 @@
+# FILE: pricing_service/notifikasi_harga.py
+#
+# Publikasi peristiwa perubahan katalog harga ke Management Service.
+# - Postgres: pg_notify('harga_berubah', payload) dijalankan di dalam transaksi
+#   yang sama dengan INSERT/UPDATE/DELETE harga_sewa, sehingga pesan hanya
+#   terkirim jika transaksi di-commit (dan tidak pernah jika di-rollback).
+#   Management Service mendengarkan channel ini (management_service/src/langganan_harga.py).
+# - Webhook (fallback, misal database terpisah atau SQLite): setelah commit,
+#   POST ke MANAGEMENT_SERVICE_URL/sistem/webhook/harga di thread latar belakang,
+#   ditandatangani HMAC-SHA256 dengan HARGA_WEBHOOK_SECRET atas "<timestamp>.<body>"
+#   (header X-Harga-Timestamp, ditolak penerima jika terlalu lama: replay).
+#   Tanpa HARGA_WEBHOOK_SECRET webhook tidak dikirim (penerima menolaknya).
+# HARGA_NOTIFIKASI: auto (notify di Postgres, webhook selain itu) | notify | webhook | keduanya | mati
+#
+# Payload: {"aksi": "insert"|"update"|"delete", "harga_id": 3, "entri": {...}|null}
+# `entri` berformat sama dengan satu elemen GET /api/v1/harga/list_all.
+
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session, object_session
+
+from .db_instance import HargaSewa
+from .indeks_harga import entri_katalog
+
+CHANNEL = 'harga_berubah'
+PATH_WEBHOOK = '/sistem/webhook/harga'
+HEADER_TANDA_TANGAN = 'X-Harga-Signature'
+HEADER_TIMESTAMP = 'X-Harga-Timestamp'
+
+WEBHOOK_TIMEOUT = 5          # detik per percobaan
+WEBHOOK_PERCOBAAN = 3
+WEBHOOK_JEDA = (1, 5)        # detik sebelum percobaan ke-2, ke-3
+
+_KUNCI_TERTUNDA = '_webhook_harga_tertunda'
+
+
+def tanda_tangan(secret, timestamp, body):
+    """HMAC-SHA256 atas "<timestamp>.<body>" (hex), sama dengan penerima di Management Service."""
+    pesan = f'{timestamp}.'.encode('utf-8') + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), pesan, hashlib.sha256).hexdigest()
+
+
+def _mode(dialect):
+    mode = current_app.config.get('HARGA_NOTIFIKASI', 'auto')
+    if mode == 'auto':
+        mode = 'notify' if dialect == 'postgresql' else 'webhook'
+    return {
+        'notify': dialect == 'postgresql' and mode in ('notify', 'keduanya'),
+        'webhook': mode in ('webhook', 'keduanya'),
+    }
+
+
+def _peristiwa(aksi, harga):
+    return {
+        'aksi': aksi,
+        'harga_id': harga.id,
+        'entri': entri_katalog(harga) if aksi != 'delete' else None,
+    }
+
+
+def _catat_perubahan(aksi):
+    def handler(mapper, connection, target):
+        if not has_app_context():
+            return
+        mode = _mode(connection.dialect.name)
+        peristiwa = _peristiwa(aksi, target)
+        if mode['notify']:
+            # Ikut transaksi aktif: dikirim Postgres saat COMMIT
+            connection.execute(select(func.pg_notify(CHANNEL, json.dumps(peristiwa))))
+        if mode['webhook']:
+            session = object_session(target)
+            if session is not None:
+                session.info.setdefault(_KUNCI_TERTUNDA, []).append(peristiwa)
+    return handler
+
+
+for _aksi, _nama_event in (('insert', 'after_insert'), ('update', 'after_update'), ('delete', 'after_delete')):
+    event.listen(HargaSewa, _nama_event, _catat_perubahan(_aksi))
+
+
+# ---------------------------------------------------------------------
+# WEBHOOK SETELAH COMMIT
+# ---------------------------------------------------------------------
+
+def _kirim_webhook(url, secret, peristiwa):
+    body = json.dumps({'peristiwa': peristiwa}).encode('utf-8')
+    timestamp = str(int(time.time()))
+    headers = {
+        'Content-Type': 'application/json',
+        HEADER_TIMESTAMP: timestamp,
+        HEADER_TANDA_TANGAN: tanda_tangan(secret, timestamp, body),
+    }
+
+    for percobaan in range(WEBHOOK_PERCOBAAN):
+        try:
+            req = urllib.request.Request(url, data=body, headers=headers, method='POST')
+            with urllib.request.urlopen(req, timeout=WEBHOOK_TIMEOUT):
+                return True
+        except (urllib.error.URLError, OSError) as e:
+            logging.warning(f"Webhook harga ke {url} gagal (percobaan {percobaan + 1}): {e}")
+            if percobaan < len(WEBHOOK_JEDA):
+                time.sleep(WEBHOOK_JEDA[percobaan])
+    # Management Service tetap konsisten lewat TTL cache katalognya
+    return False
+
+
+@event.listens_for(Session, 'after_commit')
+def _setelah_commit(session):
+    peristiwa = session.info.pop(_KUNCI_TERTUNDA, None)
+    if not peristiwa or not has_app_context():
+        return
+    config = current_app.config
+    secret = config.get('HARGA_WEBHOOK_SECRET', '')
+    if not secret:
+        logging.warning('Webhook harga tidak dikirim: HARGA_WEBHOOK_SECRET belum diisi.')
+        return
+    url = config.get('MANAGEMENT_SERVICE_URL', 'http://127.0.0.1:5002').rstrip('/') + PATH_WEBHOOK
+    threading.Thread(
+        target=_kirim_webhook,
+        args=(url, secret, peristiwa),
+        daemon=True,
+    ).start()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _setelah_rollback(session):
+    session.info.pop(_KUNCI_TERTUNDA, None)
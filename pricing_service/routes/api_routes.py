@@ -0,0 +1,306 @@
+# FILE: pricing_service/routes/api_routes.py
+#
+# API JSON Pricing Service (dipanggil Management Service): harga berlaku,
+# katalog harga, kutipan nilai sewa, statistik pool dan status job.
+# Didaftarkan tanpa prefix di create_app() (pricing_service/app.py).
+
+import hashlib
+from datetime import date, datetime, time, timezone
+from decimal import Decimal, InvalidOperation
+
+from flask import Blueprint, current_app, jsonify, make_response, request
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..db_instance import db
+# indeks_harga.py: indeks interval harga di memori (bisect per tanggal)
+from ..indeks_harga import get_indeks, entri_katalog
+from ..tarif import hitung_nilai_sewa
+from ..antrian import AntrianJob
+from bersama.pool_db import info_pool
+
+api_bp = Blueprint('api', __name__)
+
+
+# --- HELPER: CONDITIONAL GET (ETag / Last-Modified) ---
+
+def respon_kondisional(bangun_respon, kunci_tambahan='', diubah_minimal=None):
+    """
+    Menjalankan `bangun_respon()` hanya jika klien belum memiliki versi terbaru.
+
+    - ETag kuat dihitung dari digest isi indeks harga + `kunci_tambahan` (misal tanggal hari ini).
+    - Last-Modified = max(tanggal_diperbarui), atau `diubah_minimal` jika lebih baru.
+    - Jika If-None-Match / If-Modified-Since cocok, langsung kembalikan 304 tanpa
+      menyentuh baris HargaSewa sama sekali.
+    """
+    # Digest dihitung saat indeks dibangun ulang (tanpa query selama indeks masih segar).
+    # Bukan dari sidik (max tanggal_diperbarui, jumlah): perubahan harga dalam tick
+    # jam yang sama tidak menggeser sidik sehingga klien akan menerima 304 basi.
+    indeks = get_indeks()
+    terakhir = indeks.sidik[0]
+    etag = hashlib.sha1(f'{indeks.digest}|{kunci_tambahan}'.encode('utf-8')).hexdigest()
+
+    # Header HTTP hanya berpresisi detik
+    if terakhir is not None:
+        terakhir = terakhir.replace(microsecond=0)
+    if diubah_minimal is not None and (terakhir is None or diubah_minimal > terakhir):
+        terakhir = diubah_minimal
+
+    if request.if_none_match:
+        tidak_berubah = request.if_none_match.contains(etag)
+    else:
+        tidak_berubah = (
+            request.if_modified_since is not None
+            and terakhir is not None
+            and terakhir <= request.if_modified_since
+        )
+
+    if tidak_berubah:
+        response = make_response('', 304)
+    else:
+        response = make_response(bangun_respon())
+
+    response.set_etag(etag)
+    if terakhir is not None:
+        response.last_modified = terakhir
+    # Klien boleh menyimpan, tetapi wajib revalidasi (murah karena 304)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# 1. API: HARGA SAAT INI (get_current_price)
+@api_bp.route('/api/v1/harga/boto/current', methods=['GET'])
+def get_current_price():
+    """Mengembalikan harga sewa per boto yang paling baru dan masih berlaku hari ini."""
+    today = date.today() 
+
+    # Hasil bergantung pada tanggal hari ini, jadi tanggal ikut menjadi bagian ETag
+    awal_hari = datetime.combine(today, time.min, tzinfo=timezone.utc)
+    return respon_kondisional(lambda: _harga_saat_ini(today), kunci_tambahan=today.isoformat(), diubah_minimal=awal_hari)
+
+
+def _harga_saat_ini(today):
+    # Cari harga yang TANGGAL MULAI EFEKTIF-nya sudah berlaku dan paling baru (bisect di indeks)
+    harga = get_indeks().terbaru_sebelum(today)
+    
+    if harga:
+        return jsonify({
+            'harga_id': harga.id,
+            'harga_per_boto': str(harga.harga_per_boto), # Kirim sebagai string agar aman
+            'tahun_penetapan': harga.tahun_penetapan
+        }), 200
+    else:
+        # Jika tidak ada harga yang berlaku
+        return jsonify({
+            'harga_id': None, 
+            'harga_per_boto': '0', 
+            'tahun_penetapan': None,
+            'message': 'Tidak ada harga sewa per boto yang berlaku saat ini.'
+        }), 404
+
+# 2. API: LIST SEMUA HARGA (list_all_harga - Dipindahkan dari pricing_routes.py)
+@api_bp.route('/api/v1/harga/list_all', methods=['GET'])
+def list_all_harga():
+    """Mengembalikan daftar semua harga (ID, Harga, Tahun) dalam format JSON."""
+    
+    try:
+        return respon_kondisional(_daftar_semua_harga)
+    except Exception as e:
+        # Jika ada error database atau lainnya
+        return jsonify({
+            'error': 'Gagal mengambil data harga.',
+            'details': str(e)
+        }), 500
+
+
+def _daftar_semua_harga():
+    # Ambil semua harga yang pernah ditetapkan (sudah terurut di indeks)
+    riwayat = get_indeks().semua_terbaru_dulu()
+    
+    data = [entri_katalog(h) for h in riwayat]
+    
+    return jsonify(data), 200
+
+
+# 3. API: HARGA YANG BERLAKU PADA TANGGAL TERTENTU
+def _entri_ke_dict(harga):
+    return {
+        'harga_id': harga.id,
+        'harga_per_boto': str(harga.harga_per_boto),
+        'tahun_penetapan': harga.tahun_penetapan,
+        'tanggal_mulai_efektif': harga.tanggal_mulai_efektif.isoformat() if harga.tanggal_mulai_efektif else None,
+        'tanggal_akhir_efektif': harga.tanggal_akhir_efektif.isoformat() if harga.tanggal_akhir_efektif else None,
+    }
+
+
+@api_bp.route('/api/v1/harga/at', methods=['GET'])
+def get_price_at():
+    """Mengembalikan harga yang berlaku pada ?date=YYYY-MM-DD (mulai <= date <= akhir)."""
+    try:
+        tanggal = date.fromisoformat(request.args.get('date', ''))
+    except ValueError:
+        return jsonify({'error': 'Parameter date wajib dalam format YYYY-MM-DD.'}), 400
+
+    return respon_kondisional(lambda: _harga_pada(tanggal), kunci_tambahan=f'at|{tanggal.isoformat()}')
+
+
+def _harga_pada(tanggal):
+    harga = get_indeks().harga_pada(tanggal)
+    if harga is None:
+        return jsonify({
+            'tanggal': tanggal.isoformat(),
+            'harga_id': None,
+            'message': 'Tidak ada harga sewa yang berlaku pada tanggal tersebut.'
+        }), 404
+    return jsonify({'tanggal': tanggal.isoformat(), **_entri_ke_dict(harga)}), 200
+
+
+# 4. API: RESOLUSI HARGA BATCH UNTUK BANYAK TANGGAL
+@api_bp.route('/api/v1/harga/at/batch', methods=['POST'])
+def get_price_at_batch():
+    """
+    Body JSON: {"dates": ["2024-01-01", ...]}
+    Mengembalikan harga yang berlaku untuk setiap tanggal dalam satu panggilan
+    (urutan hasil sama dengan urutan input; harga_id null jika tidak ada).
+    """
+    payload = request.get_json(silent=True) or {}
+    daftar = payload.get('dates')
+    if not isinstance(daftar, list):
+        return jsonify({'error': 'Body JSON wajib berisi array "dates".'}), 400
+
+    batas = current_app.config.get('PRICE_AT_BATCH_MAX', 10000)
+    if len(daftar) > batas:
+        return jsonify({'error': f'Maksimal {batas} tanggal per permintaan.'}), 400
+
+    tanggal_list = []
+    for i, teks in enumerate(daftar):
+        try:
+            tanggal_list.append(date.fromisoformat(teks))
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Tanggal ke-{i} tidak valid: {teks!r}. Gunakan format YYYY-MM-DD.'}), 400
+
+    hasil = []
+    for tanggal, harga in zip(tanggal_list, get_indeks().harga_pada_banyak(tanggal_list)):
+        if harga is None:
+            hasil.append({'tanggal': tanggal.isoformat(), 'harga_id': None, 'harga_per_boto': None})
+        else:
+            hasil.append({'tanggal': tanggal.isoformat(), 'harga_id': harga.id, 'harga_per_boto': str(harga.harga_per_boto)})
+
+    return jsonify({'hasil': hasil}), 200
+
+
+# 5. API: KUTIPAN NILAI SEWA BATCH (quote)
+# Batas sesuai kolom Management Service: luas_boto NUMERIC(10, 2), nilai_sewa NUMERIC(15, 2)
+LUAS_BOTO_MAKS = Decimal('1e8')
+NILAI_SEWA_MAKS = Decimal('1e13')
+DURASI_BULAN_MAKS = 1200
+
+
+def _bilangan_bulat(nilai):
+    """int dari angka/string bilangan bulat; ValueError untuk pecahan (6.9), bool, None, dll."""
+    if isinstance(nilai, bool):
+        raise ValueError(nilai)
+    if isinstance(nilai, int):
+        return nilai
+    if isinstance(nilai, float) and nilai.is_integer():
+        return int(nilai)
+    if isinstance(nilai, str):
+        return int(nilai)
+    raise ValueError(nilai)
+
+
+def _kutip_satu(indeks, i, baris):
+    """Menghitung satu baris kutipan. Mengembalikan dict hasil atau dict berisi 'error'."""
+    if not isinstance(baris, dict):
+        return {'indeks': i, 'error': 'Baris harus berupa objek JSON.'}
+
+    # 1. Tentukan harga: berdasarkan harga_id atau tanggal berlaku
+    if baris.get('harga_id') is not None:
+        if isinstance(baris['harga_id'], bool) or not isinstance(baris['harga_id'], int):
+            return {'indeks': i, 'error': 'harga_id harus bilangan bulat.'}
+        harga = indeks.per_id.get(baris['harga_id'])
+        if harga is None:
+            return {'indeks': i, 'error': f"harga_id {baris['harga_id']} tidak ditemukan."}
+    elif baris.get('date') is not None:
+        try:
+            tanggal = date.fromisoformat(baris['date'])
+        except (TypeError, ValueError):
+            return {'indeks': i, 'error': 'date harus dalam format YYYY-MM-DD.'}
+        harga = indeks.harga_pada(tanggal)
+        if harga is None:
+            return {'indeks': i, 'error': f'Tidak ada harga yang berlaku pada {tanggal.isoformat()}.'}
+    else:
+        return {'indeks': i, 'error': 'Wajib mengisi harga_id atau date.'}
+
+    # 2. Validasi luas dan durasi (luas dikirim sebagai string agar presisi terjaga)
+    try:
+        luas_boto = Decimal(str(baris.get('luas_boto')))
+        durasi_bulan = _bilangan_bulat(baris.get('durasi_bulan'))
+    except (TypeError, ValueError, InvalidOperation):
+        return {'indeks': i, 'error': 'luas_boto harus angka dan durasi_bulan harus bilangan bulat.'}
+    if not luas_boto.is_finite() or not 0 <= luas_boto < LUAS_BOTO_MAKS:
+        return {'indeks': i, 'error': f'luas_boto harus di antara 0 dan {LUAS_BOTO_MAKS:,.0f}.'}
+    if not 1 <= durasi_bulan <= DURASI_BULAN_MAKS:
+        return {'indeks': i, 'error': f'durasi_bulan harus di antara 1 dan {DURASI_BULAN_MAKS}.'}
+
+    # 3. Hitung nilai sewa (quantize bisa gagal jika hasilnya di luar presisi Decimal)
+    try:
+        nilai_sewa = hitung_nilai_sewa(luas_boto, harga.harga_per_boto, durasi_bulan)
+    except (TypeError, InvalidOperation):
+        return {'indeks': i, 'error': 'Nilai sewa tidak dapat dihitung dari luas_boto dan durasi_bulan ini.'}
+    if nilai_sewa >= NILAI_SEWA_MAKS:
+        return {'indeks': i, 'error': 'Nilai sewa melebihi batas yang dapat disimpan.'}
+
+    return {
+        'indeks': i,
+        'harga_id': harga.id,
+        'harga_per_boto': str(harga.harga_per_boto),
+        'luas_boto': str(luas_boto),
+        'durasi_bulan': durasi_bulan,
+        'nilai_sewa': str(nilai_sewa),
+    }
+
+
+@api_bp.route('/api/v1/harga/quote', methods=['POST'])
+def quote_harga():
+    """
+    Body JSON: {"items": [{"harga_id": 3 | "date": "2025-01-01", "luas_boto": "12.50", "durasi_bulan": 12}, ...]}
+    Mengembalikan nilai sewa eksak (Decimal, string 2 desimal) untuk semua baris
+    dalam satu round-trip. Baris yang tidak valid berisi 'error' tanpa
+    menggagalkan baris lainnya (misal durasi_bulan 6.9 tidak dibulatkan diam-diam).
+    """
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('items')
+    if not isinstance(items, list):
+        return jsonify({'error': 'Body JSON wajib berisi array "items".'}), 400
+
+    batas = current_app.config.get('PRICE_QUOTE_MAX', 5000)
+    if len(items) > batas:
+        return jsonify({'error': f'Maksimal {batas} baris per permintaan.'}), 400
+
+    # Satu snapshot indeks untuk seluruh batch agar semua baris memakai katalog yang sama
+    indeks = get_indeks()
+    hasil = [_kutip_satu(indeks, i, baris) for i, baris in enumerate(items)]
+    jumlah_error = sum(1 for h in hasil if 'error' in h)
+
+    return jsonify({'hasil': hasil, 'jumlah_error': jumlah_error}), 200
+
+
+# --- STATISTIK POOL KONEKSI DB ---
+
+@api_bp.route('/sistem/pool', methods=['GET'])
+def statistik_pool():
+    """Konfigurasi dan statistik pool koneksi (checkout, waktu tunggu, timeout)."""
+    try:
+        return jsonify(info_pool(db.engine)), 200
+    except SQLAlchemyError as e:
+        return jsonify({'error': 'Gagal membaca status database.', 'details': str(e)}), 503
+
+
+# --- STATUS JOB ANTRIAN (polling setelah pekerjaan dijadwalkan) ---
+
+@api_bp.route('/api/v1/jobs/<int:job_id>', methods=['GET'])
+def status_job(job_id):
+    job = db.session.get(AntrianJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan.'}), 404
+    return jsonify(job.ke_dict()), 200
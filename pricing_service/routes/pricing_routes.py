@@ -12,6 +12,11 @@ from datetime import date
 from ..db_instance import db, HargaSewa, TransaksiSewa 
 # Asumsi form berada di 'forms.py'
 from ..forms import HargaForm 
+# Hitung ulang nilai_sewa transaksi secara set-based (satu statement UPDATE)
+from ..hitung_ulang import pratinjau_nilai_sewa, hitung_ulang_nilai_sewa
+# Antrian job latar belakang (lihat antrian.py)
+from ..antrian import tugas, antrikan
+import click
 import os # Pastikan ini sudah diimpor
 MANAGEMENT_SERVICE_URL = os.getenv('MANAGEMENT_SERVICE_URL', 'http://127.0.0.1:5002')
 
@@ -100,10 +105,20 @@ def edit_harga(harga_id):
     form = HargaForm(obj=harga)
 
     if form.validate_on_submit():
+        harga_lama = harga.harga_per_boto
         form.populate_obj(harga)
         try:
+            # Jika tarif berubah, perbarui nilai_sewa semua transaksi yang memakai
+            # harga ini dalam transaksi DB yang sama dengan perubahan harganya.
+            jumlah_transaksi = 0
+            if harga.harga_per_boto != harga_lama:
+                db.session.flush()
+                jumlah_transaksi = hitung_ulang_nilai_sewa(harga_id)
+
             db.session.commit()
             flash('Harga sewa berhasil diperbarui!', 'success')
+            if jumlah_transaksi:
+                flash(f'Nilai sewa {jumlah_transaksi} transaksi dihitung ulang sesuai harga baru.', 'info')
             return redirect(url_for('harga.list_harga'))
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -131,5 +146,77 @@ def hapus_harga(harga_id):
     return redirect(url_for('harga.list_harga'))
 
 
+# ---------------------------------------------------------------------\
+## 5. ROUTE HITUNG ULANG NILAI SEWA (WEB UI)\
+# ---------------------------------------------------------------------\
+@harga_bp.route('/hitung_ulang/<int:harga_id>', methods=['GET', 'POST'])
+def hitung_ulang_harga(harga_id):
+    """GET: pratinjau (dry-run) selisih nilai_sewa. POST: terapkan dalam satu UPDATE."""
+    harga = db.session.get(HargaSewa, harga_id)
+    if harga is None:
+        flash('Harga tidak ditemukan.', 'danger')
+        return redirect(url_for('harga.list_harga'))
+
+    if request.method == 'POST' and request.form.get('latar_belakang'):
+        # Banyak transaksi: jadwalkan ke worker, request langsung kembali
+        try:
+            job = antrikan('hitung_ulang_nilai_sewa', {'harga_id': harga_id})
+            db.session.commit()
+            flash(f"Hitung ulang dijadwalkan sebagai job #{job.id}. Status: {url_for('api.status_job', job_id=job.id)}", 'info')
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            flash(f'Gagal menjadwalkan hitung ulang: {e}', 'danger')
+        return redirect(url_for('harga.list_harga'))
+
+    if request.method == 'POST':
+        try:
+            jumlah = hitung_ulang_nilai_sewa(harga_id)
+            db.session.commit()
+            flash(f'Nilai sewa {jumlah} transaksi berhasil dihitung ulang.', 'success')
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            flash(f'Gagal menghitung ulang nilai sewa: {e}', 'danger')
+        return redirect(url_for('harga.list_harga'))
+
+    try:
+        pratinjau = pratinjau_nilai_sewa(harga_id)
+    except SQLAlchemyError as e:
+        flash(f'Gagal membuat pratinjau: {e}', 'danger')
+        return redirect(url_for('harga.list_harga'))
+
+    return render_template('hitung_ulang_harga.html',
+                           harga=harga,
+                           pratinjau=pratinjau,
+                           title='Hitung Ulang Nilai Sewa')
+
+
+@tugas('hitung_ulang_nilai_sewa')
+def tugas_hitung_ulang(payload):
+    """Job antrian: hitung ulang nilai_sewa (idempoten, hanya baris yang berubah)."""
+    return {'jumlah': hitung_ulang_nilai_sewa(payload.get('harga_id'))}
+
+
+# ---------------------------------------------------------------------\
+## 6. PERINTAH CLI: flask --app pricing_service.app harga hitung-ulang\
+# ---------------------------------------------------------------------\
+@harga_bp.cli.command('hitung-ulang')
+@click.option('--harga-id', type=int, default=None, help='Batasi ke satu ID harga (default: semua harga).')
+@click.option('--dry-run', is_flag=True, help='Hanya tampilkan selisih, tanpa menulis ke database.')
+def hitung_ulang_cli(harga_id, dry_run):
+    """Menghitung ulang nilai_sewa transaksi sesuai harga_per_boto terkini."""
+    if dry_run:
+        pratinjau = pratinjau_nilai_sewa(harga_id)
+        for row in pratinjau['perubahan']:
+            click.echo(f"sewa_id={row['sewa_id']} harga_id={row['harga_sewa_id']}: "
+                       f"{row['nilai_lama']} -> {row['nilai_baru']}")
+        click.echo(f"[DRY-RUN] {pratinjau['jumlah']} transaksi akan berubah "
+                   f"(total {pratinjau['total_lama']} -> {pratinjau['total_baru']}).")
+        return
+
+    jumlah = hitung_ulang_nilai_sewa(harga_id)
+    db.session.commit()
+    click.echo(f"{jumlah} transaksi dihitung ulang.")
+
+
 # --- ROUTE API: list_all_harga SUDAH DIHAPUS DARI FILE INI ---
 # --- Rute API sekarang hanya ada di app.py: /api/v1/harga/boto/current dan /api/v1/harga/list_all ---
\ No newline at end of file
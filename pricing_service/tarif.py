@@ -0,0 +1,19 @@
+# FILE: pricing_service/tarif.py
+#
+# Rumus nilai sewa yang sama dengan Management Service (tambah/edit transaksi):
+#   nilai_sewa = luas_boto * (harga_per_boto / 100) * (durasi_bulan / 12)
+# harga_per_boto adalah tarif untuk 100 boto per tahun.
+
+from decimal import Decimal, ROUND_HALF_UP
+
+SERATUS = Decimal(100)
+DUA_BELAS = Decimal(12)
+SEN = Decimal('0.01')
+
+
+def hitung_nilai_sewa(luas_boto, harga_per_boto, durasi_bulan):
+    """Menghitung nilai sewa secara eksak dengan Decimal, dibulatkan ke 2 desimal (NUMERIC(15,2))."""
+    harga_per_1_boto_annual = Decimal(harga_per_boto) / SERATUS
+    total_annual_rent = Decimal(luas_boto) * harga_per_1_boto_annual
+    total_sewa = total_annual_rent * (Decimal(durasi_bulan) / DUA_BELAS)
+    return total_sewa.quantize(SEN, rounding=ROUND_HALF_UP)
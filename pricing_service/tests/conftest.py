@@ -0,0 +1,61 @@
+# FILE: pricing_service/tests/conftest.py
+#
+# Fixture uji Pricing Service: aplikasi di atas SQLite sementara dengan katalog
+# harga beberapa tahun dan transaksi yang memakainya. Pricing Service dijalankan
+# sebagai paket dari root repo, jadi uji juga dijalankan dari sana:
+#   python -m pytest
+
+import os
+import sys
+from datetime import date
+
+import pytest
+
+DIR_REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if DIR_REPO not in sys.path:
+    sys.path.insert(0, DIR_REPO)
+
+from pricing_service.app import create_app  # noqa: E402
+from pricing_service.db_instance import db, HargaSewa, TransaksiSewa  # noqa: E402
+from pricing_service.indeks_harga import tandai_kotor  # noqa: E402
+
+TAHUN_HARGA = range(2015, 2027)
+TRANSAKSI_PER_HARGA = 5
+
+
+def _isi_data_contoh():
+    katalog = [
+        HargaSewa(harga_per_boto=3000000 + 100000 * i, tahun_penetapan=tahun,
+                  tanggal_mulai_efektif=date(tahun, 1, 1), tanggal_akhir_efektif=date(tahun, 12, 31))
+        for i, tahun in enumerate(TAHUN_HARGA)
+    ]
+    db.session.add_all(katalog)
+    db.session.flush()
+    db.session.add_all(
+        TransaksiSewa(harga_sewa_id=harga.id) for harga in katalog for _ in range(TRANSAKSI_PER_HARGA)
+    )
+    db.session.commit()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'pricing.db'}",
+        SQLALCHEMY_ENGINE_OPTIONS={},
+        HARGA_NOTIFIKASI='mati',
+        WTF_CSRF_ENABLED=False,
+        TESTING=True,
+    )
+    with app.app_context():
+        db.create_all()
+        _isi_data_contoh()
+        # Indeks harga bersifat global per proses: paksa dibangun ulang dari database uji
+        tandai_kotor()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,69 @@
+# FILE: pricing_service/tests/test_jumlah_query_pricing.py
+#
+# Batas jumlah query SQL per route (bersama/profiler_sql.py). Endpoint API harga
+# dilayani dari indeks di memori (indeks_harga.py): saat indeks dingin cukup
+# satu query sidik + satu query muat katalog, setelah itu tanpa query sama sekali
+# selama PRICE_INDEX_RECHECK belum lewat.
+
+import pytest
+
+from bersama.profiler_sql import periksa_jumlah_query
+from pricing_service.db_instance import db, HargaSewa
+
+# (url, teks yang wajib muncul di respons). Data contoh: harga 2015-2026 (conftest.py)
+ENDPOINT_API = [
+    ('/api/v1/harga/list_all', '2026-01-01'),
+    ('/api/v1/harga/at?date=2020-06-15', '3500000'),
+    ('/api/v1/harga/boto/current', None),
+]
+
+
+@pytest.mark.parametrize('url,teks', ENDPOINT_API)
+def test_jumlah_query_api_indeks_dingin(client, url, teks):
+    response = periksa_jumlah_query(client, url, 2)
+    assert response.status_code == 200
+    if teks:
+        assert teks in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('url,teks', ENDPOINT_API)
+def test_api_tanpa_query_saat_indeks_segar(client, url, teks):
+    client.get('/api/v1/harga/list_all')
+    response = periksa_jumlah_query(client, url, 0)
+    assert response.status_code == 200
+
+
+def test_api_cek_ulang_sidik_saja(app, client):
+    """
+    Saat interval cek ulang lewat dan katalog tidak berubah, katalog tidak dimuat ulang:
+    hanya query sidik (ETag dan isi respons masing-masing memanggil get_indeks()).
+    """
+    app.config['PRICE_INDEX_RECHECK'] = 0
+    client.get('/api/v1/harga/list_all')
+    response = periksa_jumlah_query(client, '/api/v1/harga/at?date=2020-06-15', 2)
+    assert response.status_code == 200
+
+
+def test_api_revalidasi_304(client):
+    etag = client.get('/api/v1/harga/list_all').headers['ETag']
+    response = periksa_jumlah_query(client, '/api/v1/harga/list_all', 0, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_jumlah_query_riwayat_harga(client):
+    """Jumlah transaksi per harga dihitung lewat JOIN + GROUP BY, bukan satu query per baris."""
+    response = periksa_jumlah_query(client, '/pengaturan/harga/list', 1)
+    assert response.status_code == 200
+    assert '2026' in response.get_data(as_text=True)
+
+
+def test_etag_berubah_saat_harga_diedit(app, client):
+    """Edit harga dalam tick jam yang sama (sidik katalog tidak bergeser) tetap membatalkan ETag lama."""
+    etag = client.get('/api/v1/harga/boto/current').headers['ETag']
+    harga = db.session.execute(db.select(HargaSewa).order_by(HargaSewa.id.desc())).scalars().first()
+    harga.harga_per_boto = 9999999
+    db.session.commit()
+
+    response = client.get('/api/v1/harga/boto/current', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,39 @@
+# FILE: pricing_service/tests/test_quote_harga.py
+#
+# POST /api/v1/harga/quote: setiap baris yang tidak valid mendapat 'error'
+# sendiri tanpa menggagalkan baris lain atau seluruh permintaan.
+
+import pytest
+
+BARIS_TIDAK_VALID = [
+    {'harga_id': 1, 'luas_boto': '1e400', 'durasi_bulan': 12},
+    {'harga_id': 1, 'luas_boto': '10', 'durasi_bulan': 10 ** 40},
+    {'harga_id': [1], 'luas_boto': '10', 'durasi_bulan': 12},
+    {'harga_id': True, 'luas_boto': '10', 'durasi_bulan': 12},
+    {'harga_id': 1, 'luas_boto': '10', 'durasi_bulan': 6.9},
+    {'harga_id': 1, 'luas_boto': 'NaN', 'durasi_bulan': 12},
+    {'harga_id': 1, 'luas_boto': '-1', 'durasi_bulan': 12},
+    {'harga_id': 1, 'luas_boto': '10', 'durasi_bulan': 0},
+    'bukan objek',
+]
+
+
+@pytest.mark.parametrize('baris', BARIS_TIDAK_VALID)
+def test_baris_tidak_valid_menjadi_error_per_baris(client, baris):
+    response = client.post('/api/v1/harga/quote', json={'items': [
+        baris,
+        {'date': '2020-06-15', 'luas_boto': '12.5', 'durasi_bulan': '12'},
+    ]})
+    assert response.status_code == 200
+    hasil = response.get_json()['hasil']
+    assert 'error' in hasil[0]
+    assert 'error' not in hasil[1]
+    assert response.get_json()['jumlah_error'] == 1
+
+
+def test_kutipan_eksak(client):
+    response = client.post('/api/v1/harga/quote', json={'items': [
+        {'date': '2020-06-15', 'luas_boto': '12.5', 'durasi_bulan': 6},
+    ]})
+    # Harga 2020 di data contoh: 3.500.000 per 100 boto per tahun
+    assert response.get_json()['hasil'][0]['nilai_sewa'] == '218750.00'
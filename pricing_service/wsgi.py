@@ -0,0 +1,22 @@
+# pricing_service/wsgi.py
+#
+# Entry point WSGI produksi Pricing Service (jalankan dari root repo):
+#   gunicorn -c pricing_service/gunicorn.conf.py pricing_service.wsgi:app
+# Dengan preload_app (default di gunicorn.conf.py) aplikasi dibangun sekali di
+# proses master lalu di-fork ke worker: modul Python, objek aplikasi dan
+# konfigurasi dibagi copy-on-write antar worker (lihat gunicorn.conf.py).
+
+from .app import create_app
+from .db_instance import db
+
+app = create_app()
+
+
+def setelah_fork():
+    """
+    Dipanggil di setiap worker setelah fork (hook post_fork gunicorn).
+    Koneksi DB tidak boleh dipakai bersama antar proses: buang isi pool
+    warisan master tanpa menutup socket milik proses lain.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)